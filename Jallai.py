@@ -1,8 +1,18 @@
 import tkinter as tk
+from functools import lru_cache
 from tkinter import ttk
 from jdatetime import date as JalaliDate
-from tkcalendar import DateEntry
-from jdatetime import date as JalaliDate, GregorianToJalali
+import jalali_calendar
+
+
+DAY_NAMES = ["ش", "ی", "د", "س", "چ", "پ", "ج"]
+GRID_CELLS = 6 * 7  # Enough weeks for any month that starts late in the week
+
+
+@lru_cache(maxsize=None)
+def month_layout(year, month):
+    """(first weekday, number of days) of a Jalali month; at most 12 entries per year ever get computed."""
+    return jalali_calendar.weekday(year, month, 1), jalali_calendar.month_length(year, month)
 
 
 class JalaliDatepicker(tk.Toplevel):
@@ -14,8 +24,8 @@ class JalaliDatepicker(tk.Toplevel):
 
         self.selected_date = JalaliDate.today()
 
-        self.min_year = 1300
-        self.max_year = 1500
+        self.min_year = jalali_calendar.MIN_YEAR
+        self.max_year = jalali_calendar.MAX_YEAR
 
         self.create_widgets()
 
@@ -52,53 +62,55 @@ class JalaliDatepicker(tk.Toplevel):
         self.update_display()
 
     def create_calendar(self):
-        for widget in self.calendar_frame.winfo_children():
-            widget.destroy()
-
-        day_names = ["ش", "ی", "د", "س", "چ", "پ", "ج"]
-        for i, day_name in enumerate(day_names):
+        """Builds the weekday header and a fixed 6x7 grid of day buttons, once."""
+        for i, day_name in enumerate(DAY_NAMES):
             label = ttk.Label(self.calendar_frame, text=day_name)
             label.grid(row=0, column=i, padx=5, pady=5)
 
-        year = self.selected_date.year
-        month = self.selected_date.month
-
-        if month == 12:
-            num_days = 30 if self.is_leap_year(year+1) else 29
-        else:
-            num_days = (JalaliDate(year, month + 1, 1) -
-                        JalaliDate(year, month, 1)).days
-
-        self.date_label.config(text=self.selected_date.strftime("%d %B %Y"))
-
-        first_day = JalaliDate(year, month, 1).weekday()
-
-        for day in range(1, num_days + 1):
-            row = (first_day + day - 1) // 7 + 1
-            col = (first_day + day - 1) % 7
-            button = ttk.Button(self.calendar_frame, text=str(
-                day), command=lambda d=day: self.select_date(d))
-            button.grid(row=row, column=col, padx=5, pady=5)
+        self.day_buttons = []
+        self.cell_days = [None] * GRID_CELLS  # Day shown in each cell, None while hidden
+        for cell in range(GRID_CELLS):
+            button = ttk.Button(self.calendar_frame, text="", command=lambda c=cell: self.select_date(self.cell_days[c]))
+            button.grid(row=cell // 7 + 1, column=cell % 7, padx=5, pady=5)
+            button.grid_remove()
+            self.day_buttons.append(button)
+
+    def render_month(self):
+        """Re-labels, shows and hides the grid's buttons for the selected month. Untouched cells stay as they are."""
+        first_day, num_days = month_layout(self.selected_date.year, self.selected_date.month)
+        for cell, button in enumerate(self.day_buttons):
+            day = cell - first_day + 1
+            if not 1 <= day <= num_days:
+                day = None
+            if day == self.cell_days[cell]:
+                continue
+            if day is None:
+                button.grid_remove()
+            else:
+                button.config(text=str(day))
+                if self.cell_days[cell] is None:
+                    button.grid()
+            self.cell_days[cell] = day
 
     def update_display(self):
         self.date_label.config(text=self.selected_date.strftime("%d %B %Y"))
         self.month_dropdown.set(self.selected_date.strftime("%B"))
         self.year_dropdown.set(self.selected_date.year)
-        self.create_calendar()
+        self.render_month()
 
     def update_month(self, event):
         selected_month = self.month_var.get()
         month_index = self.month_dropdown['values'].index(selected_month) + 1
         self.selected_date = JalaliDate(
             self.selected_date.year, month_index, 1)
-        if month_index == 12:
-            self.create_calendar()
         self.update_display()
 
     def update_year(self, event):
         selected_year = int(self.year_var.get())
+        # 30 Esfand only exists in leap years
+        day = min(self.selected_date.day, jalali_calendar.month_length(selected_year, self.selected_date.month))
         self.selected_date = JalaliDate(
-            selected_year, self.selected_date.month, self.selected_date.day)
+            selected_year, self.selected_date.month, day)
         self.update_display()
 
     def select_date(self, day):
@@ -110,7 +122,7 @@ class JalaliDatepicker(tk.Toplevel):
         self.destroy()
 
     def is_leap_year(self, year):
-        return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+        return jalali_calendar.is_leap(year)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""
+Where the app keeps its files. Only imports os, so even the quickest launches
+(a second window handing off to the first, see single_instance) can use it.
+"""
+import os
+
+
+APP_NAME = "DeadlineCountdown"
+
+
+def app_data_dir():
+    """
+    The folder holding deadlines.json and the notes: %LOCALAPPDATA%\\DeadlineCountdown on
+    Windows, $XDG_DATA_HOME/DeadlineCountdown (~/.local/share) elsewhere. Created if needed.
+    """
+    base = os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser("~"), ".local", "share")
+    folder = os.path.join(base, APP_NAME)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def get_persistent_path(filename="deadlines.json"):
+    """Returns the path of `filename` in the app data folder; the file itself is created by the first save."""
+    return os.path.join(app_data_dir(), filename)
@@ -0,0 +1,949 @@
+"""
+Headless benchmarks for the deadline engine.
+
+    python benchmark.py                 # run everything
+    python benchmark.py tick            # only the per-tick countdown benchmark
+    python benchmark.py tick --sizes 10000 100000
+
+Only the renderer benchmark needs a display; it is skipped without one.
+"""
+import argparse
+import datetime
+import gc
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+import jdatetime
+from jdatetime import date as JalaliDate
+
+from countdown_engine import CountdownEngine, NUMPY_MIN_ROWS, color_for, format_countdown, load_numpy, local_midnight
+from deadline_store import Deadline
+
+
+def make_parsed_rows(n, seed=0):
+    """Synthetic Deadlines spread over the next year."""
+    rng = random.Random(seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    rows = []
+    for i in range(n):
+        dt = now + datetime.timedelta(seconds=rng.randint(-7 * 86400, 365 * 86400))
+        shamsi = jdatetime.date.fromgregorian(date=dt.date()).strftime("%Y-%m-%d")
+        rows.append(Deadline(f"id-{i}", f"course-{i}", shamsi, time.mktime(dt.timetuple()), rng.random() < 0.2))
+    return rows
+
+
+def make_store_rows(n, seed=0):
+    """The stored form (deadlines.json rows) of make_parsed_rows(n)."""
+    return [{"id": d.id, "course": d.course, "deadline_shamsi": d.shamsi, "checked": "1" if d.checked else "0",
+             "deadline_time": time.strftime("%H:%M:%S", time.localtime(d.due))} for d in make_parsed_rows(n, seed)]
+
+
+def write_deadlines(directory, rows):
+    path = os.path.join(directory, "deadlines.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False)
+    return path
+
+
+class SimulatedClock:
+    """A clock that only moves when told to, so hours of ticks can be replayed in seconds."""
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def legacy_parsed_row(deadline, jalali=False):
+    """The (id, course, shamsi_date, deadline_dt, is_checked, due_epoch) tuple rows were parsed into before Deadline."""
+    dt = datetime.datetime.fromtimestamp(deadline.due)
+    if jalali:
+        dt = jdatetime.datetime.fromgregorian(datetime=dt)
+    return (deadline.id, deadline.course, deadline.shamsi, dt, deadline.checked, deadline.due)
+
+
+def measure(func, repeat):
+    """Runs func `repeat` times and returns the timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    print(f"  {name:<28} median {statistics.median(timings):9.3f} ms   min {min(timings):9.3f} ms")
+
+
+def rss_kb():
+    """Resident set size of this process in KiB, or None where it cannot be read cheaply."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def legacy_tick(rows):
+    """The per-row jdatetime arithmetic load_deadlines used to do every second. Rows hold jdatetime deadlines."""
+    now = jdatetime.datetime.now()
+    midnight = jdatetime.datetime(now.year, now.month, now.day)
+    out = []
+    for _, course, shamsi, deadline_dt, is_checked, _ in rows:
+        total_seconds = int((deadline_dt - now).total_seconds())
+        total_range = (deadline_dt - midnight).total_seconds()
+        passed = total_range - total_seconds
+        progress = max(0, min(100, int((passed / total_range) * 100))) if total_range > 0 else 100
+        out.append((total_seconds, progress))
+    return out
+
+
+def bench_tick(sizes, repeat):
+    print("Per-tick countdown cost")
+    for n in sizes:
+        rows = make_parsed_rows(n)
+        print(f" {n} deadlines")
+
+        start = time.perf_counter()
+        engine = CountdownEngine(use_numpy=False)
+        engine.load(rows)
+        print(f"  {'load (one-off)':<28} {(time.perf_counter() - start) * 1000:16.3f} ms")
+
+        legacy_rows = [legacy_parsed_row(row, jalali=True) for row in rows]
+        report("legacy per-row jdatetime", measure(lambda: legacy_tick(legacy_rows), max(1, repeat // 10)))
+        report("engine (pure Python)", measure(engine.tick, repeat))
+        if load_numpy() is None:
+            print("  engine (NumPy)               skipped, numpy not installed")
+        elif n < NUMPY_MIN_ROWS:
+            print("  engine (NumPy)               skipped, list too short to use it")
+        else:
+            engine_np = CountdownEngine(use_numpy=True)
+            engine_np.load(rows)
+            report("engine (NumPy)", measure(engine_np.tick, repeat))
+
+
+def traced_size(build):
+    """Runs build() under tracemalloc. Returns (result, KiB it still holds)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current // 1024
+
+
+def legacy_load_deadlines(engine, parsed, now):
+    """What load_deadlines returned every tick before Deadline: one 7-tuple per row."""
+    snapshot = engine.tick(now)
+    return [(course, parsed[i][2], snapshot.countdown_text(i), int(snapshot.days[i]), bool(snapshot.expired[i]),
+             int(snapshot.progress[i]), bool(engine.checked[i])) for i, course in enumerate(engine.courses)]
+
+
+def bench_memory(sizes, repeat):
+    from deadline_store import DeadlineStore, parse_row
+
+    print("Memory held for the deadline list (tracemalloc)")
+    for n in sizes:
+        rows = make_store_rows(n)
+        print(f" {n} deadlines")
+        now = time.time()
+
+        legacy, legacy_kib = traced_size(lambda: [legacy_parsed_row(parse_row(row)) for row in rows])
+        deadlines, deadlines_kib = traced_size(lambda: [parse_row(row) for row in rows])
+        engine = CountdownEngine(use_numpy=False)
+        engine.load(deadlines)
+        _, tuples_kib = traced_size(lambda: legacy_load_deadlines(engine, legacy, now))
+        _, snapshot_kib = traced_size(lambda: engine.tick(now))
+
+        print(f"  {'parsed 6-tuples (before)':<28} {legacy_kib:>9} KiB   {legacy_kib * 1024 / n:6.0f} B/row")
+        print(f"  {'Deadline records':<28} {deadlines_kib:>9} KiB   {deadlines_kib * 1024 / n:6.0f} B/row")
+        print(f"  {'per-tick 7-tuples (before)':<28} {tuples_kib:>9} KiB   {tuples_kib * 1024 / n:6.0f} B/row")
+        print(f"  {'per-tick snapshot arrays':<28} {snapshot_kib:>9} KiB   {snapshot_kib * 1024 / n:6.0f} B/row")
+        before, after = legacy_kib + tuples_kib, deadlines_kib + snapshot_kib
+        print(f"  {'total before -> after':<28} {before:>9} KiB -> {after} KiB ({100 - after * 100 // max(1, before)}% less)")
+        del legacy, deadlines
+
+        directory = tempfile.mkdtemp(prefix="memory-bench-")
+        try:
+            path = write_deadlines(directory, rows)
+            del rows
+            def load_store():
+                store = DeadlineStore(path)
+                store.get_parsed()
+                return store
+            rss_before = rss_kb()
+            store, store_kib = traced_size(load_store)
+            rss_after = rss_kb()
+            rss = f"   (RSS +{rss_after - rss_before} KiB)" if rss_before is not None else ""
+            print(f"  {'whole store after load':<28} {store_kib:>9} KiB   {store_kib * 1024 / n:6.0f} B/row{rss}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def count_tk_objects(widget):
+    """Number of Tk widgets in the tree rooted at `widget` (including it)."""
+    return 1 + sum(count_tk_objects(child) for child in widget.winfo_children())
+
+
+def bench_renderer(sizes, repeat):
+    import tkinter as tk
+    from tkinter import font as tkFont
+    from deadline_list import RENDERERS, create_deadline_list
+
+    print("Main window renderers")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"  skipped, no display available ({e})")
+        return
+    root.geometry("370x800")
+    font = tkFont.Font(family="Vazir", size=10)
+    struck_font = tkFont.Font(family="Vazir", size=10, overstrike=True, slant="italic")
+
+    for n in sizes:
+        engine = CountdownEngine()
+        engine.load(make_parsed_rows(n))
+        print(f" {n} deadlines")
+
+        for renderer in RENDERERS:
+            tracemalloc.start()
+            rss_before = rss_kb()
+            canvas = tk.Canvas(root, width=350, height=700)
+            canvas.pack(fill="both", expand=True)
+
+            def paint(key, row):
+                now = time.time()
+                i = engine.index[key]
+                course = engine.courses[i]
+                remaining, days, progress, _, expired = engine.row_state(i, now, local_midnight(now))
+                checked = bool(engine.checked[i])
+                deadline_list.paint_row(row, f"{format_countdown(remaining)} | {engine.shamsi[i]} | {course}",
+                                        progress, color_for(days, checked), expired or checked, expired, checked)
+
+            bound = {}
+            deadline_list = create_deadline_list(renderer, canvas, font, struck_font, bound, paint, lambda c, v: None)
+            root.update()
+
+            start = time.perf_counter()
+            deadline_list.set_keys(list(engine.ids))
+            root.update()
+            full_ms = (time.perf_counter() - start) * 1000
+
+            def tick():
+                for key, row in bound.items():
+                    paint(key, row)
+                root.update_idletasks()
+
+            timings = measure(tick, repeat)
+            widgets = count_tk_objects(root)
+            items = len(canvas.find_all())
+            python_kb = tracemalloc.get_traced_memory()[0] // 1024
+            rss_after = rss_kb()
+            tracemalloc.stop()
+
+            print(f"  [{renderer}]")
+            print(f"  {'full refresh':<28} {full_ms:16.3f} ms")
+            report("per-tick repaint", timings)
+            print(f"  {'Tk widgets / canvas items':<28} {widgets:>9} / {items}")
+            print(f"  {'Python heap (tracemalloc)':<28} {python_kb:>9} KiB")
+            if rss_before is not None:
+                print(f"  {'RSS growth':<28} {rss_after - rss_before:>9} KiB")
+
+            canvas.destroy()
+
+    root.destroy()
+
+
+def bench_datepicker(sizes, repeat):
+    import tkinter as tk
+    from Jallai import JalaliDatepicker
+
+    print("Datepicker year scrubbing")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"  skipped, no display available ({e})")
+        return
+    entry = tk.Entry(root)
+    picker = JalaliDatepicker(root, entry)
+    years = list(range(picker.min_year, picker.max_year + 1))
+
+    for n in sizes:
+        print(f" {n} year changes")
+        position = iter(range(n))
+
+        def scrub():
+            picker.year_var.set(years[next(position) % len(years)])
+            picker.update_year(None)
+            root.update_idletasks()
+
+        widgets_before = count_tk_objects(picker)
+        report("one year change", measure(scrub, n))
+        print(f"  {'Tk widgets in the picker':<28} {widgets_before:>9} -> {count_tk_objects(picker)}")
+
+    root.destroy()
+
+
+def make_notes(days, seed=0):
+    """`days` consecutive daily notes of a few hundred characters, keyed like the notebook does."""
+    rng = random.Random(seed)
+    words = ["امتحان", "تمرین", "پروژه", "جلسه", "deadline", "review", "کتابخانه", "ارائه"]
+    start = jdatetime.date(1400, 1, 1)
+    notes = {}
+    for i in range(days):
+        day = (start + jdatetime.timedelta(days=i)).strftime("%Y-%m-%d")
+        notes[day] = " ".join(rng.choice(words) for _ in range(rng.randint(30, 80)))
+    return notes
+
+
+class LegacyJSONNotes:
+    """The old notebook behavior: one notes.json parsed on every read, rewritten on every save."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, "notes.json")
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get(self, date_str):
+        return self._load().get(date_str, "")
+
+    def put(self, date_str, text):
+        notes = self._load()
+        notes[date_str] = text
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(notes, f, ensure_ascii=False, indent=4)
+
+    def put_many(self, notes):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(notes, f, ensure_ascii=False, indent=4)
+
+    def close(self):
+        pass
+
+
+def bench_notes(sizes, repeat):
+    from notes_store import SQLiteNotesStore, ShardedNotesStore
+
+    print("Notebook navigation and save latency")
+    for days in sizes:
+        notes = make_notes(days)
+        dates = list(notes)
+        print(f" {days} days of notes ({days / 365:.1f} years)")
+
+        backends = [
+            ("legacy notes.json", LegacyJSONNotes),
+            ("sqlite", lambda d: SQLiteNotesStore(os.path.join(d, "notes.sqlite3"))),
+            ("sharded per month", lambda d: ShardedNotesStore(os.path.join(d, "notes"))),
+        ]
+        for name, factory in backends:
+            directory = tempfile.mkdtemp(prefix="notes-bench-")
+            try:
+                store = factory(directory)
+                store.put_many(notes)
+                position = iter(range(len(dates) - 1, -1, -1))  # Walk backwards like "< دیروز"
+                navigate = measure(lambda: store.get(dates[next(position)]), min(repeat, len(dates)))
+                save = measure(lambda: store.put(dates[-1], notes[dates[-1]] + " edited"), repeat)
+                store.close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            print(f"  [{name}]")
+            report("navigate (read one day)", navigate)
+            report("save (write one day)", save)
+
+
+def bench_search(sizes, repeat):
+    from notes_search import NotesIndex, normalize
+
+    print("Notebook search latency")
+    for days in sizes:
+        notes = make_notes(days)
+        print(f" {days} days of notes ({days / 365:.1f} years)")
+        directory = tempfile.mkdtemp(prefix="search-bench-")
+        try:
+            index = NotesIndex(os.path.join(directory, "notes_index.sqlite3"))
+            build = measure(lambda: index.rebuild(notes.items()), 1)
+            index.close()
+            load = measure(lambda: NotesIndex(os.path.join(directory, "notes_index.sqlite3")).close(), min(repeat, 3))
+            index = NotesIndex(os.path.join(directory, "notes_index.sqlite3"))
+            # What a search without an index has to do: normalize and scan every note
+            scan = measure(lambda: [day for day, text in notes.items() if "پروژه" in normalize(text)], repeat)
+            word = measure(lambda: index.search("پروژه"), repeat)
+            prefix = measure(lambda: index.search("امتحان کتاب"), repeat)
+            index.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        report("build index (first run)", build)
+        report("load index at startup", load)
+        report("linear scan, one word", scan)
+        report("indexed, one word", word)
+        report("indexed, word + prefix", prefix)
+
+
+def legacy_parse_row(row):
+    """How a stored row was parsed before jalali_calendar: jdatetime strptime, then a Gregorian round trip."""
+    shamsi_date = row['deadline_shamsi']
+    deadline_dt = jdatetime.datetime.strptime(shamsi_date + " " + row['deadline_time'], "%Y-%m-%d %H:%M:%S")
+    return deadline_dt, time.mktime(deadline_dt.togregorian().timetuple())
+
+
+def legacy_month_layout(year, month):
+    """Month length and first weekday the way the datepicker used to get them."""
+    if month == 12:
+        num_days = 30 if JalaliDate(year, 1, 1).isleap() else 29
+    else:
+        num_days = (JalaliDate(year, month + 1, 1) - JalaliDate(year, month, 1)).days
+    return num_days, JalaliDate(year, month, 1).weekday()
+
+
+def bench_jalali(sizes, repeat):
+    import jalali_calendar
+    from deadline_store import parse_row
+
+    print("Jalali date handling: jdatetime vs. jalali_calendar")
+    for n in sizes:
+        rng = random.Random(0)
+        rows = []
+        for i in range(n):
+            year, month, day = jalali_calendar.from_epoch_day(rng.randint(19000, 21000))
+            rows.append({'id': f"id-{i}", 'course': f"course-{i}", 'deadline_shamsi': f"{year}-{month:02d}-{day:02d}",
+                         'deadline_time': f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00", 'checked': '0'})
+        months = [(year, month) for year in range(jalali_calendar.MIN_YEAR, jalali_calendar.MAX_YEAR + 1)
+                  for month in range(1, 13)]
+        dates = [row['deadline_shamsi'] for row in rows]
+        print(f" {n} rows, {len(months)} datepicker months")
+        report("parse rows: jdatetime", measure(lambda: [legacy_parse_row(row) for row in rows], repeat))
+        report("parse rows: jalali_calendar", measure(lambda: [parse_row(row) for row in rows], repeat))
+        report("validate: jdatetime",
+               measure(lambda: [JalaliDate(*map(int, d.split('-'))) for d in dates], repeat))
+        report("validate: jalali_calendar",
+               measure(lambda: [jalali_calendar.parse_date(d) for d in dates], repeat))
+        report("layouts: jdatetime", measure(lambda: [legacy_month_layout(*m) for m in months], repeat))
+        report("layouts: jalali_calendar",
+               measure(lambda: [(jalali_calendar.month_length(y, m), jalali_calendar.weekday(y, m, 1))
+                                for y, m in months], repeat))
+
+
+def bench_import(sizes, repeat):
+    import csv
+    from deadline_io import export_deadlines, import_deadlines
+    from deadline_store import DeadlineStore
+
+    print("Bulk import and export")
+    for n in sizes:
+        directory = tempfile.mkdtemp(prefix="import-bench-")
+        try:
+            source = os.path.join(directory, "schedule.csv")
+            rng = random.Random(0)
+            with open(source, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["course", "deadline_shamsi", "deadline_time"])
+                for i in range(n):
+                    writer.writerow([f"course-{i}", f"1405-{rng.randint(1, 12):02d}-{rng.randint(1, 29):02d}",
+                                     f"{rng.randint(0, 23):02d}:{rng.choice((0, 30)):02d}:00"])
+            print(f" {n} rows ({os.path.getsize(source) // 1024} KiB of CSV)")
+
+            store = DeadlineStore(os.path.join(directory, "deadlines.json"), fsync_policy="snapshot")
+            start = time.perf_counter()
+            result = import_deadlines(store, source)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {'import CSV':<28} {elapsed:16.3f} ms   ({result})")
+
+            # Separate run: tracemalloc slows the import down several times over
+            tracemalloc.start()
+            import_deadlines(DeadlineStore(os.path.join(directory, "traced.json"), fsync_policy="snapshot"), source)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {'peak Python heap':<28} {peak // 1024:>9} KiB")
+
+            for fmt in ("csv", "jsonl", "ics"):
+                target = os.path.join(directory, f"export.{fmt}")
+                report(f"export {fmt}", measure(lambda: export_deadlines(store.get_rows(), target), max(1, repeat // 10)))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_recurring(sizes, repeat):
+    import jalali_calendar
+    from deadline_store import DeadlineStore
+    from recurrence import occurrences
+
+    print("Recurring deadlines")
+    for n in sizes:
+        # Daily and weekly rules that started five years ago and never end
+        start = jalali_calendar.today_epoch_day() - 5 * 365
+        rows = [{"course": f"course-{i}", "deadline_shamsi": jalali_calendar.day_string(start + i % 7),
+                 "deadline_time": "23:59:00", "checked": "0",
+                 "repeat": {"freq": "daily" if i % 2 else "weekly", "interval": 1}} for i in range(n)]
+        print(f" {n} rules started five years ago")
+        directory = tempfile.mkdtemp(prefix="recurring-bench-")
+        try:
+            store = DeadlineStore(os.path.join(directory, "deadlines.json"), fsync_policy="never")
+            store.add_many(rows)
+            report("expand for today", measure(store._rebuild_index, max(1, repeat // 10)))
+            store.compact()
+            print(f"  {'listed occurrences':<28} {len(store.get_parsed()):16d}")
+            print(f"  {'stored rows':<28} {len(store.records):16d}   ({os.path.getsize(store.file_path) // 1024} KiB on disk)")
+            to_date = jalali_calendar.today_epoch_day() + 7
+            materialized = sum(1 for row in rows for _ in itertools.takewhile(lambda day: day <= to_date, occurrences(row["repeat"], start)))
+            print(f"  {'rows if materialized':<28} {materialized:16d}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_alerts(sizes, repeat):
+    from notifier import NotificationScheduler
+
+    print("Deadline alert scheduling")
+    for n in sizes:
+        rows = [(d.id, d.course, d.due, d.checked) for d in make_parsed_rows(n)]
+        print(f" {n} deadlines")
+        # What watching for alerts costs without a heap: every row's color checked every second
+        colors = {}
+        def poll():
+            now = time.time()
+            for deadline_id, _, due, checked in rows:
+                color = color_for(int((due - now) // 86400), checked)
+                if colors.get(deadline_id) != color:
+                    colors[deadline_id] = color
+        report("poll every row (per second)", measure(poll, repeat))
+
+        scheduler = NotificationScheduler(lambda title, message: None)
+        report("schedule all (first sync)", measure(lambda: NotificationScheduler(lambda t, m: None).update(rows), max(1, repeat // 10)))
+        scheduler.update(rows)
+        edited = list(rows)
+        def edit_one():
+            deadline_id, course, due, checked = edited[0]
+            edited[0] = (deadline_id, course, due + 60, checked)
+            scheduler.update(edited)
+        report("resync after one edit", measure(edit_one, repeat))
+        report("next alert lookup", measure(scheduler.next_alert_at, repeat))
+        print(f"  {'heap entries':<28} {len(scheduler):16d}")
+
+
+VIEW_ROWS = 25  # Rows the main window has in view at its default height
+TOGGLE_BUDGET_MS = 5  # Median cost of a checkbox toggle, with the tick that shows it, at any list length
+
+
+class HeadlessDeadlineList:
+    """
+    Stands in for deadline_list without Tk: binds the first VIEW_ROWS ids, like the window at
+    its default height, and keeps what each row was last painted with. Rows are painted through
+    the same CountdownTicker.paint as the main window's.
+    """
+
+    def __init__(self, ticker, clock):
+        self.ticker = ticker
+        self.clock = clock
+        self.bound = {}
+        self.keys = []
+
+    def set_keys(self, keys):
+        self.keys = keys
+        self.rebind(force=True)
+
+    def keys_changed(self, dirty):
+        self.rebind(dirty=dirty)
+
+    def rebind(self, force=False, dirty=()):
+        old, self.bound = self.bound, {}
+        for key in self.keys[:VIEW_ROWS]:
+            row = old.get(key)
+            if row is None or force or key in dirty:
+                row = {"key": key}
+                self.ticker.paint(self, key, row, self.clock())
+            self.bound[key] = row
+
+    def paint_row(self, row, text, progress, color, struck, expired, checked):
+        row["shown"] = (text, progress, color, struck, expired, checked)
+
+
+def headless_tick(store, engine, ticker, deadline_list, now):
+    """One wake-up of update_countdown_display without Tk or alerts: the same CountdownTicker.step. Returns the next wake-up."""
+    engine.sync(store)
+    return ticker.step(store, deadline_list, now)
+
+
+def month_switch(year, month):
+    """What the datepicker computes for a month before touching its buttons: the layout and the cell labels."""
+    import jalali_calendar
+
+    first_day, num_days = jalali_calendar.weekday(year, month, 1), jalali_calendar.month_length(year, month)
+    return [cell - first_day + 1 if 1 <= cell - first_day + 1 <= num_days else None for cell in range(42)]
+
+
+def bench_suite(sizes, repeat):
+    from deadline_store import DeadlineStore
+    from notes_store import SQLiteNotesStore
+    from tick_scheduler import CountdownTicker
+
+    print("Main operations on a simulated clock (one second per tick)")
+    for n in sizes:
+        print(f" {n} items")
+        directory = tempfile.mkdtemp(prefix="suite-bench-")
+        try:
+            path = write_deadlines(directory, make_store_rows(n))
+            clock = SimulatedClock()
+            report("load + parse deadlines",
+                   measure(lambda: CountdownEngine().sync(DeadlineStore(path, clock=clock)), max(1, repeat // 10)))
+
+            store = DeadlineStore(path, fsync_policy="never", clock=clock)
+            engine = CountdownEngine()
+            ticker = CountdownTicker(engine, clock=clock)
+            view = HeadlessDeadlineList(ticker, clock)
+            headless_tick(store, engine, ticker, view, clock())
+
+            def tick():
+                clock.advance(1)
+                headless_tick(store, engine, ticker, view, clock())
+            report("per-tick update", measure(tick, repeat))
+
+            def full_refresh():
+                engine.version = None  # What a changed deadlines.json or a saved editor session triggers
+                headless_tick(store, engine, ticker, view, clock())
+            report("full refresh", measure(full_refresh, max(1, repeat // 10)))
+
+            ids = iter(itertools.cycle(store.ordered_ids()))
+            def toggle():
+                deadline_id = next(ids)
+                store.set_checked(deadline_id, not engine.checked[engine.index[deadline_id]])
+                headless_tick(store, engine, ticker, view, clock())
+            timings = measure(toggle, repeat)
+            report("toggle a checkbox", timings)
+            assert statistics.median(timings) <= TOGGLE_BUDGET_MS, \
+                f"toggling a checkbox at {n} items took {statistics.median(timings):.1f} ms, over the {TOGGLE_BUDGET_MS} ms budget"
+
+            notes = make_notes(n)
+            dates = list(notes)
+            notes_store = SQLiteNotesStore(os.path.join(directory, "notes.sqlite3"))
+            notes_store.put_many(notes)
+            position = iter(itertools.cycle(range(len(dates) - 1, -1, -1)))
+            report("notes: navigate one day", measure(lambda: notes_store.get(dates[next(position)]), repeat))
+            report("notes: save", measure(lambda: notes_store.put(dates[-1], notes[dates[-1]] + " edited"), repeat))
+            notes_store.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    months = iter(itertools.cycle([(y, m) for y in range(1400, 1410) for m in range(1, 13)]))
+    print(" datepicker (independent of the number of items)")
+    report("month switch (no Tk)", measure(lambda: month_switch(*next(months)), repeat))
+
+
+SOAK_HOURS = 24
+SOAK_EDIT_SECONDS = 300  # A checkbox toggle every 5 simulated minutes, an edited deadline every hour
+
+
+def bench_soak(sizes, repeat):
+    from deadline_list import create_deadline_list
+    from deadline_store import DeadlineStore
+    from notifier import NotificationScheduler
+    from profiler import LeakTracker
+    from recurrence import split_occurrence_id
+    from tick_scheduler import CountdownTicker
+
+    print(f"Soak: {SOAK_HOURS} simulated hours of the countdown loop")
+    try:
+        import tkinter as tk
+        from tkinter import font as tkFont
+        root = tk.Tk()
+    except Exception as e:
+        root = None
+        print(f"  no display ({e}); rows are painted onto a stand-in for the list, not into Tk")
+
+    for n in sizes:
+        directory = tempfile.mkdtemp(prefix="soak-bench-")
+        try:
+            clock = SimulatedClock()
+            rows = make_store_rows(n)
+            rng = random.Random(1)
+            for row in rng.sample(rows, max(1, n // 50)):
+                # Some deadlines due during the run, so rows tick every second, change color and expire
+                due = clock() + rng.randint(60, SOAK_HOURS * 3600)
+                row['deadline_time'] = time.strftime("%H:%M:%S", time.localtime(due))
+                y, m, d = map(int, jdatetime.date.fromgregorian(date=datetime.date.fromtimestamp(due)).strftime("%Y-%m-%d").split('-'))
+                row['deadline_shamsi'] = f"{y:04d}-{m:02d}-{d:02d}"
+                row['checked'] = "0"
+            rows.append({"id": "daily", "course": "daily", "deadline_shamsi": rows[0]['deadline_shamsi'],
+                         "deadline_time": "08:00:00", "checked": "0", "repeat": {"freq": "daily", "interval": 1}})
+            store = DeadlineStore(write_deadlines(directory, rows), fsync_policy="never", clock=clock)
+            engine = CountdownEngine()
+            ticker = CountdownTicker(engine, clock=clock)
+            alerts = []
+            scheduler = NotificationScheduler(None, clock=clock)  # Polled here instead of running its thread
+
+            # The main window's list when there is a display, else a stand-in; either way the rows
+            # go through the same CountdownTicker.step and paint as update_countdown_display
+            if root is not None:
+                canvas = tk.Canvas(root, width=350, height=700)
+                canvas.pack(fill="both", expand=True)
+                font = tkFont.Font(family="Vazir", size=10)
+                struck_font = tkFont.Font(family="Vazir", size=10, overstrike=True, slant="italic")
+                deadline_list = create_deadline_list("widgets", canvas, font, struck_font, {},
+                                                     lambda key, row: ticker.paint(deadline_list, key, row, clock()),
+                                                     lambda c, v: None)
+                root.update()
+            else:
+                deadline_list = HeadlessDeadlineList(ticker, clock)
+
+            start, end = clock(), clock() + SOAK_HOURS * 3600
+            next_edit, next_sample = start + SOAK_EDIT_SECONDS, start + 3600
+            latencies, rss_samples = array("d"), []  # An array: a list of floats would itself show up as RSS growth
+            tracker = LeakTracker(root)
+            wake_at = start
+            wall_start = time.perf_counter()
+            while wake_at < end:
+                clock.now = math.ceil(wake_at)  # root.after fires on the second boundary delay_ms rounds up to
+                if clock.now >= next_edit:
+                    deadline_id = rng.choice(store.ordered_ids())
+                    if (next_edit - start) % 3600 < SOAK_EDIT_SECONDS and split_occurrence_id(deadline_id)[1] is None:
+                        row = dict(store.get(deadline_id))
+                        row['deadline_time'] = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+                        store.update(deadline_id, row)
+                    else:
+                        store.set_checked(deadline_id, not engine.checked[engine.index[deadline_id]])
+                    next_edit += SOAK_EDIT_SECONDS
+
+                tick_start = time.perf_counter()
+                now = clock()
+                engine.sync(store)
+                scheduler.sync(store)
+                alerts.extend(scheduler.pop_due(now))
+                wake_at = ticker.step(store, deadline_list, now)
+                if root is not None:
+                    root.update_idletasks()
+                latencies.append((time.perf_counter() - tick_start) * 1000)
+
+                if now >= next_sample:
+                    gc.collect()
+                    rss_samples.append(rss_kb())
+                    tracker.sample()
+                    next_sample += 3600
+            wall = time.perf_counter() - wall_start
+            if root is not None:
+                canvas.destroy()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        cuts = statistics.quantiles(latencies, n=100)
+        print(f" {n} deadlines, {len(latencies)} ticks in {wall:.1f} s of real time, {len(alerts)} alerts")
+        print(f"  {'tick latency':<28} p50 {cuts[49]:.3f} ms   p95 {cuts[94]:.3f} ms   p99 {cuts[98]:.3f} ms   max {max(latencies):.3f} ms")
+        leaks = tracker.summary()
+        if len(rss_samples) >= 2:
+            # Growth from the end of the first hour on, so one-off warm-up allocations do not count
+            rss = f"RSS {rss_samples[-1] - rss_samples[0]:+d} KiB, " if rss_samples[0] is not None else ""
+            counts = ", ".join(f"{value:+d} {key.replace('_', ' ')}" for key, value in leaks["growth"].items())
+            print(f"  {'growth':<28} {rss}{counts} over {len(rss_samples) - 1} h")
+
+    if root is not None:
+        root.destroy()
+
+
+def bench_profile(sizes, repeat):
+    import profiler
+    from deadline_store import DeadlineStore
+    from tick_scheduler import CountdownTicker
+
+    print("Profiling overhead on the countdown tick")
+    for n in sizes:
+        print(f" {n} deadlines")
+        directory = tempfile.mkdtemp(prefix="profile-bench-")
+        try:
+            path = write_deadlines(directory, make_store_rows(n))
+            timings = {}
+            # Off first: enabling wraps the classes for the rest of this process
+            for label in ("--profile off", "--profile on"):
+                if label.endswith("on"):
+                    profiler.enable()
+                    profiler.instrument_core()
+                clock = SimulatedClock()
+                store = DeadlineStore(path, fsync_policy="never", clock=clock)
+                engine = CountdownEngine()
+                ticker = CountdownTicker(engine, clock=clock)
+                view = HeadlessDeadlineList(ticker, clock)
+                headless_tick(store, engine, ticker, view, clock())
+
+                def tick():
+                    clock.advance(1)
+                    if profiler.enabled:
+                        profiler.record_tick(clock() - 0.002, clock())
+                    headless_tick(store, engine, ticker, view, clock())
+                timings[label] = measure(tick, repeat * 50)
+                report(f"tick, {label}", timings[label])
+            overhead = statistics.median(timings["--profile on"]) - statistics.median(timings["--profile off"])
+            print(f"  {'cost of profiling per tick':<28} {overhead * 1000:13.1f} us")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_startup(sizes, repeat):
+    import subprocess
+    import sys
+    import single_instance
+    from app_paths import APP_NAME
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def run(args, env=None):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, cwd=here, capture_output=True, text=True, env=env)
+        return (time.perf_counter() - start) * 1000, result
+
+    print("Cold start (fresh interpreter each run)")
+    report("bare interpreter", [run(["-c", "pass"])[0] for _ in range(repeat)])
+    report("import headless core", [run(["-c", "import deadline_core"])[0] for _ in range(repeat)])
+    report("countdown_cli --once json", [run(["countdown_cli.py", "--once", "--format", "json"])[0] for _ in range(repeat)])
+
+    # A second launch while a window is open only hands off to it; this process stands in for the window
+    directory = tempfile.mkdtemp(prefix="startup-bench-")
+    try:
+        env = dict(os.environ, LOCALAPPDATA=directory, XDG_DATA_HOME=directory)
+        app_dir = os.path.join(directory, APP_NAME)
+        os.makedirs(app_dir)
+        lock = single_instance.acquire(app_dir)
+        requests = []
+        server = single_instance.InstanceServer(app_dir, lambda message: requests.append(message) or {"ok": True})
+        launches = [run(["exam_countdown.py"], env) for _ in range(repeat)]
+        server.close()
+        lock.release()
+        if all(result.returncode == 0 for _, result in launches) and len(requests) == repeat:
+            report("second launch, handed off", [ms for ms, _ in launches])
+        else:
+            print(f"  {'second launch':<28} did not hand off ({len(requests)} of {repeat} requests arrived)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # The GUI reports its own launch-to-first-paint time and exits; it needs a display and its data folder
+    paints = []
+    for _ in range(repeat):
+        _, result = run(["exam_countdown.py", "--measure-startup"])
+        line = result.stdout.strip().splitlines()[-1:] if result.returncode == 0 else []
+        if not line or not line[0].startswith("First paint after"):
+            print(f"  GUI first paint              skipped, the window could not start ({result.stderr.strip().splitlines()[-1:]})")
+            return
+        paints.append(float(line[0].split()[3]))
+    report("GUI launch to first paint", paints)
+
+
+STRESS_OPS = 300  # Operations per writer process
+STRESS_COMPACT_THRESHOLD = 4096  # Tiny, so compactions keep racing with other processes' appends
+
+
+def stress_writer(directory, worker, ops, start_at):
+    """
+    One writer process of the stress benchmark (and of tests/test_concurrency.py): adds deadlines,
+    toggles its own, edits its own field of a row every writer edits, and saves notes into a month
+    every writer saves into. Returns what the files must hold afterwards as far as this writer is
+    concerned, and its latencies.
+    """
+    from deadline_store import DeadlineStore
+    from notes_store import ShardedNotesStore
+
+    store = DeadlineStore(os.path.join(directory, "deadlines.json"), fsync_policy="never",
+                          compact_threshold=STRESS_COMPACT_THRESHOLD)
+    notes = ShardedNotesStore(os.path.join(directory, "notes"))
+    rng = random.Random(worker)
+    added, checked, field, note = [], {}, None, None
+    latencies = []
+    while time.time() < start_at:  # Start together, so the writers really overlap
+        time.sleep(0.001)
+    for i in range(ops):
+        start = time.perf_counter()
+        choice = rng.random()
+        if choice < 0.4 or not added:
+            added.append(store.add({"course": f"w{worker}-{i}", "deadline_shamsi": "1404-06-01",
+                                    "deadline_time": "12:00:00", "checked": "0"}))
+        elif choice < 0.7:
+            deadline_id = rng.choice(added)
+            checked[deadline_id] = not checked.get(deadline_id, False)
+            store.set_checked(deadline_id, checked[deadline_id])
+        elif choice < 0.9:
+            row = dict(store.get("shared"))
+            row[f"note_w{worker}"] = field = str(i)
+            store.update("shared", row)
+        else:
+            note = (f"1404-01-{worker % 28 + 1:02d}", f"w{worker} #{i}")
+            notes.put(*note)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"worker": worker, "added": added, "checked": checked, "field": field, "note": note,
+            "latencies": latencies}
+
+
+def bench_stress(sizes, repeat):
+    import multiprocessing
+    from deadline_store import DeadlineStore
+
+    context = multiprocessing.get_context("spawn")  # Fresh interpreters, as on Windows
+    print(f"Multi-process writers on one data folder ({STRESS_OPS} operations each, journal compacted every {STRESS_COMPACT_THRESHOLD // 1024} KiB)")
+    for n in sizes:
+        directory = tempfile.mkdtemp(prefix="stress-bench-")
+        try:
+            path = os.path.join(directory, "deadlines.json")
+            DeadlineStore(path, fsync_policy="never").add({"id": "shared", "course": "shared", "deadline_shamsi": "1404-06-01",
+                                                           "deadline_time": "12:00:00", "checked": "0"})
+            start_at = time.time() + 2.0  # Leaves the spawned interpreters time to start
+            with context.Pool(n) as pool:
+                pending = pool.starmap_async(stress_writer, [(directory, w, STRESS_OPS, start_at) for w in range(n)])
+                results = pending.get()
+            wall = time.time() - start_at
+
+            latencies = [ms for result in results for ms in result["latencies"]]
+            cuts = statistics.quantiles(latencies, n=100)
+            print(f" {n} processes: {len(latencies)} operations in {wall:.2f} s, {len(DeadlineStore(path).get_rows())} rows")
+            print(f"  {'operation latency':<28} p50 {cuts[49]:.3f} ms   p99 {cuts[98]:.3f} ms   max {max(latencies):.3f} ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+# name -> (function, default sizes)
+BENCHMARKS = {
+    "tick": (bench_tick, [10_000, 100_000]),
+    "memory": (bench_memory, [100_000]),
+    "renderer": (bench_renderer, [1000]),
+    "notes": (bench_notes, [3650]),
+    "search": (bench_search, [3650]),
+    "datepicker": (bench_datepicker, [200]),
+    "jalali": (bench_jalali, [10_000]),
+    "import": (bench_import, [100_000]),
+    "recurring": (bench_recurring, [1000]),
+    "alerts": (bench_alerts, [10_000]),
+    "startup": (bench_startup, [1]),
+    "suite": (bench_suite, [10, 1000, 100_000]),
+    "soak": (bench_soak, [1000]),
+    "stress": (bench_stress, [2, 8]),
+    "profile": (bench_profile, [1000]),  # Last: it leaves the classes instrumented
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deadline Countdown benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, help="override the item counts of the selected benchmarks")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        func, default_sizes = BENCHMARKS[name]
+        func(args.sizes or default_sizes, args.repeat)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Terminal front end for the deadline countdown. Never imports tkinter.
+
+    python countdown_cli.py --once                 # print the list once
+    python countdown_cli.py --once --format json   # for scripts and status bars
+    python countdown_cli.py --tui                  # live view, redraws only lines that changed
+    python countdown_cli.py --notify               # no output until a deadline needs attention
+    python countdown_cli.py --add Math 1403-11-20 09:00:00
+
+--add hands the deadline to the open window if there is one (see single_instance)
+and only writes deadlines.json itself when there is not.
+exam_countdown.py hands --tui, --once, --notify and --add over to this module before loading Tk.
+"""
+import argparse
+import json
+import shutil
+import sys
+import time
+
+from countdown_engine import CountdownEngine, color_for
+from deadline_core import add_storage_arguments, app_data_dir, get_persistent_path, open_deadline_store
+from deadline_io import normalize_row
+from notifier import NotificationScheduler, desktop_notify
+import profiler
+import single_instance
+from tick_scheduler import next_second
+
+
+OUTPUT_FORMATS = ("text", "json")
+
+# 256-color backgrounds for the color tags used by the main window
+ANSI_BACKGROUNDS = {
+    "red": 196, "orangered": 202, "orange": 208, "gold": 220, "yellow": 226,
+    "yellowgreen": 154, "lightgreen": 120, "green": 34, "lightgrey": 250,
+}
+PROGRESS_WIDTH = 10
+NOTIFY_RESYNC_SECONDS = 30  # How often --notify checks the deadline file for edits made elsewhere
+
+
+def countdown_rows(store, engine, now=None):
+    """
+    The deadlines in display order (unchecked by due time, then checked) as dicts,
+    read from one batched tick of the engine. color is the main window's color tag.
+    """
+    engine.sync(store)
+    snapshot = engine.tick(now)
+    rows = []
+    for deadline_id in store.ordered_ids():
+        i = engine.index.get(deadline_id)
+        if i is None:
+            continue
+        days = int(snapshot.days[i])
+        is_checked = bool(engine.checked[i])
+        rows.append({
+            "id": deadline_id,
+            "course": engine.courses[i],
+            "deadline_shamsi": engine.shamsi[i],
+            "countdown": snapshot.countdown_text(i),
+            "days": days,
+            "progress": int(snapshot.progress[i]),
+            "expired": bool(snapshot.expired[i]),
+            "checked": is_checked,
+            "color": color_for(days, is_checked),
+        })
+    return rows
+
+
+def format_row(row, width=None, color=False):
+    """One line the way the main window shows a row: 'countdown | date | course [progress]'."""
+    filled = row["progress"] * PROGRESS_WIDTH // 100
+    bar = "#" * filled + "-" * (PROGRESS_WIDTH - filled)
+    line = f"{row['countdown']} | {row['deadline_shamsi']} | {row['course']} [{bar}]"
+    if row["checked"]:
+        line = "✓ " + line
+    if width is not None:
+        line = line[:width].ljust(width)
+    if color:
+        line = f"\x1b[38;5;16;48;5;{ANSI_BACKGROUNDS.get(row['color'], 250)}m{line}\x1b[0m"
+    return line
+
+
+def print_once(store, output_format):
+    rows = countdown_rows(store, CountdownEngine())
+    if output_format == "json":
+        json.dump(rows, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for row in rows:
+            print(format_row(row))
+
+
+class TerminalView:
+    """
+    Full-screen live view. Every frame is compared line by line with the previous
+    one and only the lines that differ are rewritten, so a quiet list costs almost
+    nothing to refresh, even over SSH.
+    """
+
+    def __init__(self, store, out=sys.stdout, color=True, clock=time.time):
+        self.store = store
+        self.clock = clock
+        self.engine = CountdownEngine()
+        self.out = out
+        self.color = color
+        self.lines = []  # What is currently on screen, one entry per terminal row
+        self.size = None
+
+    def frame(self, now):
+        width, height = shutil.get_terminal_size()
+        rows = countdown_rows(self.store, self.engine, now)
+        header = f"Deadlines ({len(rows)})  {time.strftime('%H:%M:%S', time.localtime(now))}  Ctrl+C to quit"
+        lines = [header[:width].ljust(width)]
+        lines += [format_row(row, width, self.color) for row in rows[:height - 1]]
+        lines += [" " * width] * (height - len(lines))
+        return (width, height), lines
+
+    def draw(self, now):
+        size, lines = self.frame(now)
+        parts = []
+        if size != self.size:
+            self.size = size
+            self.lines = []
+            parts.append("\x1b[2J")
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                parts.append(f"\x1b[{row + 1};1H{line}")
+        self.lines = lines
+        if parts:
+            self.out.write("".join(parts))
+            self.out.flush()
+        return len(parts)
+
+    def run(self):
+        self.out.write("\x1b[?1049h\x1b[?25l")  # Alternate screen, hide cursor
+        try:
+            while True:
+                self.draw(self.clock())
+                if profiler.leak_tracker is not None:
+                    profiler.leak_tracker.maybe_sample()
+                time.sleep(max(0.0, next_second(self.clock()) - self.clock()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.out.write("\x1b[?25h\x1b[?1049l")
+            self.out.flush()
+
+
+def print_alert(title, message):
+    print(f"\a{time.strftime('%H:%M')} {title}: {message}", flush=True)
+    desktop_notify(title, message)
+
+
+def run_notifier(store):
+    """Alerts in the terminal and on the desktop until interrupted. The alert thread does the waiting."""
+    scheduler = NotificationScheduler(print_alert).start()
+    try:
+        while True:
+            store.refresh()  # Picks up edits from the main window; a stat() when nothing changed
+            scheduler.sync(store)
+            if profiler.leak_tracker is not None:
+                profiler.leak_tracker.maybe_sample()
+            time.sleep(NOTIFY_RESYNC_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+
+
+def add_deadline(fields, fsync_policy):
+    """--add COURSE DATE [TIME]. Returns the exit status."""
+    if not 2 <= len(fields) <= 3:
+        print("--add takes COURSE DATE [TIME]", file=sys.stderr)
+        return 2
+    try:
+        row = normalize_row(dict(zip(("course", "deadline_shamsi", "deadline_time"), fields)))
+    except ValueError as e:
+        print(f"Invalid deadline: {e}", file=sys.stderr)
+        return 2
+
+    directory = app_data_dir()
+    lock = single_instance.acquire(directory)
+    if lock is None:
+        # The window owns the data: it adds the row and saves it like one added in the editor
+        reply = single_instance.hand_off(directory, {"op": "add", "rows": [row]})
+        if reply is None or not reply.get("ok"):
+            print(f"The open window did not take the deadline: {(reply or {}).get('error', 'no answer')}", file=sys.stderr)
+            return 1
+        print("Added to the open window")
+        return 0
+    try:
+        open_deadline_store(fsync_policy=fsync_policy).add(row)
+    finally:
+        lock.release()
+    print(f"Added to {get_persistent_path()}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deadline countdown in the terminal")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--tui", action="store_true", help="live-updating full-screen view")
+    mode.add_argument("--once", action="store_true", help="print the deadlines once and exit")
+    mode.add_argument("--notify", action="store_true", help="stay in the background and alert when deadlines come close")
+    mode.add_argument("--add", nargs="+", metavar="FIELD",
+                      help="add a deadline: COURSE DATE [TIME], through the open window if there is one")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text", help="output of --once")
+    parser.add_argument("--no-color", action="store_true", help="plain text in the live view")
+    add_storage_arguments(parser)
+    profiler.add_profile_argument(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if profiler.requested(args):
+        profiler.enable()
+        profiler.instrument_core()
+        profiler.instrument(sys.modules[__name__], ["countdown_rows"], "countdown_cli")
+        profiler.instrument(TerminalView, ["draw"], "TerminalView")
+        profiler.track_leaks()
+    if args.add:
+        return add_deadline(args.add, args.fsync)
+    store = open_deadline_store(fsync_policy=args.fsync)
+    try:
+        if args.once:
+            print_once(store, args.format)
+        elif args.notify:
+            run_notifier(store)
+        else:
+            TerminalView(store, color=not args.no_color).run()
+    finally:
+        if profiler.enabled:
+            # stderr, so --once --format json stays parseable
+            print(f"Profile written to {profiler.dump(get_persistent_path('profile.json'))}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Headless countdown engine.
+
+Deadlines are converted once into absolute epoch seconds and kept in flat
+columns (array/NumPy). Every tick then computes the remaining time, progress,
+color bucket and expiry for all rows in a single batched pass.
+
+NumPy is optional and only imported once a list is long enough to benefit from
+it, so short lists never pay for its import at startup.
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+
+NUMPY_MIN_ROWS = 1000  # Below this the pure-Python pass is about as fast as NumPy
+MAX_FREE_ROWS = 64      # Rows left empty by deletions before the columns are rebuilt without them
+_np = None
+
+
+def load_numpy():
+    """Imports NumPy on first use. Returns the module, or None when it is not installed."""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:  # The pure-Python path gives the same results
+            numpy = False
+        _np = numpy
+    return _np or None
+
+
+# Color buckets used by get_color_tag, ordered from most to least urgent.
+# A row lands in bucket i when its remaining days exceed COLOR_THRESHOLDS[i - 1].
+COLOR_THRESHOLDS = (2, 4, 6, 8, 10, 12, 14)
+COLOR_TAGS = ("red", "orangered", "orange", "gold", "yellow", "yellowgreen", "lightgreen", "green")
+CHECKED_COLOR = "lightgrey"
+EXPIRED_TEXT = "پایان یافته"
+
+
+def to_epoch(jalali_dt):
+    """Converts a naive local jdatetime.datetime to epoch seconds."""
+    return time.mktime(jalali_dt.togregorian().timetuple())
+
+
+def local_midnight(now):
+    """Epoch seconds of the local midnight that starts the day containing `now`."""
+    t = time.localtime(now)
+    return time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0, 0, 0, -1))
+
+
+def format_countdown(remaining):
+    """Formats remaining seconds the way the main window shows them (d:hh:mm:ss)."""
+    if remaining < 0:
+        return EXPIRED_TEXT
+    days = remaining // 86400
+    hours = (remaining % 86400) // 3600
+    minutes = (remaining % 3600) // 60
+    seconds = remaining % 60
+    return f"{days}:{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def color_for(days, is_checked):
+    """Same mapping as get_color_tag, expressed through the bucket tables."""
+    if is_checked:
+        return CHECKED_COLOR
+    return COLOR_TAGS[bisect_left(COLOR_THRESHOLDS, days)]
+
+
+class CountdownSnapshot:
+    """Per-tick results for every row, index-aligned with CountdownEngine's columns."""
+
+    __slots__ = ("now", "remaining", "days", "progress", "color_index", "expired")
+
+    def __init__(self, now, remaining, days, progress, color_index, expired):
+        self.now = now
+        self.remaining = remaining
+        self.days = days
+        self.progress = progress
+        self.color_index = color_index
+        self.expired = expired
+
+    def countdown_text(self, i):
+        return format_countdown(int(self.remaining[i]))
+
+    def color(self, i, is_checked):
+        if is_checked:
+            return CHECKED_COLOR
+        return COLOR_TAGS[int(self.color_index[i])]
+
+
+class CountdownEngine:
+    """
+    Columnar view of the deadlines held by a DeadlineStore.
+
+    When the store's version changes, only the rows it reports as changed are updated:
+    in place, appended, or (when deleted) left empty with an id of None, so the row
+    indices of the others stay valid. The columns are rebuilt from scratch when the
+    store cannot say what changed, or once the empty rows pile up; `layout` counts
+    those rebuilds, so whoever keeps row indices knows when to drop them.
+    """
+
+    def __init__(self, use_numpy=True):
+        self.use_numpy = use_numpy  # Allowed, not forced: short lists still take the pure-Python path
+        self.ids = []
+        self.courses = []
+        self.shamsi = []
+        self.checked = array('b')
+        self.due = array('d')
+        self.index = {}  # deadline id -> row index
+        self.version = None
+        self.layout = 0  # Bumped whenever row indices are reassigned
+        self._free = 0   # Rows emptied by deletions
+        self._due_np = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def sync(self, store):
+        """Brings the columns up to date with the store. Returns True if anything changed."""
+        store.refresh()
+        changed = store.changes_since(self.version)
+        if changed is not None and not changed:
+            return False
+        if changed is None or self._free + len(changed) > MAX_FREE_ROWS + len(self.index) // 4:
+            self.load(store.get_parsed())
+        else:
+            self.update(store, changed)
+        self.version = store.version
+        return True
+
+    def load(self, parsed):
+        """
+        Loads Deadline records (see deadline_store) into the columns.
+        Due times arrive precomputed, so this is a plain copy with no date parsing.
+        """
+        self.ids = [d.id for d in parsed]
+        self.courses = [d.course for d in parsed]
+        self.shamsi = [d.shamsi for d in parsed]
+        self.checked = array('b', (1 if d.checked else 0 for d in parsed))
+        self.due = array('d', (d.due for d in parsed))
+        self.index = {deadline_id: i for i, deadline_id in enumerate(self.ids)}
+        self.layout += 1
+        self._free = 0
+        self._view_due()
+
+    def update(self, store, listed_ids):
+        """Updates the rows of `listed_ids` from the store's Deadlines, leaving the other rows where they are."""
+        self._due_np = None  # Its buffer export would keep the due column from growing
+        for deadline_id in listed_ids:
+            d = store.get_listed(deadline_id)
+            i = self.index.get(deadline_id)
+            if d is None:
+                if i is not None:
+                    # Deleted: emptied rather than removed. A due time of 0 reads as long expired.
+                    del self.index[deadline_id]
+                    self.ids[i] = self.courses[i] = self.shamsi[i] = None
+                    self.checked[i] = 0
+                    self.due[i] = 0.0
+                    self._free += 1
+                continue
+            if i is None:
+                self.index[deadline_id] = len(self.ids)
+                self.ids.append(deadline_id)
+                self.courses.append(d.course)
+                self.shamsi.append(d.shamsi)
+                self.checked.append(1 if d.checked else 0)
+                self.due.append(d.due)
+            else:
+                self.courses[i] = d.course
+                self.shamsi[i] = d.shamsi
+                self.checked[i] = 1 if d.checked else 0
+                self.due[i] = d.due
+        self._view_due()
+
+    def _view_due(self):
+        np = load_numpy() if self.use_numpy and len(self.ids) >= NUMPY_MIN_ROWS else None
+        self._due_np = np.frombuffer(self.due, dtype=np.float64) if np is not None else None
+
+    def tick(self, now=None):
+        """Computes the countdown state of every row for the given epoch time."""
+        if now is None:
+            now = time.time()
+        midnight = local_midnight(now)
+        if self._due_np is not None:
+            return self._tick_numpy(now, midnight)
+        return self._tick_python(now, midnight)
+
+    def row_state(self, i, now, midnight):
+        """
+        Scalar version of tick() for a single row.
+        Returns (remaining, days, progress, color_index, expired).
+        """
+        due = self.due[i]
+        remaining = int(due - now)
+        expired = remaining < 0
+        days = 0 if expired else remaining // 86400
+        total_range = due - midnight
+        progress = max(0, min(100, int(((now - midnight) / total_range) * 100))) if total_range > 0 else 100
+        return remaining, days, progress, bisect_left(COLOR_THRESHOLDS, days), expired
+
+    def row_appearance(self, i, now, midnight):
+        """What a deadline list's paint_row shows for row `i` at `now`, as keyword arguments."""
+        remaining, days, progress, _, expired = self.row_state(i, now, midnight)
+        is_checked = bool(self.checked[i])
+        return {"text": f"{format_countdown(remaining)} | {self.shamsi[i]} | {self.courses[i]}",
+                "progress": progress, "color": color_for(days, is_checked),
+                "struck": expired or is_checked, "expired": expired, "checked": is_checked}
+
+    def _tick_numpy(self, now, midnight):
+        np = _np
+        due = self._due_np
+        remaining = (due - now).astype(np.int64)  # Truncates toward zero like int()
+        expired = remaining < 0
+        days = np.where(expired, 0, remaining // 86400)
+
+        total_range = due - midnight
+        passed = now - midnight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            progress = np.where(total_range > 0, (passed / total_range) * 100, 100)
+        progress = np.clip(progress.astype(np.int64), 0, 100)
+
+        color_index = np.searchsorted(np.array(COLOR_THRESHOLDS), days, side='left')
+        return CountdownSnapshot(now, remaining, days, progress, color_index, expired)
+
+    def _tick_python(self, now, midnight):
+        n = len(self.due)
+        remaining = array('q', bytes(8 * n))
+        days = array('q', bytes(8 * n))
+        progress = array('b', bytes(n))
+        color_index = array('b', bytes(n))
+        expired = array('b', bytes(n))
+        passed = now - midnight
+
+        for i, due in enumerate(self.due):
+            r = int(due - now)
+            remaining[i] = r
+            if r < 0:
+                expired[i] = 1
+                d = 0
+            else:
+                d = r // 86400
+                days[i] = d
+            total_range = due - midnight
+            progress[i] = max(0, min(100, int((passed / total_range) * 100))) if total_range > 0 else 100
+            color_index[i] = bisect_left(COLOR_THRESHOLDS, d)
+
+        return CountdownSnapshot(now, remaining, days, progress, color_index, expired)
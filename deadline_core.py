@@ -0,0 +1,51 @@
+"""
+Headless core of the deadline countdown: where the data lives, the storage
+objects, and the command line options they share.
+
+Nothing here imports tkinter, and platform- or size-dependent modules (winreg,
+NumPy) are only imported when they are used, so this module can be imported
+from scripts, benchmarks or a terminal UI without a display.
+"""
+import sys
+import time
+
+from app_paths import app_data_dir, get_persistent_path
+from deadline_store import DeadlineStore, FSYNC_POLICIES
+from notes_store import NOTES_BACKENDS
+
+
+STARTUP_APP_NAME = "DeadlineApp"  # Value name in the Windows Run key
+
+
+def add_to_startup(file_path=None, app_name=STARTUP_APP_NAME):
+    """Registers the app to start with Windows. Does nothing on other platforms or if already registered."""
+    if sys.platform != "win32":
+        return
+    import winreg as reg
+
+    if file_path is None:
+        file_path = sys.executable
+    key = r"Software\Microsoft\Windows\CurrentVersion\Run"
+    try:
+        with reg.OpenKey(reg.HKEY_CURRENT_USER, key, 0, reg.KEY_QUERY_VALUE | reg.KEY_SET_VALUE) as registry_key:
+            try:
+                if reg.QueryValueEx(registry_key, app_name)[0] == file_path:
+                    return
+            except FileNotFoundError:
+                pass
+            reg.SetValueEx(registry_key, app_name, 0, reg.REG_SZ, file_path)
+    except Exception as e:
+        print(f"Could not add to startup: {e}")
+
+
+def add_storage_arguments(parser):
+    """Command line options shared by every front end."""
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="always",
+                        help="when deadline writes are flushed to disk: every journal append, only snapshots, or never")
+    parser.add_argument("--notes-backend", choices=NOTES_BACKENDS, default="sqlite",
+                        help="where daily notes are kept: one SQLite database, or one JSON file per month")
+    return parser
+
+
+def open_deadline_store(fsync_policy="always", writer=None, clock=time.time):
+    return DeadlineStore(get_persistent_path(), fsync_policy=fsync_policy, writer=writer, clock=clock)
@@ -0,0 +1,398 @@
+"""
+Bulk import and export of deadlines as CSV, JSON Lines or iCalendar (.ics).
+
+Files are read and written one row at a time. Reading is a generator pipeline:
+  read_<format>(path)     yields (line_number, raw dict) as the file is read
+  validate(records, ...)  checks each row with the same rules as the editor and
+                          yields clean rows; bad lines are recorded in the report
+  batched(rows, size)     groups the rows for DeadlineStore.add_many
+so a large schedule never has to be loaded into memory in full.
+
+A recurring deadline keeps its rule in every format: as the row's 'repeat' object in
+JSON Lines, as that object in JSON text in the CSV 'repeat' column, and in iCalendar
+as an X-DEADLINE-REPEAT property read back by this app plus what other calendars
+understand: an RRULE for daily and weekly rules, the dates themselves (RDATE) for
+Jalali monthly ones, which no Gregorian RRULE can express.
+"""
+import calendar
+import csv
+import datetime
+import itertools
+import json
+import os
+import time
+
+import jalali_calendar
+import recurrence
+from safe_files import atomic_write
+
+
+FORMATS = ("csv", "jsonl", "ics")
+BATCH_SIZE = 1000  # Rows per store commit (one journal append each)
+CSV_FIELDS = ("course", "deadline_shamsi", "deadline_time", "checked", "repeat")
+ICS_LINE_OCTETS = 75
+ICS_FREQUENCIES = {"daily": "DAILY", "weekly": "WEEKLY"}  # Rules with an exact RRULE equivalent
+ICS_MONTHLY_YEARS = 10  # How far ahead the dates of a monthly rule are listed
+MAX_YEAR = 9377  # jdatetime.MAXYEAR, the last year the editor ever accepted; datetime ends soon after
+
+
+# --- Validation (shared with the deadline editor) ---
+
+def is_valid_time(hour_str, minute_str):
+    try:
+        h = int(hour_str)
+        m = int(minute_str)
+        return 0 <= h <= 23 and 0 <= m <= 59
+    except ValueError:
+        return False
+
+def is_valid_shamsi_date(date_str):
+    try:
+        parts = date_str.split('-')
+        if len(parts) != 3:
+            return False
+        y, m, d = map(int, parts)
+        return y <= MAX_YEAR and jalali_calendar.is_valid(y, m, d)
+    except (AttributeError, ValueError):
+        return False
+
+
+def normalize_row(raw):
+    """
+    Turns one raw record into a store row ({course, deadline_shamsi, deadline_time, checked},
+    plus the repeat rule of a recurring deadline). Raises ValueError with a short reason
+    if the record is not a valid deadline.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("not a deadline record")
+    course = str(raw.get('course') or "").strip()
+    date_str = str(raw.get('deadline_shamsi') or "").strip()
+    time_str = str(raw.get('deadline_time') or "00:00:00").strip()
+    if not course:
+        raise ValueError("missing course")
+    if not is_valid_shamsi_date(date_str):
+        raise ValueError(f"invalid date {date_str!r}")
+
+    parts = time_str.split(':')
+    if len(parts) == 2:
+        parts.append("00")
+    if len(parts) != 3 or not is_valid_time(parts[0], parts[1]) or not parts[2].isdigit() or int(parts[2]) > 59:
+        raise ValueError(f"invalid time {time_str!r}")
+
+    y, m, d = map(int, date_str.split('-'))
+    checked = str(raw.get('checked') or "0").strip()
+    row = {
+        "course": course,
+        "deadline_shamsi": f"{y:04d}-{m:02d}-{d:02d}",
+        "deadline_time": f"{int(parts[0]):02d}:{int(parts[1]):02d}:{int(parts[2]):02d}",
+        "checked": "1" if checked in ("1", "true", "True") else "0",
+    }
+    repeat = raw.get('repeat')
+    try:
+        if isinstance(repeat, str):  # CSV and iCalendar carry the rule as JSON text
+            repeat = json.loads(repeat) if repeat.strip() else None
+        rule = recurrence.parse_rule(repeat)
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid repeat rule {raw.get('repeat')!r}")
+    if rule:
+        row["repeat"] = rule
+        done = raw.get('done')  # Occurrences checked off, in JSON Lines exports
+        if isinstance(done, list):
+            row["done"] = [date for date in done if isinstance(date, str) and is_valid_shamsi_date(date)]
+    return row
+
+
+def row_key(row):
+    """What makes two rows the same deadline for duplicate detection."""
+    return (row.get('course'), row.get('deadline_shamsi'), row.get('deadline_time'))
+
+
+class ImportReport:
+    """Counts and per-line problems of one import."""
+
+    def __init__(self):
+        self.added = 0
+        self.duplicates = 0
+        self.errors = []  # (line_number, reason)
+
+    def __str__(self):
+        return f"{self.added} added, {self.duplicates} duplicates skipped, {len(self.errors)} invalid lines"
+
+
+def validate(records, report, known_keys=None):
+    """
+    Yields a store row for every valid record and records the others in `report`.
+    Rows whose key is in `known_keys` are skipped as duplicates; new keys are added to it.
+    """
+    for line_number, raw in records:
+        try:
+            row = normalize_row(raw)
+        except ValueError as e:
+            report.errors.append((line_number, str(e)))
+            continue
+        if known_keys is not None:
+            key = row_key(row)
+            if key in known_keys:
+                report.duplicates += 1
+                continue
+            known_keys.add(key)
+        yield row
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Readers ---
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext in (".ics", ".ical"):
+        return "ics"
+    raise ValueError(f"unknown deadline file type: {path}")
+
+
+def read_csv(path):
+    # utf-8-sig drops the BOM Excel puts in front of the header
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for raw in reader:
+            yield reader.line_num, raw
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None  # Reported as invalid by validate()
+
+
+def _unfold(f):
+    """Joins iCalendar continuation lines. Yields (line_number, logical line)."""
+    pending, pending_number = None, 0
+    for line_number, line in enumerate(f, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending_number, pending
+        pending, pending_number = line, line_number
+    if pending is not None:
+        yield pending_number, pending
+
+
+def _ics_unescape(value):
+    out = []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append("\n" if nxt in ("n", "N") else nxt)
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _ics_datetime(value):
+    """
+    Parses an iCalendar DATE or DATE-TIME into (jalali date string, HH:MM:SS) in local time.
+    UTC values (ending in Z) are converted; TZID parameters are not, the time is taken as local.
+    """
+    if "T" not in value:
+        g = datetime.datetime.strptime(value, "%Y%m%d")
+    elif value.endswith("Z"):
+        utc = datetime.datetime.strptime(value, "%Y%m%dT%H%M%SZ")
+        g = datetime.datetime.fromtimestamp(calendar.timegm(utc.timetuple()))
+    else:
+        g = datetime.datetime.strptime(value, "%Y%m%dT%H%M%S")
+    y, m, d = jalali_calendar.from_gregorian(g.date())
+    return f"{y:04d}-{m:02d}-{d:02d}", g.strftime("%H:%M:%S")
+
+
+def _rule_from_rrule(value):
+    """
+    The repeat rule of a DAILY or WEEKLY RRULE with at most INTERVAL and COUNT or UNTIL.
+    Anything else is returned as it was, for validate() to reject with the raw value.
+    """
+    parts = dict(part.partition("=")[::2] for part in value.upper().split(";") if part)
+    freq = {ics: freq for freq, ics in ICS_FREQUENCIES.items()}.get(parts.pop("FREQ", None))
+    if freq is None or set(parts) - {"INTERVAL", "COUNT", "UNTIL", "WKST"}:
+        return value
+    rule = {"freq": freq, "interval": parts.get("INTERVAL") or 1}
+    if "COUNT" in parts:
+        rule["count"] = parts["COUNT"]
+    elif "UNTIL" in parts:
+        try:
+            rule["until"] = _ics_datetime(parts["UNTIL"])[0]
+        except ValueError:
+            return value
+    return rule
+
+
+def read_ics(path):
+    """
+    Yields one raw record per VEVENT (its DTSTART) or VTODO (its DUE). The repeat rule comes
+    from X-DEADLINE-REPEAT if present, otherwise from the RRULE; RDATEs are not read.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        component, start_number, fields = None, 0, {}
+        for line_number, line in _unfold(f):
+            name, _, value = line.partition(":")
+            name, _, params = name.partition(";")
+            name = name.upper()
+            if name == "BEGIN" and value.upper() in ("VEVENT", "VTODO"):
+                component, start_number, fields = value.upper(), line_number, {}
+            elif name == "END" and component is not None and value.upper() == component:
+                if "exact_repeat" in fields:
+                    fields['repeat'] = fields.pop('exact_repeat')
+                yield start_number, fields
+                component = None
+            elif component is None:
+                continue
+            elif name == "SUMMARY":
+                fields['course'] = _ics_unescape(value)
+            elif (name == "DTSTART" and component == "VEVENT") or (name == "DUE" and component == "VTODO"):
+                try:
+                    fields['deadline_shamsi'], fields['deadline_time'] = _ics_datetime(value.strip())
+                except ValueError:
+                    fields['deadline_shamsi'] = value  # Rejected by validate() with the raw value
+            elif name == "X-DEADLINE-REPEAT":
+                fields['exact_repeat'] = _ics_unescape(value)
+            elif name == "RRULE":
+                fields['repeat'] = _rule_from_rrule(value.strip())
+            elif (name == "STATUS" and value.upper() == "COMPLETED") or (name == "X-DEADLINE-CHECKED" and value == "1"):
+                fields['checked'] = "1"
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "ics": read_ics}
+
+
+def import_batches(path, report, fmt=None, known_keys=None, batch_size=BATCH_SIZE):
+    """Yields lists of validated rows read from `path`, `batch_size` at a time."""
+    reader = READERS[fmt or detect_format(path)]
+    return batched(validate(reader(path), report, known_keys), batch_size)
+
+
+def import_deadlines(store, path, fmt=None, batch_size=BATCH_SIZE, skip_duplicates=True):
+    """Imports every valid row of `path` into `store`, one batch at a time. Returns an ImportReport."""
+    report = ImportReport()
+    known_keys = {row_key(row) for row in store.get_rows()} if skip_duplicates else None
+    for batch in import_batches(path, report, fmt, known_keys, batch_size):
+        store.add_many(batch)
+        report.added += len(batch)
+    return report
+
+
+# --- Writers ---
+
+# Each writer returns the number of rows it wrote
+
+def _write_csv(f, rows):
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for row in rows:
+        rule = row.get('repeat')
+        writer.writerow([row.get(field, "") for field in CSV_FIELDS[:-1]]
+                        + [json.dumps(rule, ensure_ascii=False) if rule else ""])
+        count += 1
+    return count
+
+
+def _write_jsonl(f, rows):
+    count = 0
+    for row in rows:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Splits a content line into chunks of at most 75 octets, continued with a leading space."""
+    if len(line.encode('utf-8')) <= ICS_LINE_OCTETS:
+        return line + "\r\n"
+    chunks, current, size = [], "", 0
+    for ch in line:
+        n = len(ch.encode('utf-8'))
+        if size + n > ICS_LINE_OCTETS:
+            chunks.append(current)
+            current, size = " ", 1
+        current += ch
+        size += n
+    chunks.append(current)
+    return "\r\n".join(chunks) + "\r\n"
+
+
+def _ics_recurrence(rule, first_day, clock_time):
+    """The RRULE, or for a monthly rule the RDATE lines, of a recurring event starting on `first_day`."""
+    hour, minute, second = clock_time
+    if rule['freq'] in ICS_FREQUENCIES:
+        line = f"RRULE:FREQ={ICS_FREQUENCIES[rule['freq']]};INTERVAL={rule['interval']}"
+        if 'count' in rule:
+            line += f";COUNT={rule['count']}"
+        elif 'until' in rule:
+            line += f";UNTIL={jalali_calendar.to_gregorian(*jalali_calendar.parse_date(rule['until'])):%Y%m%d}T235959"
+        return line + "\r\n"
+    horizon = max(first_day, jalali_calendar.today_epoch_day()) + ICS_MONTHLY_YEARS * 366
+    days = itertools.takewhile(lambda day: day <= horizon, recurrence.occurrences(rule, first_day, first_day + 1))
+    dates = [f"{jalali_calendar.to_gregorian(*jalali_calendar.from_epoch_day(day)):%Y%m%d}T{hour:02d}{minute:02d}{second:02d}"
+             for day in days]
+    return "".join(_ics_fold("RDATE:" + ",".join(dates[i:i + 100])) for i in range(0, len(dates), 100))
+
+
+def _write_ics(f, rows):
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//DeadlineCountdown//EN\r\n")
+    count = 0
+    for row in rows:
+        try:
+            g = jalali_calendar.to_gregorian(*jalali_calendar.parse_date(row['deadline_shamsi']))
+            hour, minute, second = jalali_calendar.parse_time(row.get('deadline_time', '00:00:00'))
+        except (KeyError, ValueError):
+            continue  # Rows the app itself cannot show are not exported
+        f.write("BEGIN:VEVENT\r\n")
+        f.write(_ics_fold(f"UID:{row.get('id', '')}@deadline-countdown"))
+        f.write(f"DTSTAMP:{stamp}\r\n")
+        f.write(f"DTSTART:{g:%Y%m%d}T{hour:02d}{minute:02d}{second:02d}\r\n")
+        f.write(_ics_fold(f"SUMMARY:{_ics_escape(row.get('course', ''))}"))
+        rule = row.get('repeat')
+        if rule:
+            f.write(_ics_fold(f"X-DEADLINE-REPEAT:{_ics_escape(json.dumps(rule, ensure_ascii=False))}"))
+            f.write(_ics_recurrence(rule, jalali_calendar.to_epoch_day(*jalali_calendar.from_gregorian(g)),
+                                    (hour, minute, second)))
+        if row.get('checked') == "1":
+            f.write("X-DEADLINE-CHECKED:1\r\n")
+        f.write("END:VEVENT\r\n")
+        count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "ics": _write_ics}
+
+
+def export_deadlines(rows, path, fmt=None):
+    """Writes `rows` to `path`; the file is replaced in one step once it is complete. Returns the row count."""
+    writer = WRITERS[fmt or detect_format(path)]
+    newline = "" if writer is not _write_jsonl else None  # csv and ics write their own line endings
+    return atomic_write(path, lambda f: writer(f, rows), newline=newline)
@@ -0,0 +1,254 @@
+import tkinter as tk
+from abc import ABC, abstractmethod
+from tkinter import ttk
+
+
+ROW_HEIGHT = 60  # Height of one deadline row (colored item + progress bar), in pixels
+RENDERERS = ("widgets", "canvas")
+
+
+class _PooledDeadlineList(ABC):
+    """
+    Shows the deadlines on a canvas using a small pool of recycled rows.
+
+    Only as many rows as fit in the viewport (plus one) are ever created. On scroll
+    or when the data changes, pooled rows are moved and re-bound to other deadlines
+    instead of being destroyed and rebuilt, so redraw cost does not depend on the
+    length of the list. Subclasses decide what a row is made of.
+    """
+
+    def __init__(self, canvas, font, struck_font, bound, on_bind, on_toggle):
+        self.canvas = canvas
+        self.font = font
+        self.struck_font = struck_font
+        self.bound = bound          # deadline id -> row currently showing it (shared dict)
+        self.on_bind = on_bind      # on_bind(key, row) paints a row that was just bound
+        self.on_toggle = on_toggle  # on_toggle(key, checked) when a checkbox is clicked
+        self.keys = []              # Deadline ids in display order
+        self.pool = []
+
+        canvas.configure(yscrollincrement=ROW_HEIGHT)
+        canvas.bind("<Configure>", self._on_resize, add="+")
+
+    # --- Backend hooks ---
+
+    @abstractmethod
+    def _make_row(self):
+        """Creates one pooled row and returns its dict (with 'key' None and 'y' None)."""
+
+    @abstractmethod
+    def _place_row(self, row, y, width):
+        """Moves a row to canvas position y and shows it."""
+
+    @abstractmethod
+    def _hide_row(self, row):
+        """Takes an unbound row off the screen."""
+
+    @abstractmethod
+    def paint_row(self, row, text, progress, color, struck, expired, checked):
+        """Shows the given state on a bound row. Styling is only touched when it changed."""
+
+    # --- Pool management ---
+
+    def _on_resize(self, event):
+        self.rebind(relayout=True)
+
+    def set_keys(self, keys):
+        """Replaces the display order and repaints the rows in view."""
+        self.keys = keys
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(keys) * ROW_HEIGHT))
+        self.rebind(force=True)
+
+    def keys_changed(self, dirty):
+        """Call after editing self.keys in place: re-binds the rows in view and repaints those of the `dirty` keys."""
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(self.keys) * ROW_HEIGHT))
+        self.rebind(dirty=dirty)
+
+    def rebind(self, force=False, relayout=False, dirty=()):
+        """
+        Binds pooled rows to the deadlines currently in the viewport.
+        Rows that still show a visible deadline are only moved; the others are re-bound.
+        With force=True every bound row is repainted (the underlying data changed),
+        otherwise only those of the `dirty` keys are.
+        """
+        canvas = self.canvas
+        first = max(0, int(canvas.canvasy(0) // ROW_HEIGHT))
+        needed = max(1, canvas.winfo_height() // ROW_HEIGHT + 2)
+        while len(self.pool) < needed:
+            self.pool.append(self._make_row())
+
+        wanted = self.keys[first:first + needed]
+        keep = {key: self.bound[key] for key in wanted if key in self.bound}
+        kept_rows = {id(row) for row in keep.values()}
+        free = [row for row in self.pool if id(row) not in kept_rows]
+
+        self.bound.clear()
+        width = canvas.winfo_width()
+        for offset, key in enumerate(wanted):
+            row = keep.pop(key, None)
+            fresh = row is None
+            if fresh:
+                row = free.pop()
+                row['key'] = key
+            y = (first + offset) * ROW_HEIGHT
+            if fresh or relayout or row['y'] != y:
+                row['y'] = y
+                self._place_row(row, y, width)
+            self.bound[key] = row
+            if fresh or force or key in dirty:
+                row['style'] = None  # Forces a full restyle on the next paint
+                self.on_bind(key, row)
+
+        for row in free:
+            if row['key'] is not None:
+                row['key'] = None
+                self._hide_row(row)
+
+
+class VirtualDeadlineList(_PooledDeadlineList):
+    """Pooled rows built from Frame/Checkbutton/Label/Progressbar widgets."""
+
+    def _make_row(self):
+        row_frame = tk.Frame(self.canvas, height=ROW_HEIGHT)
+        row_frame.pack_propagate(False)
+
+        item_frame = tk.Frame(row_frame)
+        item_frame.pack(fill='x', padx=10, pady=2)
+
+        row = {'key': None, 'y': None, 'style': None, 'shown_text': None, 'progress': None,
+               'row_frame': row_frame, 'item_frame': item_frame}
+
+        checked_var = tk.BooleanVar(master=row_frame)
+        chk = tk.Checkbutton(item_frame, variable=checked_var, command=lambda: self._toggled(row))
+        chk.pack(side="left", padx=(0, 5))
+
+        label = tk.Label(item_frame, text="", font=self.font, anchor='w')
+        label.pack(side="left", fill='x', expand=True)
+
+        pb_frame = tk.Frame(row_frame)
+        pb_frame.pack(fill='x', padx=10, pady=(0, 5))
+        pb = ttk.Progressbar(pb_frame, orient="horizontal", length=350, mode="determinate")
+        pb.pack(fill='x')
+
+        row.update({
+            'label': label,
+            'progressbar': pb,
+            'checkbox_var': checked_var,
+            'checkbox': chk,
+            'pb_frame': pb_frame,
+            'window': self.canvas.create_window(0, 0, window=row_frame, anchor='nw', state='hidden'),
+        })
+        return row
+
+    def _toggled(self, row):
+        if row['key'] is not None:
+            self.on_toggle(row['key'], row['checkbox_var'].get())
+
+    def _place_row(self, row, y, width):
+        self.canvas.coords(row['window'], 0, y)
+        self.canvas.itemconfigure(row['window'], state='normal', width=width)
+
+    def _hide_row(self, row):
+        self.canvas.itemconfigure(row['window'], state='hidden')
+
+    def paint_row(self, row, text, progress, color, struck, expired, checked):
+        if row['shown_text'] != text:
+            row['shown_text'] = text
+            row['label'].config(text=text)
+        if row['progress'] != progress:
+            row['progress'] = progress
+            row['progressbar']["value"] = progress
+
+        style = (color, struck, expired, checked)
+        if row['style'] == style:
+            return
+        row['style'] = style
+        row['item_frame'].config(bg=color)
+        row['checkbox'].config(bg=color, state="disabled" if expired else "normal")
+        if struck:
+            row['label'].config(bg=color, fg="gray", font=self.struck_font)
+        else:
+            row['label'].config(bg=color, fg="black", font=self.font)
+        row['checkbox_var'].set(checked)
+
+
+class CanvasDeadlineList(_PooledDeadlineList):
+    """
+    Pooled rows drawn as items directly on the canvas: a background rectangle, a
+    checkbox square with a check mark, a text item and a two-rectangle progress bar.
+    Updating a row is a handful of itemconfigure/coords calls and creates no widgets.
+    """
+
+    BAR_COLOR = "#06b025"
+    TROUGH_COLOR = "#e6e6e6"
+
+    def _make_row(self):
+        c = self.canvas
+        n = len(self.pool)
+        tag = f"deadline_row{n}"
+        box_tag = f"deadline_box{n}"
+        row = {
+            'key': None, 'y': None, 'style': None, 'width': 0, 'progress': 0, 'expired': False, 'checked': False,
+            'shown_text': None, 'tag': tag,
+            'bg': c.create_rectangle(0, 0, 0, 0, outline="", tags=(tag,)),
+            'box': c.create_rectangle(0, 0, 0, 0, fill="white", outline="black", tags=(tag, box_tag)),
+            'tick': c.create_text(0, 0, text="✓", font=self.font, tags=(tag, box_tag)),
+            'text': c.create_text(0, 0, text="", anchor='w', font=self.font, tags=(tag,)),
+            'trough': c.create_rectangle(0, 0, 0, 0, fill=self.TROUGH_COLOR, outline="", tags=(tag,)),
+            'bar': c.create_rectangle(0, 0, 0, 0, fill=self.BAR_COLOR, outline="", tags=(tag,)),
+        }
+        c.itemconfigure(tag, state='hidden')
+        c.tag_bind(box_tag, "<Button-1>", lambda e: self._toggled(row))
+        return row
+
+    def _toggled(self, row):
+        if row['key'] is not None and not row['expired']:
+            self.on_toggle(row['key'], not row['checked'])
+
+    def _bar_coords(self, row):
+        y, width = row['y'], row['width']
+        right = 10 + (width - 20) * row['progress'] / 100
+        return 10, y + 38, right, y + 52
+
+    def _place_row(self, row, y, width):
+        c = self.canvas
+        row['width'] = width
+        c.coords(row['bg'], 10, y + 2, width - 10, y + 34)
+        c.coords(row['box'], 14, y + 11, 28, y + 25)
+        c.coords(row['tick'], 21, y + 18)
+        c.coords(row['text'], 34, y + 18)
+        c.coords(row['trough'], 10, y + 38, width - 10, y + 52)
+        c.coords(row['bar'], *self._bar_coords(row))
+        c.itemconfigure(row['text'], width=max(1, width - 44))
+        c.itemconfigure(row['tag'], state='normal')
+        c.itemconfigure(row['tick'], state='normal' if row['checked'] else 'hidden')
+
+    def _hide_row(self, row):
+        self.canvas.itemconfigure(row['tag'], state='hidden')
+
+    def paint_row(self, row, text, progress, color, struck, expired, checked):
+        c = self.canvas
+        if row['shown_text'] != text:
+            row['shown_text'] = text
+            c.itemconfigure(row['text'], text=text)
+        if row['progress'] != progress:
+            row['progress'] = progress
+            c.coords(row['bar'], *self._bar_coords(row))
+
+        style = (color, struck, expired, checked)
+        if row['style'] == style:
+            return
+        row['style'] = style
+        row['expired'] = expired
+        row['checked'] = checked
+        c.itemconfigure(row['bg'], fill=color)
+        c.itemconfigure(row['box'], fill="lightgrey" if expired else "white")
+        c.itemconfigure(row['tick'], state='normal' if checked else 'hidden')
+        c.itemconfigure(row['text'], fill="gray" if struck else "black",
+                        font=self.struck_font if struck else self.font)
+
+
+def create_deadline_list(renderer, canvas, font, struck_font, bound, on_bind, on_toggle):
+    """Returns the list implementation for the renderer selected at startup."""
+    cls = CanvasDeadlineList if renderer == "canvas" else VirtualDeadlineList
+    return cls(canvas, font, struck_font, bound, on_bind, on_toggle)
@@ -0,0 +1,713 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import deque
+
+import jalali_calendar
+import recurrence
+from safe_files import FileLock, atomic_write, keep_damaged_copy, remove_stale_temp_files, stat_signature
+
+
+FSYNC_POLICIES = ("always", "snapshot", "never")
+COMPACT_THRESHOLD = 64 * 1024  # Journal size (bytes) that triggers a background compaction
+BULK_INDEX_RECORDS = 64  # Batches larger than this re-sort the due index once instead of inserting row by row
+CHANGE_HISTORY = 8  # Versions whose changed ids are remembered for changes_since; views catch up every tick
+
+
+def new_deadline_id():
+    return uuid.uuid4().hex[:12]
+
+
+class Deadline:
+    """
+    One listed deadline: a stored row, or one occurrence of a recurring row.
+    Only what does not change from tick to tick is kept here; the countdown,
+    days, progress and color are computed in CountdownEngine's columns.
+    """
+
+    __slots__ = ("id", "course", "shamsi", "due", "checked")
+
+    def __init__(self, deadline_id, course, shamsi, due, checked):
+        self.id = deadline_id
+        self.course = course
+        self.shamsi = shamsi  # Jalali 'YYYY-MM-DD'
+        self.due = due        # Epoch seconds
+        self.checked = checked
+
+
+def parse_row(row):
+    """Parses a stored row into a Deadline. Raises on malformed rows."""
+    shamsi_date = row['deadline_shamsi']
+    hour, minute, second = jalali_calendar.parse_time(row.get('deadline_time', '00:00:00'))
+    due = jalali_calendar.to_timestamp(*jalali_calendar.parse_date(shamsi_date), hour, minute, second)
+    return Deadline(row['id'], row['course'], shamsi_date, due, bool(int(row.get('checked', '0'))))
+
+
+def expand_row(deadline, row, today):
+    """
+    The occurrences of a recurring row that are listed on `today` (an epoch day), as Deadlines
+    with occurrence ids and dates. Raises ValueError if the rule is invalid.
+    """
+    rule = recurrence.parse_rule(row.get('repeat'))
+    hour, minute, second = jalali_calendar.parse_time(row.get('deadline_time', '00:00:00'))
+    start_day = jalali_calendar.to_epoch_day(*jalali_calendar.parse_date(deadline.shamsi))
+    done = set(row.get('done') or ())
+    expanded = []
+    for day in recurrence.expand_window(rule, start_day, today):
+        y, m, d = jalali_calendar.from_epoch_day(day)
+        date_str = jalali_calendar.format_date(y, m, d)
+        expanded.append(Deadline(recurrence.occurrence_id(deadline.id, day), deadline.course, date_str,
+                                 jalali_calendar.to_timestamp(y, m, d, hour, minute, second),
+                                 deadline.checked or date_str in done))
+    return expanded
+
+
+def merge_edit(base, ours, theirs):
+    """
+    Three-way merge of a row edited here (from `base` to `ours`) while another process
+    changed it (from `base` to `theirs`): the fields edited here win, the others keep
+    the other process's values.
+    """
+    merged = dict(theirs)
+    for key in base.keys() | ours.keys():
+        if ours.get(key) == base.get(key):
+            continue
+        if key in ours:
+            merged[key] = ours[key]
+        else:
+            merged.pop(key, None)
+    return merged
+
+
+def apply_record(records, record):
+    """
+    Applies one journal record to `records` (id -> row) in place and returns the id of the affected row.
+    Every operation sets state rather than changing it relative to what is there,
+    so replaying a journal over a snapshot that already contains some of it is harmless.
+    """
+    op = record.get('op')
+    deadline_id = record.get('id')
+    if deadline_id is None:
+        # Journals written before deadlines had ids refer to them by course name
+        course = record.get('course')
+        deadline_id = next((key for key, row in records.items() if row.get('course') == course), None)
+
+    if op in ('add', 'edit'):
+        row = dict(record['row'])
+        deadline_id = deadline_id or row.get('id') or new_deadline_id()
+        row['id'] = deadline_id
+        records[deadline_id] = row
+    elif op == 'delete':
+        records.pop(deadline_id, None)
+    elif op == 'check':
+        deadline_id, date_str = recurrence.split_occurrence_id(deadline_id)
+        row = records.get(deadline_id)
+        if row is not None and date_str is None:
+            row['checked'] = record['checked']
+        elif row is not None:
+            # One occurrence of a recurring deadline: kept in the row's list of checked dates
+            done = set(row.get('done') or ()) - {date_str}
+            if record['checked'] == '1':
+                done.add(date_str)
+            try:
+                horizon = recurrence.done_horizon(recurrence.parse_rule(row.get('repeat')), date_str)
+            except (ValueError, TypeError):
+                horizon = ""  # No readable rule: keep every date
+            row['done'] = sorted(d for d in done if d >= horizon)
+    return deadline_id
+
+
+class DeadlineStore:
+    """
+    Holds the deadlines in memory, keyed by a stable per-deadline id.
+
+    On disk they live in deadlines.json (the last snapshot) plus deadlines.journal,
+    an append-only JSON Lines file of small add/edit/delete/check records that is
+    replayed over the snapshot on load. Once the journal passes COMPACT_THRESHOLD and
+    the size of the snapshot itself, it is folded into a fresh snapshot on a background thread. Rows saved before ids
+    existed are given one on load, and the snapshot is rewritten once to keep them.
+
+    Besides id -> row, the store keeps two indexes of the valid deadlines sorted by due
+    time, one of the unchecked and one of the checked ones. All are updated incrementally
+    on every mutation, so a toggle or an edit only re-parses the one row it touches and
+    moves one index entry; changes_since tells views which ids to patch. A recurring row (see recurrence) is listed
+    as its occurrences around today, under '<id>@<date>' ids; they are expanded again
+    when the day changes.
+
+    The files are only re-read when their stat signature (mtime, size, inode) changes,
+    so asking for the deadlines every second costs a couple of os.stat calls.
+
+    Other processes (a terminal --add, an import script, a second window) may write the
+    same files. Every journal append and compaction holds deadlines.lock (see safe_files),
+    and the signature doubles as an optimistic version: if the files changed since this
+    store last read them, an append first rebases its edits on what is on disk now
+    (merge_edit) and the store re-reads everything afterwards. Checks, adds and deletes
+    set state, so they need no merging.
+
+    Mutations update memory right away. The disk writes go through `writer(key, func)`
+    when one is given (the GUI passes its background IOWorker), otherwise they run inline.
+    `clock` only decides which day it is for the recurring occurrences.
+    """
+
+    def __init__(self, file_path, fsync_policy="always", compact_threshold=COMPACT_THRESHOLD, writer=None,
+                 clock=time.time):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}")
+        self.file_path = file_path
+        self.journal_path = os.path.splitext(file_path)[0] + ".journal"
+        self.lock_path = os.path.splitext(file_path)[0] + ".lock"
+        self.fsync_policy = fsync_policy
+        self.compact_threshold = compact_threshold
+        self.writer = writer
+        self.clock = clock
+        self.records = {}          # id -> raw row dict, in file order
+        self.unchecked_index = []  # Sorted (due_epoch, id) of every unchecked deadline that parses
+        self.checked_index = []    # The same for the checked ones
+        self.version = 0           # Bumped every time the in-memory rows change
+        self._changes = deque(maxlen=CHANGE_HISTORY)  # (version, listed ids it changed, or None for all)
+        self._parsed_by_id = {}   # Listed id (row id, or occurrence id of a recurring row) -> parsed tuple
+        self._occurrence_ids = {} # Recurring row id -> its listed occurrence ids
+        self._today = jalali_calendar.epoch_day(clock())
+        self._signature = None
+        self._journal_offset = 0  # Bytes of the journal reflected in self.records
+        self._rows = []
+        self._rows_version = -1
+        self._parsed = []
+        self._parsed_version = -1
+        self._ordered = []
+        self._ordered_version = -1
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._migrated_rows = None  # Rows given ids on load, still to be written back
+        self._unwritten = 0  # Journal appends accepted in memory but not yet on disk
+        self._remove_stale_temp_files()
+
+    def _remove_stale_temp_files(self):
+        """Clears temp files a process killed mid-compaction left behind, unless another process is writing right now."""
+        lock = FileLock(self.lock_path)
+        try:
+            if not lock.acquire(blocking=False):
+                return  # Its temp files may be in use; the next compaction clears them
+        except OSError:
+            return  # No data folder yet
+        try:
+            self._remove_temp_files_locked()
+        finally:
+            lock.release()
+
+    def _remove_temp_files_locked(self):
+        directory, name = os.path.split(os.path.abspath(self.file_path))
+        remove_stale_temp_files(directory, os.path.splitext(name)[0] + ".")
+
+    def _stat_signature(self):
+        return stat_signature(self.file_path), stat_signature(self.journal_path)
+
+    def _read_snapshot(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except OSError:
+            return {}, False
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, list):
+            # Never written half (see compact), so this is outside damage. Keep it before a compaction replaces it.
+            if self._signature is None or stat_signature(self.file_path) != self._signature[0]:
+                keep_damaged_copy(self.file_path)
+            return {}, False
+
+        records = {}
+        migrated = False
+        for row in data:
+            if not isinstance(row, dict):
+                continue
+            if not row.get('id') or row['id'] in records:
+                row['id'] = new_deadline_id()
+                migrated = True
+            records[row['id']] = row
+        return records, migrated
+
+    def _journal_lines(self, f, offset=0):
+        """
+        Yields (record, end) for every complete line of the open journal `f` from byte `offset`,
+        `end` being the offset just past it. Damaged lines yield None as the record.
+        """
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # Another process is still writing it, or it crashed mid-append
+            offset += len(line)
+            try:
+                yield json.loads(line), offset
+            except ValueError:
+                print(f"Skipping damaged journal record: {line!r}")
+                yield None, offset
+
+    def _replay_journal(self, records):
+        """Replays the journal over `records`. Returns (True if it held records without ids, bytes replayed)."""
+        legacy = False
+        end = 0
+        try:
+            with open(self.journal_path, 'rb') as f:
+                for record, end in self._journal_lines(f):
+                    if record is None:
+                        continue  # Reported by _journal_lines
+                    try:
+                        legacy = legacy or 'id' not in record
+                        apply_record(records, record)
+                    except (KeyError, TypeError, AttributeError):
+                        print(f"Skipping damaged journal record: {record!r}")
+        except OSError:
+            pass
+        return legacy, end
+
+    def _replay_tail(self, signature):
+        """
+        Applies only the journal records appended since the last read, with the indexes
+        kept in step. Returns the listed ids they changed, or None if the journal is no
+        longer the file that was read.
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != signature[1][2]:
+                    return None  # Compacted since the stat: read everything again
+                records = []
+                end = self._journal_offset
+                for record, end in self._journal_lines(f, self._journal_offset):
+                    if record is not None:
+                        records.append(record)
+        except OSError:
+            return None
+        if any(not isinstance(record, dict) or not record.get('id') for record in records):
+            return None  # Not written by this version of the store
+        changed = self._apply_indexed(records)
+        self._journal_offset = end
+        return changed
+
+    def _appended_only(self, signature):
+        """True if, since the last read, the snapshot is untouched and the journal only grew."""
+        old = self._signature
+        return (old is not None and old[1] is not None and signature[1] is not None
+                and signature[0] == old[0] and signature[1][2] == old[1][2]
+                and signature[1][1] >= self._journal_offset)
+
+    def refresh(self):
+        """Reloads from disk if the snapshot or journal changed. Returns True if the rows were reloaded."""
+        with self._lock:
+            changed = self._reload()
+        self._finish_migration()
+        return changed
+
+    def _reload(self):
+        """refresh() for callers already holding self._lock; they call _finish_migration() once they let go."""
+        if self._unwritten:
+            return False  # Memory is ahead of the files until the queued writes land
+        signature = self._stat_signature()
+        if signature == self._signature:
+            if self._occurrence_ids and self._today != jalali_calendar.epoch_day(self.clock()):
+                self._rebuild_index()  # A new day moves the window of listed occurrences
+                self._bump(None)
+                return True
+            return False
+
+        # Another process appended: replay just its records instead of re-reading everything
+        if self._appended_only(signature):
+            changed = self._replay_tail(signature)
+            if changed is not None:
+                self._signature = signature
+                self._bump(changed)
+                return True
+
+        # No file lock: the signature is taken first, so a write landing mid-read is re-read next time
+        records, migrated = self._read_snapshot()
+        legacy, self._journal_offset = self._replay_journal(records)
+
+        changed = records != self.records
+        self._signature = signature
+        if changed:
+            self.records = records
+            self._rebuild_index()
+            self._bump(None)
+        if migrated or legacy:
+            # One-time upgrade of data written before rows had ids, so the new ids stick
+            self._migrated_rows = list(records.values())
+        return changed
+
+    def _finish_migration(self):
+        """Writes rows that were just given ids back to the files, so the same ids come back on the next load."""
+        with self._lock:
+            rows, self._migrated_rows = self._migrated_rows, None
+        if rows is None:
+            return
+        # After self._lock is released: compacting takes the file lock, which must not be waited for while
+        # holding self._lock. Not on a thread, so a short-lived process cannot exit before it is done.
+        try:
+            self.compact(rows)
+        except Exception as e:
+            print(f"Could not save the new deadline ids: {e}")
+
+    # --- Indexes ---
+
+    def _bump(self, changed):
+        """Starts a new version. `changed` are the listed ids it added, changed or removed; None if it may be any."""
+        self.version += 1
+        self._changes.append((self.version, changed))
+        self._parsed = []  # Only rebuilt on demand, so it does not keep replaced Deadlines alive
+
+    def _due_index(self, deadline):
+        return self.checked_index if deadline.checked else self.unchecked_index
+
+    def _unindex(self, deadline_id):
+        """Takes a row's Deadlines out of the indexes. Returns their listed ids."""
+        listed_ids = self._occurrence_ids.pop(deadline_id, (deadline_id,))
+        for listed_id in listed_ids:
+            deadline = self._parsed_by_id.pop(listed_id, None)
+            if deadline is not None:
+                index = self._due_index(deadline)
+                entry = (deadline.due, listed_id)
+                i = bisect_left(index, entry)
+                if i < len(index) and index[i] == entry:
+                    index.pop(i)
+        return listed_ids
+
+    def _parse(self, deadline_id):
+        """Parses one row and returns the Deadlines it lists: itself, or the occurrences of a recurring row."""
+        row = self.records.get(deadline_id)
+        if row is None:
+            return ()
+        try:
+            deadline = parse_row(row)
+            if row.get('repeat'):
+                listed = expand_row(deadline, row, self._today)
+                self._occurrence_ids[deadline_id] = [d.id for d in listed]
+            else:
+                listed = (deadline,)
+        except Exception as e:
+            print(f"Error parsing row: {row} - {e}")
+            return ()
+        for deadline in listed:
+            self._parsed_by_id[deadline.id] = deadline
+        return listed
+
+    def _index(self, deadline_id, bulk=False):
+        """
+        Parses a row into the indexes. Returns the listed ids it added. With bulk=True the
+        entries are only appended, and the caller sorts the indexes once it is done.
+        """
+        listed = self._parse(deadline_id)
+        for deadline in listed:
+            if bulk:
+                self._due_index(deadline).append((deadline.due, deadline.id))
+            else:
+                insort(self._due_index(deadline), (deadline.due, deadline.id))
+        return [deadline.id for deadline in listed]
+
+    def _rebuild_index(self):
+        self._parsed_by_id = {}
+        self._occurrence_ids = {}
+        self._today = jalali_calendar.epoch_day(self.clock())
+        self.unchecked_index = []
+        self.checked_index = []
+        for deadline_id in self.records:
+            self._index(deadline_id, bulk=True)
+        self.unchecked_index.sort()
+        self.checked_index.sort()
+
+    # --- Reads ---
+
+    def get_rows(self):
+        """Returns the current list of raw deadline dicts, reloading only if the files changed."""
+        self.refresh()
+        if self._rows_version != self.version:
+            self._rows = list(self.records.values())
+            self._rows_version = self.version
+        return self._rows
+
+    def get(self, deadline_id):
+        """Returns the raw row with the given id, or None."""
+        self.refresh()
+        return self.records.get(deadline_id)
+
+    def get_parsed(self):
+        """
+        Returns a Deadline for every valid row (and listed occurrence) in file order.
+        Rows are parsed when they change, not on every call.
+        """
+        self.refresh()
+        if self._parsed_version != self.version:
+            parsed_by_id = self._parsed_by_id
+            occurrence_ids = self._occurrence_ids
+            parsed = []
+            for key in self.records:
+                if key in occurrence_ids:
+                    parsed.extend(parsed_by_id[listed_id] for listed_id in occurrence_ids[key])
+                elif key in parsed_by_id:
+                    parsed.append(parsed_by_id[key])
+            self._parsed = parsed
+            self._parsed_version = self.version
+        return self._parsed
+
+    def ordered_ids(self):
+        """Ids of all valid deadlines: unchecked ones by due time, then checked ones by due time."""
+        self.refresh()
+        if self._ordered_version != self.version:
+            self._ordered = [key for _, key in self.unchecked_index] + [key for _, key in self.checked_index]
+            self._ordered_version = self.version
+        return self._ordered
+
+    def get_listed(self, listed_id):
+        """The Deadline listed under `listed_id` (a row id or an occurrence id), or None. Does not refresh."""
+        return self._parsed_by_id.get(listed_id)
+
+    def changes_since(self, version):
+        """
+        Listed ids added, changed or removed since the store was at `version`. Does not refresh,
+        so views syncing one after another see the same version. None when that is not known
+        and a view has to reload everything: `version` is None or older than the last
+        CHANGE_HISTORY versions, the files were re-read, or the day changed.
+        """
+        if version == self.version:
+            return set()
+        if version is None or not self._changes or self._changes[0][0] > version + 1:
+            return None
+        changed = set()
+        for change_version, listed_ids in reversed(self._changes):
+            if change_version <= version:
+                break
+            if listed_ids is None:
+                return None
+            changed.update(listed_ids)
+        return changed
+
+    # --- Mutations ---
+
+    def _submit(self, key, func):
+        if self.writer is None:
+            func()
+        else:
+            self.writer(key, func)
+
+    def _append(self, records, bases=None):
+        """
+        Applies records in memory and queues their append to the journal. `bases` maps row ids
+        to the rows the caller's edits started from (by default, what memory holds before the
+        refresh below); an edited row that has changed since is merged rather than overwritten.
+        """
+        with self._lock:
+            if bases is None:
+                bases = {record['id']: dict(self.records[record['id']]) for record in records
+                         if record.get('op') == 'edit' and record.get('id') in self.records}
+            self._reload()
+            disk_bases = {}  # Row id -> the row this edit replaces, to merge with what other processes wrote
+            for record in records:
+                current = self.records.get(record.get('id'))
+                if record.get('op') == 'edit' and current is not None:
+                    base = bases.get(record['id'])
+                    if base is not None and base != current:
+                        record['row'] = merge_edit(base, record['row'], current)
+                    disk_bases[record['id']] = dict(current)  # A copy: checks change rows in place
+            self._bump(self._apply_indexed(records))
+            self._unwritten += 1
+        self._finish_migration()
+        # Appends never replace each other, so every one gets its own key
+        self._submit(object(), lambda: self._write_journal(records, disk_bases))
+
+    def _apply_indexed(self, records):
+        """
+        Applies records to the rows and updates the due indexes for just the rows they touch.
+        Returns the set of listed ids that were added, changed or removed.
+        """
+        bulk = len(records) > BULK_INDEX_RECORDS
+        changed = set()
+        for record in records:
+            if record.get('id'):
+                changed.update(self._unindex(recurrence.split_occurrence_id(record['id'])[0]))
+            deadline_id = apply_record(self.records, record)
+            record['id'] = record.get('id') or deadline_id
+            changed.update(self._index(deadline_id, bulk))
+        if bulk:
+            # Existing entries are one sorted run, so these are close to a merge
+            self.unchecked_index.sort()
+            self.checked_index.sort()
+        return changed
+
+    def _rebase(self, records, bases):
+        """Merges edits made here with changes other processes wrote to the same rows since we last read."""
+        on_disk, _ = self._read_snapshot()
+        self._replay_journal(on_disk)
+        rebased = []
+        for record in records:
+            theirs = on_disk.get(record['id']) if record.get('op') == 'edit' else None
+            base = bases.get(record['id'])
+            if theirs is not None and base is not None and theirs != base:
+                record = dict(record, row=merge_edit(base, record['row'], theirs))
+            rebased.append(record)
+        return rebased
+
+    def _write_journal(self, records, bases=None):
+        foreign = False
+        signature = None
+        try:
+            with FileLock(self.lock_path):
+                with self._lock:
+                    # Optimistic check: did anyone else write since this store last read or wrote?
+                    foreign = self._stat_signature() != self._signature
+                if foreign:
+                    records = self._rebase(records, bases or {})
+                lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+                with open(self.journal_path, 'a+b') as f:
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            lines = "\n" + lines  # Torn last line from a crash: keep our records off it
+                    f.write(lines.encode('utf-8'))
+                    f.flush()
+                    if self.fsync_policy == "always":
+                        os.fsync(f.fileno())
+                signature = self._stat_signature()  # Before unlocking, so it covers our records and no one else's
+        finally:
+            with self._lock:
+                self._unwritten -= 1
+                # After a foreign or failed write, memory and files differ: read them all again
+                if foreign or signature is None:
+                    self._signature = None
+                    signature = self._stat_signature()
+                else:
+                    self._signature = signature
+                    self._journal_offset = signature[1][1]
+                journal_size = signature[1][1] if signature[1] else 0
+                snapshot_size = signature[0][1] if signature[0] else 0
+
+        # Waiting until the journal also outgrows the snapshot keeps bulk imports from
+        # rewriting an ever larger snapshot after every batch
+        if journal_size > max(self.compact_threshold, snapshot_size):
+            if self.writer is None:
+                self.compact_in_background()
+            else:
+                self._compact_quietly()  # Already on the writer's thread
+
+    def add(self, row):
+        """Adds a new deadline and returns its id."""
+        row = dict(row)
+        row['id'] = row.get('id') or new_deadline_id()
+        self._append([{'op': 'add', 'id': row['id'], 'row': row}])
+        return row['id']
+
+    def add_many(self, rows):
+        """Adds several deadlines as one journal append. Returns their ids."""
+        records = []
+        for row in rows:
+            row = dict(row)
+            row['id'] = row.get('id') or new_deadline_id()
+            records.append({'op': 'add', 'id': row['id'], 'row': row})
+        if records:
+            self._append(records)
+        return [record['id'] for record in records]
+
+    def update(self, deadline_id, row, base=None):
+        """
+        Replaces the row stored under `deadline_id`. `base` is the row the edit started from;
+        fields that changed elsewhere since then and were not edited here are kept.
+        """
+        self._append([{'op': 'edit', 'id': deadline_id, 'row': row}],
+                     None if base is None else {deadline_id: base})
+
+    def delete(self, deadline_id):
+        self._append([{'op': 'delete', 'id': deadline_id}])
+
+    def set_checked(self, deadline_id, checked):
+        """Checks a deadline, or a single occurrence of a recurring one when given an occurrence id."""
+        self._append([{'op': 'check', 'id': deadline_id, 'checked': '1' if checked else '0'}])
+
+    def apply_rows(self, rows):
+        """
+        Journals whatever it takes to turn the current rows into `rows`.
+        Rows without an id are added as new deadlines. Returns the number of records.
+        """
+        with self._lock:
+            self._reload()
+            current = self.records
+            wanted = {}
+            for row in rows:
+                row = dict(row)
+                row['id'] = row.get('id') or new_deadline_id()
+                wanted[row['id']] = row
+            records = [{'op': 'delete', 'id': key} for key in current if key not in wanted]
+            for key, row in wanted.items():
+                if current.get(key) != row:
+                    records.append({'op': 'edit' if key in current else 'add', 'id': key, 'row': row})
+        self._finish_migration()
+        if records:
+            self._append(records)  # Outside self._lock: the write may wait for another process
+        return len(records)
+
+    def apply_changes(self, upserts, deleted_ids, bases=None):
+        """
+        Journals an editor session as one append: `upserts` are rows to add (no id yet)
+        or replace (existing id), `deleted_ids` are removed. `bases` (id -> row) are the rows
+        as the editor loaded them; rows left as they were are skipped, and edited ones are
+        merged with whatever changed in the meantime. Returns the number of records.
+        """
+        bases = bases or {}
+        with self._lock:
+            self._reload()
+            current = self.records
+            records = [{'op': 'delete', 'id': key} for key in deleted_ids if key in current]
+            for row in upserts:
+                row = dict(row)
+                key = row.get('id') or new_deadline_id()
+                row['id'] = key
+                if current.get(key) != row and bases.get(key) != row:
+                    records.append({'op': 'edit' if key in current else 'add', 'id': key, 'row': row})
+        self._finish_migration()
+        if records:
+            self._append(records, bases)
+        return len(records)
+
+    # --- Compaction ---
+
+    def compact(self, migrated_rows=None):
+        """
+        Folds the journal into a fresh snapshot, holding the file lock throughout so that
+        no other process appends in between. The rows are read back from the files rather
+        than taken from memory, which may not have seen another process's last writes yet.
+        The snapshot is replaced in one step before the journal is emptied, so a crash at
+        any point leaves either the old or the new state on disk.
+        `migrated_rows` are rows just given ids on load, written as they are so the ids stick.
+        """
+        fsync = self.fsync_policy != "never"
+        with FileLock(self.lock_path):
+            self._remove_temp_files_locked()
+            signature = self._stat_signature()
+            if migrated_rows is not None and signature == self._signature:
+                rows = migrated_rows
+            else:
+                records, _ = self._read_snapshot()
+                self._replay_journal(records)
+                rows = list(records.values())
+            atomic_write(self.file_path, lambda f: json.dump(rows, f, ensure_ascii=False, indent=4), fsync)
+            atomic_write(self.journal_path, lambda f: None, fsync, mode='wb')
+            with self._lock:
+                if signature == self._signature:
+                    self._signature = self._stat_signature()  # Same content as memory, only reshuffled on disk
+                    self._journal_offset = 0
+                else:
+                    self._signature = None  # Memory was behind the files: read them again
+
+    def _compact_quietly(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Could not compact deadlines journal: {e}")
+        finally:
+            self._compacting = False
+
+    def compact_in_background(self):
+        threading.Thread(target=self._compact_quietly, name="deadline-compaction", daemon=True).start()
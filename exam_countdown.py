@@ -1,101 +1,98 @@
+import time
+STARTUP_T0 = time.perf_counter() # Start of the cold-start measurement (--measure-startup)
+
+import sys
+if __name__ == "__main__" and any(mode in sys.argv for mode in ("--tui", "--once", "--notify", "--add")):
+    # Terminal modes run without ever loading Tk (see countdown_cli)
+    import countdown_cli
+    sys.exit(countdown_cli.main())
+
+import single_instance
+from app_paths import app_data_dir
+instance_lock = None
+if __name__ == "__main__" and not {"--measure-startup", "-h", "--help"} & set(sys.argv):
+    # One window per user: a second launch (e.g. at login) only brings the running one forward
+    instance_lock = single_instance.acquire(app_data_dir())
+    if instance_lock is None:
+        if single_instance.hand_off(app_data_dir(), {"op": "show"}) is not None:
+            sys.exit(0)
+        # Nobody answered: the holder may have been a `countdown_cli --add` that has finished by now
+        instance_lock = single_instance.acquire(app_data_dir())
+        if instance_lock is None:
+            print("Another instance holds the lock but is not answering")
+            sys.exit(1)
+
 import tkinter as tk
 from tkinter import ttk
-import jdatetime
-import csv
 from tkinter import font as tkFont
-from tkcalendar import DateEntry
 import datetime
-from Jallai import JalaliDatepicker
-from tkinter import messagebox
+import jalali_calendar
+from deadline_core import add_to_startup, add_storage_arguments, get_persistent_path, open_deadline_store
+from deadline_io import is_valid_time, is_valid_shamsi_date, import_batches, export_deadlines, normalize_row, row_key, ImportReport
+from countdown_engine import CountdownEngine, local_midnight
+from tick_scheduler import CountdownTicker, delay_ms
+from deadline_list import create_deadline_list, RENDERERS, ROW_HEIGHT
+from io_worker import IOWorker
+from notes_store import open_notes_store, NoteCache, PREFETCH_RADIUS
+from notes_search import NotesIndex
+from recurrence import rule_from_fields, rule_fields
+import profiler
+from notifier import NotificationScheduler, desktop_notify
+import queue
+from tkinter import messagebox, filedialog
 import os
-import sys
-import winreg as reg
-import json 
+import argparse
 
 
 
 
 
 # --- Global variable to hold references to rendered deadline items ---
-rendered_deadline_items = {} # To store references to widget frames and their components
-
-
-# --- Helper Functions ---
-
-def is_valid_time(hour_str, minute_str):
-    try:
-        h = int(hour_str)
-        m = int(minute_str)
-        return 0 <= h <= 23 and 0 <= m <= 59
-    except:
-        return False
-
-def is_valid_shamsi_date(date_str):
-    try:
-        parts = date_str.split('-')
-        if len(parts) != 3:
-            return False
-        y, m, d = map(int, parts)
-        jdatetime.date(y, m, d)
-        return True
-    except Exception:
-        return False
-
-def add_to_startup(file_path=None, app_name="DeadlineApp"):
-    if file_path is None:
-        file_path = sys.executable
-    key = r"Software\Microsoft\Windows\CurrentVersion\Run"
-    try:
-        with reg.OpenKey(reg.HKEY_CURRENT_USER, key, 0, reg.KEY_SET_VALUE) as registry_key:
-            reg.SetValueEx(registry_key, app_name, 0, reg.REG_SZ, file_path)
-    except Exception as e:
-        print(f"Could not add to startup: {e}")
-
-
-
-def get_persistent_path(filename="deadlines.json"):
-    """
-    Returns the path to the JSON file stored in the AppData\Local\YourAppName folder.
-    Creates the directory and file if they don't exist.
-    """
-    appdata_folder = os.path.join(os.environ['LOCALAPPDATA'], 'DeadlineCountdown')  # Replace with your app name
-    os.makedirs(appdata_folder, exist_ok=True)  # Create folder if needed
-
-    full_path = os.path.join(appdata_folder, filename)
-
-    if not os.path.exists(full_path):
-        with open(full_path, 'w', encoding='utf-8') as f:
-            json.dump([], f)  # Or {} depending on your data structure
-
-    return full_path
+rendered_deadline_items = {} # Deadline id -> pooled row widgets currently bound to it (see deadline_list)
+countdown_after_id = None # Pending root.after id of the next countdown tick
+countdown_planned_at = None # When that tick is due, to measure how late it runs (--profile)
+clock = time.time # Where the window gets "now" from; the store, planner and alerts are given the same clock
 
 
 # --- Notebook Feature ---
 
 class NotebookWindow(tk.Toplevel):
-    def __init__(self, master):
+    # date -> text of notes handed to the I/O worker but not yet confirmed on disk.
+    # Shared between windows so reopening the notebook never shows an older copy.
+    unsaved_notes = {}
+
+    def __init__(self, master, io_worker, note_cache, notes_index):
         super().__init__(master)
+        self.io_worker = io_worker
+        self.note_cache = note_cache # LRU in front of the notes backend (see notes_store)
+        self.notes_index = notes_index # Full-text index over all notes (see notes_search)
         self.title("یادداشت روزانه")
         self.geometry("400x500")
         self.vazir_font = tkFont.Font(family="Vazir", size=12)
 
-        self.current_date = jdatetime.date.today()
-
-        appdata_base = os.path.join(os.environ['LOCALAPPDATA'], 'DeadlineCountdown')  
-        os.makedirs(appdata_base, exist_ok=True)
-
-        self.notes_file = os.path.join(appdata_base, "notes.json")
+        self.current_day = jalali_calendar.epoch_day(clock()) # Days since 1970-01-01 (see jalali_calendar)
 
 
         self.save_timer = None # For auto-save mechanism
+        self.search_timer = None # Debounces searching while typing
+        self.search_results = [] # Date strings shown in the results list
 
         self.create_widgets()
-        self.load_note_for_date(self.current_date)
+        self.load_note_for_date(self.current_day)
         
         # Ensure changes are saved when the window is closed
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
+        # Search box; matching days are listed below it while a query is typed
+        self.search_var = tk.StringVar(master=self)
+        self.search_entry = tk.Entry(self, textvariable=self.search_var, font=self.vazir_font, justify="right")
+        self.search_entry.pack(fill="x", padx=10, pady=(10, 0))
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+
+        self.results_list = tk.Listbox(self, font=self.vazir_font, height=5)
+        self.results_list.bind("<<ListboxSelect>>", self.open_search_result)
+
         # Frame for date navigation
         nav_frame = tk.Frame(self)
         nav_frame.pack(pady=10)
@@ -103,6 +100,7 @@ class NotebookWindow(tk.Toplevel):
         self.prev_button = tk.Button(nav_frame, text="< دیروز", font=self.vazir_font, command=self.prev_day)
         self.prev_button.pack(side="left", padx=10)
 
+        self.nav_frame = nav_frame
         self.date_label = tk.Label(nav_frame, text="", font=self.vazir_font)
         self.date_label.pack(side="left")
 
@@ -129,21 +127,43 @@ class NotebookWindow(tk.Toplevel):
         # Schedule a new save after 1.5 seconds (1500 ms)
         self.save_timer = self.after(1500, self.save_note)
 
-    def load_note_for_date(self, date_obj):
-        """Loads the note for the given date from the JSON file and sets the widget state."""
-        self.current_date = date_obj
-        self.date_label.config(text=date_obj.strftime("%Y-%m-%d"))
-        
-        notes_content = {}
-        if os.path.exists(self.notes_file):
-            try:
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    notes_content = json.load(f)
-            except json.JSONDecodeError:
-                notes_content = {} # Handle empty or corrupt JSON file
+    def schedule_search(self, event=None):
+        if self.search_timer:
+            self.after_cancel(self.search_timer)
+        self.search_timer = self.after(150, self.run_search)
+
+    def run_search(self):
+        """Lists the days whose notes match the search box, newest first."""
+        self.search_timer = None
+        query = self.search_var.get()
+        self.search_results = self.notes_index.search(query) if query.strip() else []
+        self.results_list.delete(0, tk.END)
+        if not self.search_results:
+            self.results_list.pack_forget()
+            return
+        for date_str in self.search_results:
+            self.results_list.insert(tk.END, date_str)
+        if not self.results_list.winfo_ismapped():
+            self.results_list.pack(fill="x", padx=10, pady=(5, 0), before=self.nav_frame)
+
+    def open_search_result(self, event=None):
+        selection = self.results_list.curselection()
+        if not selection:
+            return
+        day = jalali_calendar.to_epoch_day(*jalali_calendar.parse_date(self.search_results[selection[0]]))
+        self.save_note_if_pending()
+        self.load_note_for_date(day)
 
-        date_str = date_obj.strftime("%Y-%m-%d")
-        note_text = notes_content.get(date_str, "")
+    def load_note_for_date(self, day):
+        """Loads the note for the given epoch day from the notes store and sets the widget state."""
+        self.current_day = day
+        date_str = jalali_calendar.day_string(day)
+        self.date_label.config(text=date_str)
+
+        if date_str in self.unsaved_notes:
+            note_text = self.unsaved_notes[date_str]
+        else:
+            note_text = self.note_cache.get(date_str)
 
         # Re-enable the text widget to clear and load new content
         self.notes_text.config(state="normal")
@@ -151,41 +171,50 @@ class NotebookWindow(tk.Toplevel):
         self.notes_text.insert("1.0", note_text)
 
         # Set read-only status for past days
-        if date_obj < jdatetime.date.today():
+        if day < jalali_calendar.epoch_day(clock()):
             self.notes_text.config(state="disabled")
             self.status_label.config(text="Read-only")
         else:
             self.notes_text.config(state="normal")
             self.status_label.config(text="All changes are saved automatically.")
 
+        # Warm the cache for the days around this one so stepping through them is instant
+        nearby = []
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            nearby.append(jalali_calendar.day_string(day - offset))
+            nearby.append(jalali_calendar.day_string(day + offset))
+        self.note_cache.prefetch(nearby)
+
     def save_note(self):
-        """Silently saves the current content of the text widget to the JSON file."""
+        """Hands the current content of the text widget to the I/O worker to be saved."""
         # Do not save if the widget is disabled (i.e., for past dates)
         if self.notes_text.cget("state") == "disabled":
             return
             
         note_content = self.notes_text.get("1.0", tk.END).strip()
-        date_str = self.current_date.strftime("%Y-%m-%d")
-        
-        # Load existing notes
-        all_notes = {}
-        if os.path.exists(self.notes_file):
-            try:
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    all_notes = json.load(f)
-            except json.JSONDecodeError:
-                pass # File is empty or corrupt, start with empty dict
-
-        # Update the specific date's note
-        all_notes[date_str] = note_content
-
-        try:
-            with open(self.notes_file, 'w', encoding='utf-8') as f:
-                json.dump(all_notes, f, ensure_ascii=False, indent=4)
+        date_str = jalali_calendar.day_string(self.current_day)
+        note_cache = self.note_cache
+
+        self.unsaved_notes[date_str] = note_content
+        self.status_label.config(text="Saving…")
+        # Keyed by day: a newer save of the same day replaces one that has not been written yet
+        self.io_worker.submit(("note", date_str),
+                              lambda: note_cache.write(date_str, note_content),
+                              on_done=lambda error: self.on_note_saved(date_str, note_content, error))
+        # The index is updated in memory right away; only its disk write is deferred
+        self.io_worker.submit(("index", date_str), self.notes_index.update(date_str, note_content))
+
+    def on_note_saved(self, date_str, note_content, error):
+        """Called on the Tk thread once the worker has written (or failed to write) a note."""
+        if error is None and self.unsaved_notes.get(date_str) == note_content:
+            del self.unsaved_notes[date_str]
+        if not self.winfo_exists():
+            return # Window was closed while the note was being written
+        if error is None:
             # Update status label to show it's saved
             self.status_label.config(text=f"Saved at {datetime.datetime.now().strftime('%H:%M:%S')}")
-        except Exception as e:
-            self.status_label.config(text=f"Error saving: {e}")
+        else:
+            self.status_label.config(text=f"Error saving: {error}")
 
     def save_note_if_pending(self):
         """Saves immediately if a save operation was pending."""
@@ -196,40 +225,76 @@ class NotebookWindow(tk.Toplevel):
 
     def prev_day(self):
         self.save_note_if_pending()
-        self.load_note_for_date(self.current_date - jdatetime.timedelta(days=1))
+        self.load_note_for_date(self.current_day - 1)
 
     def next_day(self):
         self.save_note_if_pending()
-        self.load_note_for_date(self.current_date + jdatetime.timedelta(days=1))
+        self.load_note_for_date(self.current_day + 1)
         
     def on_close(self):
         """Called when the notebook window is closed."""
         self.save_note_if_pending()
+        if self.search_timer:
+            self.after_cancel(self.search_timer) # Would otherwise run against destroyed widgets
+            self.search_timer = None
         self.destroy()
 
+note_cache = None # Notes backend and its cache are opened on first use of the notebook
+notes_index = None
+
 def open_notebook():
-    NotebookWindow(root)
+    global note_cache, notes_index
+    if note_cache is None:
+        app_dir = os.path.dirname(get_persistent_path())
+        note_cache = NoteCache(open_notes_store(app_dir, args.notes_backend))
+        notes_index = NotesIndex(os.path.join(app_dir, "notes_index.sqlite3"))
+        if len(notes_index) == 0:
+            # First run with search (or the index file was lost): index the existing notes once
+            notes_index.rebuild(note_cache.store.items())
+    NotebookWindow(root, io_worker, note_cache, notes_index)
 
 
 # --- Deadline Management ---
 
 def adjust_root_height():
-    json_path = get_persistent_path()
-    deadlines = load_deadlines(json_path)
-    num_rows = len(deadlines)
+    num_rows = len(countdown_engine)
     base_height = 150
-    row_height = 60
     max_height = min(root.winfo_screenheight() - 100, 800)
-    new_height = base_height + row_height * num_rows
+    new_height = base_height + ROW_HEIGHT * num_rows
     new_height = min(new_height, max_height)
     canvas.config(height=new_height - 100)
     root.geometry(f"{window_width}x{new_height}+{x}+{y}")
 
 
+EDITOR_PAGE_SIZE = 20 # Rows shown (and widgets created) per page of the deadline editor
+INVALID_BG = "misty rose"
+REPEAT_LABELS = {"": "بدون تکرار", "daily": "هر چند روز", "weekly": "هفتگی", "monthly": "ماهانه"}
+REPEAT_FREQS = {label: freq for freq, label in REPEAT_LABELS.items()}
+
+def draft_rule(draft):
+    """The repeat rule of an editor row, or None. Raises ValueError if its fields are invalid."""
+    return rule_from_fields(REPEAT_FREQS.get(draft['repeat'], ""), draft['interval'], draft['end'])
+
+def draft_errors(draft):
+    """Same checks save_all always made, for one row of the editor."""
+    try:
+        draft_rule(draft)
+        repeat_error = False
+    except ValueError:
+        repeat_error = True
+    return {
+        'date': not is_valid_shamsi_date(draft['date']),
+        'time': not is_valid_time(draft['hour'], draft['minute']),
+        'repeat': repeat_error,
+    }
+
+NO_ERRORS = {'date': False, 'time': False, 'repeat': False}
+DRAFT_FIELDS = ('course', 'date', 'hour', 'minute', 'repeat', 'interval', 'end')
+
 def manage_deadlines_popup():
     popup = tk.Toplevel(root)
     popup.title("مدیریت ددلاین‌ها")
-    popup.geometry("500x400")
+    popup.geometry("800x400")
 
     container = tk.Frame(popup)
     container.pack(fill="both", expand=True)
@@ -245,107 +310,193 @@ def manage_deadlines_popup():
     canvas.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
 
-    entry_rows = []
+    # Plain dicts hold what is being edited; widgets only exist for the current page
+    # and are re-bound to other drafts when the page changes.
+    originals = {} # id -> stored row, to tell which drafts really changed
+    drafts = []
+    for row in deadline_store.get_rows():
+        originals[row['id']] = dict(row) # A copy: the store changes rows in place when they are checked
+        time_ = row.get('deadline_time', '00:00')
+        try:
+            h, m = map(int, time_.split(":")[:2])
+        except:
+            h, m = 0, 0
+        freq, interval, end = rule_fields(row.get('repeat'))
+        drafts.append({'id': row['id'], 'course': row.get('course', ''), 'date': row.get('deadline_shamsi', ''),
+                       'hour': f"{h:02}", 'minute': f"{m:02}", 'repeat': REPEAT_LABELS.get(freq, ""),
+                       'interval': interval, 'end': end, 'dirty': False, 'errors': None})
+    deleted_ids = []
+    page = [0]
+    binding = [False] # True while widgets are being filled from a draft, so the traces stay quiet
+    page_rows = []
+
+    def page_count():
+        return max(1, (len(drafts) + EDITOR_PAGE_SIZE - 1) // EDITOR_PAGE_SIZE)
+
+    def show_errors(widgets, errors):
+        bg = INVALID_BG if errors['date'] else "white"
+        widgets['date_entry'].config(bg=bg)
+        bg = INVALID_BG if errors['time'] else "white"
+        widgets['hour_spin'].config(bg=bg)
+        widgets['minute_spin'].config(bg=bg)
+        bg = INVALID_BG if errors['repeat'] else "white"
+        widgets['interval_spin'].config(bg=bg)
+        widgets['end_entry'].config(bg=bg)
+
+    def on_field_edited(widgets, field):
+        if binding[0] or widgets['draft'] is None:
+            return
+        draft = widgets['draft']
+        draft[field] = widgets[field + '_var'].get()
+        draft['dirty'] = True
+        draft['errors'] = draft_errors(draft) # Validated as it is typed, not all at once on save
+        show_errors(widgets, draft['errors'])
 
-    def add_row(course="", date="", time_="00:00"):
+    def make_page_row():
         row_frame = tk.Frame(scroll_frame)
-        row_frame.pack(fill="x", pady=2)
+        widgets = {'frame': row_frame, 'draft': None}
+        for field in DRAFT_FIELDS:
+            var = tk.StringVar(master=row_frame)
+            var.trace_add("write", lambda *_, f=field: on_field_edited(widgets, f))
+            widgets[field + '_var'] = var
 
-        course_entry = tk.Entry(row_frame, width=20, font=vazir_font)
-        course_entry.insert(0, course)
+        course_entry = tk.Entry(row_frame, width=20, font=vazir_font, textvariable=widgets['course_var'])
         course_entry.pack(side="right", padx=3)
 
-        date_entry = tk.Entry(row_frame, width=12, font=vazir_font)
-        date_entry.insert(0, date)
+        date_entry = tk.Entry(row_frame, width=12, font=vazir_font, textvariable=widgets['date_var'])
         date_entry.pack(side="right", padx=3)
 
         def open_datepicker():
+            from Jallai import JalaliDatepicker # Only loaded when a date is actually picked
             JalaliDatepicker(root, date_entry)
 
         date_btn = tk.Button(row_frame, text="📅", font=vazir_font, command=open_datepicker)
         date_btn.pack(side="right", padx=3)
 
-        try:
-            h, m = map(int, time_.split(":")[:2])
-        except:
-            h, m = 0, 0
-
-        hour_var = tk.StringVar(value=f"{h:02}")
-        minute_var = tk.StringVar(value=f"{m:02}")
-
         time_frame = tk.Frame(row_frame)
-        hour_spin = tk.Spinbox(time_frame, from_=0, to=23, width=3, textvariable=hour_var, format="%02.0f", font=vazir_font, wrap=True)
-        minute_spin = tk.Spinbox(time_frame, from_=0, to=59, width=3, textvariable=minute_var, format="%02.0f", font=vazir_font, wrap=True)
+        hour_spin = tk.Spinbox(time_frame, from_=0, to=23, width=3, textvariable=widgets['hour_var'], format="%02.0f", font=vazir_font, wrap=True)
+        minute_spin = tk.Spinbox(time_frame, from_=0, to=59, width=3, textvariable=widgets['minute_var'], format="%02.0f", font=vazir_font, wrap=True)
 
         hour_spin.pack(side="left")
         tk.Label(time_frame, text=":", font=vazir_font).pack(side="left")
         minute_spin.pack(side="left")
         time_frame.pack(side="right", padx=3)
 
-        delete_btn = tk.Button(row_frame, text="❌", font=vazir_font, command=lambda: remove_row(row_frame))
-        delete_btn.pack(side="right", padx=3)
+        # Repeat rule: frequency, every how many days/weeks/months, and an end date or count (empty = forever)
+        repeat_box = ttk.Combobox(row_frame, width=10, state="readonly", textvariable=widgets['repeat_var'],
+                                  values=list(REPEAT_LABELS.values()), font=vazir_font)
+        repeat_box.pack(side="right", padx=3)
+        interval_spin = tk.Spinbox(row_frame, from_=1, to=99, width=3, textvariable=widgets['interval_var'], font=vazir_font)
+        interval_spin.pack(side="right", padx=3)
+        end_entry = tk.Entry(row_frame, width=11, font=vazir_font, textvariable=widgets['end_var'])
+        end_entry.pack(side="right", padx=3)
 
-        entry_rows.append((row_frame, course_entry, date_entry, hour_var, minute_var))
+        delete_btn = tk.Button(row_frame, text="❌", font=vazir_font, command=lambda: remove_row(widgets['draft']))
+        delete_btn.pack(side="right", padx=3)
 
-    def remove_row(row_frame):
-        for i, (rf, _, _, _, _) in enumerate(entry_rows):
-            if rf == row_frame:
-                entry_rows.pop(i)
-                break
-        row_frame.destroy()
+        widgets.update({'course_entry': course_entry, 'date_entry': date_entry,
+                        'hour_spin': hour_spin, 'minute_spin': minute_spin,
+                        'interval_spin': interval_spin, 'end_entry': end_entry})
+        return widgets
+
+    def render_page():
+        """Binds the pooled row widgets to the drafts of the current page."""
+        page[0] = min(page[0], page_count() - 1)
+        start = page[0] * EDITOR_PAGE_SIZE
+        visible = drafts[start:start + EDITOR_PAGE_SIZE]
+        while len(page_rows) < len(visible):
+            page_rows.append(make_page_row())
+
+        binding[0] = True
+        for i, widgets in enumerate(page_rows):
+            if i >= len(visible):
+                widgets['draft'] = None
+                widgets['frame'].pack_forget()
+                continue
+            draft = visible[i]
+            widgets['draft'] = draft
+            for field in DRAFT_FIELDS:
+                widgets[field + '_var'].set(draft[field])
+            show_errors(widgets, draft['errors'] or NO_ERRORS)
+            widgets['frame'].pack(fill="x", pady=2)
+        binding[0] = False
+
+        page_label.config(text=f"{page[0] + 1} / {page_count()}")
+        prev_btn.config(state="normal" if page[0] > 0 else "disabled")
+        next_btn.config(state="normal" if page[0] < page_count() - 1 else "disabled")
+        canvas.yview_moveto(0)
+
+    def go_to_page(n):
+        page[0] = max(0, min(n, page_count() - 1))
+        render_page()
+
+    def add_row():
+        drafts.append({'id': None, 'course': '', 'date': '', 'hour': "00", 'minute': "00",
+                       'repeat': REPEAT_LABELS[""], 'interval': "1", 'end': "", 'dirty': True, 'errors': None})
+        go_to_page(page_count() - 1)
+        page_rows[(len(drafts) - 1) % EDITOR_PAGE_SIZE]['course_entry'].focus_set()
+
+    def remove_row(draft):
+        if draft is None:
+            return
+        drafts.remove(draft)
+        if draft['id'] is not None:
+            deleted_ids.append(draft['id'])
+        render_page()
 
     def save_all():
-        # Read existing data to preserve 'checked' status
-        json_path = get_persistent_path()
-        existing_data = []
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
-        checked_status_map = {item.get('course'): item.get('checked', '0') for item in existing_data}
-
-        # Process rows from the popup
+        # Only rows touched in this session are checked and written; the rest stay as stored
         invalid_rows = []
-        valid_rows = []
-        for i, (_, course_e, date_e, hour_v, minute_v) in enumerate(entry_rows, start=1):
-            course = course_e.get().strip()
-            shamsi_date_str = date_e.get()
-            hour_str = hour_v.get()
-            minute_str = minute_v.get()
-
-            if not is_valid_shamsi_date(shamsi_date_str) or not is_valid_time(hour_str, minute_str):
+        upserts = []
+        for i, draft in enumerate(drafts, start=1):
+            if not draft['dirty']:
+                continue
+            draft['errors'] = draft['errors'] or draft_errors(draft)
+            if any(draft['errors'].values()):
                 invalid_rows.append(i)
                 continue
 
-            time_str = f"{int(hour_str):02}:{int(minute_str):02}:00"
-            if course and shamsi_date_str:
-                valid_rows.append({
-                    "course": course,
-                    "deadline_shamsi": shamsi_date_str,
-                    "deadline_time": time_str,
-                    "checked": checked_status_map.get(course, '0') # Preserve checked status
-                })
+            course = draft['course'].strip()
+            if not course:
+                if draft['id'] is not None:
+                    deleted_ids.append(draft['id']) # Clearing the course removes the deadline, as before
+                continue
+            existing = originals.get(draft['id'], {})
+            row = {
+                "id": draft['id'],
+                "course": course,
+                "deadline_shamsi": draft['date'],
+                "deadline_time": f"{int(draft['hour']):02}:{int(draft['minute']):02}:00",
+                "checked": existing.get('checked', '0') # Preserve checked status
+            }
+            rule = draft_rule(draft)
+            if rule:
+                # One record for the whole series; occurrences are only expanded for display
+                row["repeat"] = rule
+                if existing.get('done'):
+                    row["done"] = existing['done']
+            upserts.append(row)
 
         if invalid_rows:
-            messagebox.showwarning("خطای ورودی", f"لطفاً تاریخ و زمان‌های معتبر وارد کنید. خطا در سطر(های): {', '.join(map(str, invalid_rows))}")
+            go_to_page((invalid_rows[0] - 1) // EDITOR_PAGE_SIZE)
+            messagebox.showwarning("خطای ورودی", f"لطفاً تاریخ، زمان و تکرارهای معتبر وارد کنید. خطا در سطر(های): {', '.join(map(str, invalid_rows))}")
             return
 
-        with open(json_path, "w", encoding='utf-8') as jsonfile:
-            json.dump(valid_rows, jsonfile, ensure_ascii=False, indent=4)
+        # Journals only the rows that were added, changed or removed, merged with changes made meanwhile
+        deadline_store.apply_changes(upserts, deleted_ids, bases=originals)
 
         popup.destroy()
         refresh_deadlines_display() # Call the full refresh after saving
 
-
-    # Load initial data from JSON to populate the popup
-    try:
-        with open(get_persistent_path(), 'r', encoding='utf-8') as jsonfile:
-            data = json.load(jsonfile)
-            for row in data:
-                add_row(row.get('course', ''), row.get('deadline_shamsi', ''), row.get('deadline_time', '00:00'))
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
+    # Paging
+    page_frame = tk.Frame(popup)
+    page_frame.pack(pady=(5, 0))
+    next_btn = tk.Button(page_frame, text="بعدی >", font=vazir_font, command=lambda: go_to_page(page[0] + 1))
+    next_btn.pack(side="right", padx=5)
+    page_label = tk.Label(page_frame, text="", font=vazir_font)
+    page_label.pack(side="right", padx=5)
+    prev_btn = tk.Button(page_frame, text="< قبلی", font=vazir_font, command=lambda: go_to_page(page[0] - 1))
+    prev_btn.pack(side="right", padx=5)
 
     # Buttons
     btn_frame = tk.Frame(popup)
@@ -353,205 +504,148 @@ def manage_deadlines_popup():
     tk.Button(btn_frame, text="➕ ددلاین جدید", font=vazir_font, command=add_row).pack(side="right", padx=5)
     tk.Button(btn_frame, text="💾 ذخیره همه", font=vazir_font, command=save_all).pack(side="right", padx=5)
 
+    render_page()
 
-def load_deadlines(file_path):
-    deadlines = []
-    now = jdatetime.datetime.now()
-
-    if not os.path.exists(file_path): return []
-
-    with open(file_path, 'r', encoding='utf-8') as jsonfile:
-        try:
-            data = json.load(jsonfile)
-        except json.JSONDecodeError:
-            data = []
-    for row in data:
-        try:
-            course = row['course']
-            shamsi_date = row['deadline_shamsi']
-            time_str = row.get('deadline_time', '00:00:00')
-            is_checked = bool(int(row.get('checked', '0')))
-
-            deadline_dt = jdatetime.datetime.strptime(shamsi_date + " " + time_str, "%Y-%m-%d %H:%M:%S")
-            delta = deadline_dt - now
-            total_seconds = int(delta.total_seconds())
-
-            total_range = (deadline_dt - jdatetime.datetime(now.year, now.month, now.day)).total_seconds()
-            passed = total_range - total_seconds
-            progress = max(0, min(100, int((passed / total_range) * 100))) if total_range > 0 else 100
-
-            if total_seconds < 0:
-                countdown_text = "پایان یافته"
-                deadlines.append((course, shamsi_date, countdown_text, 0, True, progress, is_checked))
-            else:
-                days = total_seconds // 86400
-                hours = (total_seconds % 86400) // 3600
-                minutes = (total_seconds % 3600) // 60
-                seconds = total_seconds % 60
-                countdown_text = f"{days}:{hours:02d}:{minutes:02d}:{seconds:02d}"
-                deadlines.append((course, shamsi_date, countdown_text, days, False, progress, is_checked))
-        except Exception as e:
-            print(f"Error parsing row: {row} - {e}")
-    return deadlines
-
-def toggle_deadline_checked(course_name, checked_var):
-    json_path = get_persistent_path()
-    data = []
-    try:
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
-
-    for item in data:
-        if item.get('course') == course_name:
-            item['checked'] = '1' if checked_var.get() else '0'
-            break
-
-    with open(json_path, 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
-
-    refresh_deadlines_display() # Call the full refresh for immediate visual update
 
+def toggle_deadline_checked(deadline_id, checked):
+    deadline_store.set_checked(deadline_id, checked) # Appends one small journal record
 
-def get_color_tag(days, is_checked):
-    if is_checked:
-        return "lightgrey"
-    if days > 14: return "green"
-    elif days > 12: return "lightgreen"
-    elif days > 10: return "yellowgreen"
-    elif days > 8: return "yellow"
-    elif days > 6: return "gold"
-    elif days > 4: return "orange"
-    elif days > 2: return "orangered"
-    else: return "red"
+    refresh_deadlines_display() # Moves just this row, for an immediate visual update
 
 
 def refresh_deadlines_display():
     """
-    Renders all deadlines from scratch. Call this when deadlines are added, removed, or changed.
-    This replaces the 'destroy all and redraw' part of the old update_table.
+    Puts the deadlines in display order and re-binds the rows in view. Call this when deadlines
+    are added, removed, or changed. Only the changed ids are moved (see CountdownTicker.sync_keys)
+    and no widgets are destroyed; the list recycles its pooled rows.
     """
-    global rendered_deadline_items
-    
-    # Clear existing widgets from the main frame
-    for widget in frame.winfo_children():
-        widget.destroy()
-    rendered_deadline_items = {} # Reset the dictionary
-
-    json_path = get_persistent_path()
-    deadlines = load_deadlines(json_path)
-    deadlines.sort(key=lambda x: (x[6], x[3])) # Sort by checked then by days remaining
-
-    for course, shamsi, countdown_text, days, expired, progress, is_checked in deadlines:
-        # Create a new frame for each deadline item
-        item_frame = tk.Frame(frame)
-        item_frame.pack(fill='x', padx=10, pady=2)
-
-        checked_var = tk.BooleanVar(value=is_checked)
-        tag_color = get_color_tag(days, is_checked)
-        item_frame.config(bg=tag_color)
-
-        # Checkbox
-        chk = tk.Checkbutton(item_frame, variable=checked_var, bg=tag_color,
-                             command=lambda c=course, v=checked_var: toggle_deadline_checked(c, v))
-        if expired:
-            chk.config(state="disabled")
-        chk.pack(side="left", padx=(0, 5))
-
-        # Label for deadline text
-        label_text = f"{countdown_text} | {shamsi} | {course}"
-        label = tk.Label(item_frame, text=label_text, font=vazir_font, bg=tag_color, anchor='w')
-        if expired or is_checked:
-            label.config(fg="gray", font=strikethrough_font)
-        label.pack(side="left", fill='x', expand=True)
-
-        # Progress Bar (under the item_frame, but in its own small frame for packing)
-        pb_frame = tk.Frame(frame)
-        pb_frame.pack(fill='x', padx=10, pady=(0, 5))
-        pb = ttk.Progressbar(pb_frame, orient="horizontal", length=350, mode="determinate", value=progress)
-        pb.pack(fill='x')
-
-        # Store references for later update
-        rendered_deadline_items[course] = {
-            'item_frame': item_frame,
-            'label': label,
-            'progressbar': pb,
-            'checkbox_var': checked_var,
-            'checkbox': chk,
-            'pb_frame': pb_frame,
-            'current_days': days,
-            'is_expired': expired,
-            'is_checked': is_checked
-        }
+    countdown_engine.sync(deadline_store)
+    countdown_ticker.sync_keys(deadline_store, deadline_list)
 
     adjust_root_height()
+    if profiler.leak_tracker is not None:
+        profiler.leak_tracker.redraw()
     # DO NOT call root.after(1000, ...) here. This function is for full redraws.
+    # Just ask the tick loop to re-plan, since new rows may need a sooner wake-up.
+    wake_countdown_display()
+
+
+def paint_bound_row(deadline_id, item_widgets):
+    """Called by the list when a pooled row gets bound to `deadline_id`."""
+    now = clock()
+    apply_row_state(deadline_id, item_widgets, now, local_midnight(now))
+
+
+def apply_row_state(deadline_id, item_widgets, now, midnight):
+    """Repaints a single rendered row from the engine's state at `now`."""
+    # The renderer only restyles (color, font, checkbox) when that part of the state changed
+    countdown_ticker.paint(deadline_list, deadline_id, item_widgets, now, midnight)
+
+
+def fit_height_to_rows():
+    """Resizes the window if deadlines were added or removed since the last re-sort."""
+    if len(deadline_list.keys) != len(countdown_engine):
+        adjust_root_height()
 
 
 def update_countdown_display():
     """
-    Updates the countdown, progress bar, and color for existing deadlines without re-drawing all widgets.
-    This function is called every second.
+    Repaints the rows whose visible state changed and schedules the next wake-up.
+    Rows in view tick every second while they are within a day of their deadline and
+    once a minute otherwise; color changes and expiry come from the planner's heap.
     """
-    now = jdatetime.datetime.now()
-    
-    # It's better to reload the data to ensure we reflect any changes that might have occurred
-    # (e.g., direct file edits, or if a deadline just expired).
-    json_path = get_persistent_path()
-    current_deadlines_data = load_deadlines(json_path) # Reload all data
-    current_deadlines_map = {d[0]: d for d in current_deadlines_data} # Map for quick lookup
-
-    # Iterate through the currently rendered items
-    # Check for items that might have been removed from the file (will be handled by full refresh)
-    # Update existing items
-    for course, item_widgets in list(rendered_deadline_items.items()): # Use list() to allow deletion during iteration
-        if course in current_deadlines_map:
-            # Unpack the specific deadline data from the current file load
-            _, shamsi, countdown_text, days, expired, progress, is_checked = current_deadlines_map[course]
-
-            # Update label text
-            item_widgets['label'].config(text=f"{countdown_text} | {shamsi} | {course}")
-
-            # Update progress bar
-            item_widgets['progressbar']["value"] = progress
-
-            # Update color and font if status has changed (e.g., expired, or days crossed a threshold)
-            # This avoids re-configuring if not needed, improving performance.
-            if (item_widgets['current_days'] != days or 
-                item_widgets['is_checked'] != is_checked or 
-                item_widgets['is_expired'] != expired):
-
-                tag_color = get_color_tag(days, is_checked)
-                item_widgets['item_frame'].config(bg=tag_color)
-                
-                if expired or is_checked:
-                    item_widgets['label'].config(fg="gray", font=strikethrough_font)
-                    if expired: item_widgets['checkbox'].config(state="disabled")
-                else:
-                    item_widgets['label'].config(fg="black", font=vazir_font)
-                    item_widgets['checkbox'].config(state="normal")
-                
-                # Update stored state
-                item_widgets['current_days'] = days
-                item_widgets['is_checked'] = is_checked
-                item_widgets['is_expired'] = expired
-            
-            # Ensure checkbox variable is synced in case of external change (e.g., direct file edit)
-            item_widgets['checkbox_var'].set(is_checked)
+    global countdown_after_id, countdown_planned_at
+    countdown_after_id = None
+    now = clock()
+    if profiler.enabled and countdown_planned_at is not None:
+        profiler.record_tick(countdown_planned_at, now)
+
+    # The store picks up direct file edits via a cheap stat check; nothing is re-read
+    # or re-parsed unless deadlines.json actually changed.
+    countdown_engine.sync(deadline_store)
+    notification_scheduler.sync(deadline_store) # Only reschedules rows whose due time or check changed
+    show_pending_alerts()
+    # Re-sorts and re-binds if the data changed underneath us (e.g., a direct file edit),
+    # then repaints the rows in view whose state changed. Shared with benchmark.py soak.
+    wake_at = countdown_ticker.step(deadline_store, deadline_list, now, on_resort=fit_height_to_rows)
+
+    # Delay is measured to the next wall-clock second boundary, so ticks do not drift
+    delay = delay_ms(clock(), wake_at)
+    countdown_planned_at = clock() + delay / 1000
+    countdown_after_id = root.after(delay, update_countdown_display)
+
+
+def show_pending_alerts():
+    """Shows alerts the notification thread queued. The planner wakes at the same transitions, so they show up on time."""
+    while True:
+        try:
+            title, message = pending_alerts.get_nowait()
+        except queue.Empty:
+            return
+        root.bell()
+        if not desktop_notify(title, message):
+            show_alert_popup(title, message)
 
-        else:
-            # This deadline no longer exists in the data, remove it from display
-            item_widgets['item_frame'].destroy()
-            item_widgets['pb_frame'].destroy()
-            del rendered_deadline_items[course]
-            adjust_root_height() # Adjust height if an item is removed
 
-    # If the order of deadlines changed significantly, we might need a full refresh
-    # This is a trade-off. For now, simple periodic updates are done without full redraw.
-    # If a deadline is added/removed, refresh_deadlines_display() will be called.
+def show_alert_popup(title, message):
+    """A small always-on-top note next to the main window that closes itself."""
+    popup = tk.Toplevel(root)
+    popup.title(title)
+    popup.attributes("-topmost", True)
+    popup.geometry(f"+{max(0, x - 330)}+{y}")
+    tk.Label(popup, text=message, font=vazir_font, wraplength=300, justify="right", padx=15, pady=15).pack()
+    close_id = popup.after(10000, popup.destroy)
+
+    def close_now():
+        popup.after_cancel(close_id) # Closed by hand: drop the timer and the callback it holds
+        popup.destroy()
+
+    popup.protocol("WM_DELETE_WINDOW", close_now)
 
-    root.after(1000, update_countdown_display) # Schedule the next update
+
+def wake_countdown_display():
+    """Runs the countdown update as soon as Tk is idle instead of waiting for the planned wake-up."""
+    global countdown_after_id, countdown_planned_at
+    if countdown_after_id is not None:
+        root.after_cancel(countdown_after_id)
+    countdown_planned_at = None # Not a planned wake-up, so it cannot be late
+    countdown_after_id = root.after_idle(update_countdown_display)
+
+
+# --- Command line ---
+def parse_args():
+    parser = argparse.ArgumentParser(description="Deadline countdown")
+    parser.add_argument("--renderer", choices=RENDERERS,
+                        default=os.environ.get("DEADLINE_RENDERER", "widgets"),
+                        help="how the main window draws deadlines: one widget set per row, or items on a single canvas")
+    add_storage_arguments(parser)
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print the time from launch to the first painted deadline list, then exit")
+    profiler.add_profile_argument(parser)
+    args, _ = parser.parse_known_args()
+    return args
+
+args = parse_args()
+
+if profiler.requested(args):
+    # Wrapped before any widget or timer holds a reference to these functions
+    profiler.enable()
+    profiler.instrument_core()
+    profiler.instrument(sys.modules[__name__], ["refresh_deadlines_display", "update_countdown_display",
+                                                "adjust_root_height"], "main")
+    profiler.instrument(NotebookWindow, ["save_note", "load_note_for_date"], "NotebookWindow")
+
+
+# --- Data store ---
+# Single in-process copy of deadlines.json shared by every reader below
+deadline_store = open_deadline_store(fsync_policy=args.fsync, clock=clock)
+countdown_engine = CountdownEngine()
+countdown_ticker = CountdownTicker(countdown_engine, clock=clock)
+
+# Threshold and expiry alerts come from a background thread; the Tk thread shows them
+pending_alerts = queue.Queue()
+notification_scheduler = NotificationScheduler(lambda title, message: pending_alerts.put((title, message)),
+                                               clock=clock).start()
 
 
 # --- Root setup ---
@@ -578,10 +672,21 @@ container.pack(fill="both", expand=True, side="top")
 
 canvas = tk.Canvas(container)
 scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-frame = tk.Frame(canvas)
-canvas.create_window((0, 0), window=frame, anchor="nw")
-canvas.configure(yscrollcommand=scrollbar.set)
-frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+
+_last_scroll_position = None
+
+def _on_canvas_scroll(first, last):
+    global _last_scroll_position
+    scrollbar.set(first, last)
+    # Tk also calls this on every geometry change; only an actual scroll needs a repaint
+    if (first, last) != _last_scroll_position:
+        _last_scroll_position = (first, last)
+        deadline_list.rebind() # Recycle the pooled rows for the new viewport
+        wake_countdown_display()
+
+canvas.configure(yscrollcommand=_on_canvas_scroll)
+deadline_list = create_deadline_list(args.renderer, canvas, vazir_font, strikethrough_font, rendered_deadline_items,
+                                     on_bind=paint_bound_row, on_toggle=toggle_deadline_checked)
 canvas.pack(side="left", fill="both", expand=True)
 scrollbar.pack(side="right", fill="y")
 
@@ -590,6 +695,71 @@ def _on_mousewheel(event):
 canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
 
+# --- Bulk import / export ---
+
+DEADLINE_FILE_TYPES = [("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("iCalendar", "*.ics")]
+IMPORT_ERRORS_SHOWN = 10 # Invalid lines listed with their reason after an import
+
+def import_deadlines_dialog():
+    path = filedialog.askopenfilename(parent=root, title="ورود ددلاین‌ها از فایل", filetypes=DEADLINE_FILE_TYPES)
+    if not path:
+        return
+    report = ImportReport()
+    try:
+        known_keys = {row_key(row) for row in deadline_store.get_rows()}
+        batches = import_batches(path, report, known_keys=known_keys)
+    except ValueError as e:
+        messagebox.showerror("خطا", str(e))
+        return
+    import_button.config(state="disabled")
+    save_status_label.config(text="Importing…")
+    root.after_idle(import_next_batch, path, batches, report)
+
+def import_next_batch(path, batches, report):
+    """Commits one batch per event loop turn so the window stays responsive during large imports."""
+    try:
+        batch = next(batches, None)
+    except (OSError, UnicodeDecodeError) as e:
+        batch = None
+        report.errors.append((None, str(e)))
+    if batch is not None:
+        deadline_store.add_many(batch)
+        report.added += len(batch)
+        save_status_label.config(text=f"Importing… {report.added} rows")
+        root.after_idle(import_next_batch, path, batches, report)
+        return
+
+    import_button.config(state="normal")
+    refresh_deadlines_display()
+    message = f"{report.added} ددلاین اضافه شد."
+    if report.duplicates:
+        message += f"\n{report.duplicates} ددلاین تکراری نادیده گرفته شد."
+    if report.errors:
+        # The window has no console, so the reasons go in the message itself
+        message += f"\n{len(report.errors)} سطر نامعتبر بود:"
+        for line_number, reason in report.errors[:IMPORT_ERRORS_SHOWN]:
+            message += f"\n  سطر {line_number}: {reason}" if line_number is not None else f"\n  {reason}"
+        if len(report.errors) > IMPORT_ERRORS_SHOWN:
+            message += "\n  …"
+    messagebox.showinfo("ورود ددلاین‌ها", message)
+
+def export_deadlines_dialog():
+    path = filedialog.asksaveasfilename(parent=root, title="خروجی ددلاین‌ها", defaultextension=".csv",
+                                        filetypes=DEADLINE_FILE_TYPES)
+    if not path:
+        return
+    rows = [dict(row) for row in deadline_store.get_rows()] # The worker writes a copy the UI cannot change
+    save_status_label.config(text="Exporting…")
+    io_worker.submit(("export", path), lambda: export_deadlines(rows, path),
+                     on_done=lambda error: on_deadlines_exported(path, error))
+
+def on_deadlines_exported(path, error):
+    if error is None:
+        save_status_label.config(text=f"Exported to {os.path.basename(path)}")
+    else:
+        save_status_label.config(text=f"Error exporting: {error}")
+
+
 # --- Buttons Frame ---
 buttons_frame = tk.Frame(root)
 buttons_frame.pack(side="bottom", pady=5, fill="x")
@@ -602,6 +772,12 @@ edit_button.pack(side="right", padx=10)
 notebook_button = tk.Button(buttons_frame, text="یادداشت‌ها", command=open_notebook, font=vazir_font)
 notebook_button.pack(side="left", padx=10)
 
+# Bulk import / export buttons
+import_button = tk.Button(buttons_frame, text="📥", command=import_deadlines_dialog, font=vazir_font)
+import_button.pack(side="left")
+export_button = tk.Button(buttons_frame, text="📤", command=export_deadlines_dialog, font=vazir_font)
+export_button.pack(side="left", padx=5)
+
 footer_label = tk.Label(
     root,
     text="Built by Yaser. Caffeine levels: dangerously high.",
@@ -611,6 +787,127 @@ footer_label = tk.Label(
 )
 footer_label.pack(side="bottom", fill="x", pady=5)
 
+# Small status line for background saves of the deadline list
+save_status_label = tk.Label(root, text="", font=("Vazir", 8), fg="grey")
+save_status_label.pack(side="bottom", fill="x", padx=10)
+
+
+# --- Background writes ---
+# Every file write runs on one worker thread so a slow disk never freezes the window
+io_worker = IOWorker(root)
+
+def on_deadlines_saved(error):
+    if io_worker.busy():
+        return # More saves are still queued
+    if error is None:
+        save_status_label.config(text=f"Saved at {datetime.datetime.now().strftime('%H:%M:%S')}")
+    else:
+        save_status_label.config(text=f"Error saving: {error}")
+
+def submit_deadline_write(key, func):
+    save_status_label.config(text="Saving…")
+    io_worker.submit(key, func, on_done=on_deadlines_saved)
+
+deadline_store.writer = submit_deadline_write
+
+def close_profile_overlay():
+    global profile_overlay
+    overlay, profile_overlay = profile_overlay, None
+    overlay.after_cancel(overlay.refresh_id) # So no refresh is left pointing at the destroyed labels
+    overlay.destroy()
+
+def toggle_profile_overlay(event=None):
+    """F12 with --profile: a small always-on-top window with the live timings."""
+    global profile_overlay
+    if profile_overlay is not None:
+        close_profile_overlay()
+        return
+    overlay = profile_overlay = tk.Toplevel(root)
+    overlay.title("Profile")
+    overlay.attributes("-topmost", True)
+    text = tk.Label(overlay, font=("Courier", 9), justify="left", anchor="nw")
+    text.pack(fill="both", expand=True, padx=5, pady=5)
+    memory_lines = []
+
+    def take_memory_snapshot():
+        memory_lines[:] = profiler.memory_snapshot() or ["tracemalloc started; press again to see what grew"]
+
+    def save_profile():
+        path = profiler.dump(get_persistent_path("profile.json"))
+        memory_lines[:] = [f"Saved to {path}"]
+
+    buttons = tk.Frame(overlay)
+    buttons.pack(fill="x")
+    tk.Button(buttons, text="Memory", command=take_memory_snapshot).pack(side="left", padx=5, pady=5)
+    tk.Button(buttons, text="Save", command=save_profile).pack(side="left", padx=5, pady=5)
+
+    def refresh_overlay():
+        text.config(text="\n".join(profiler.format_lines() + memory_lines))
+        overlay.refresh_id = overlay.after(1000, refresh_overlay)
+
+    overlay.protocol("WM_DELETE_WINDOW", close_profile_overlay)
+    refresh_overlay()
+
+
+def sample_leaks():
+    """With --profile: counts live widgets, callbacks and objects every few minutes, redraws or not."""
+    profiler.leak_tracker.maybe_sample()
+    root.after(profiler.LEAK_SAMPLE_SECONDS * 1000, sample_leaks)
+
+
+profile_overlay = None
+if profiler.enabled:
+    root.bind("<F12>", toggle_profile_overlay)
+    profiler.track_leaks(root)
+    root.after(profiler.LEAK_SAMPLE_SECONDS * 1000, sample_leaks)
+
+
+# --- Requests from later launches (see single_instance) ---
+instance_requests = queue.Queue()
+instance_server = None
+
+def on_instance_request(message):
+    """Runs on the server thread: checks the request and passes it to the Tk thread."""
+    op = message.get("op")
+    if op == "add":
+        try:
+            message["rows"] = [normalize_row(raw) for raw in message.get("rows") or ()]
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+    elif op != "show":
+        return {"ok": False, "error": f"unknown op {op!r}"}
+    instance_requests.put(message)
+    root.event_generate("<<InstanceRequest>>", when="tail") # Tkinter passes this over to the Tk thread
+    return {"ok": True, "added": len(message.get("rows") or ())}
+
+def handle_instance_requests(event=None):
+    while True:
+        try:
+            message = instance_requests.get_nowait()
+        except queue.Empty:
+            break
+        if message["op"] == "add":
+            deadline_store.add_many(message["rows"]) # Written through the store's journal like an edit here
+        else:
+            root.deiconify()
+            root.lift()
+            root.focus_force()
+            deadline_store.refresh()
+    refresh_deadlines_display()
+
+root.bind("<<InstanceRequest>>", handle_instance_requests)
+
+
+def on_root_close():
+    if instance_server is not None:
+        instance_server.close()
+    io_worker.flush(timeout=5) # Let queued saves reach the disk before exiting
+    if profiler.enabled:
+        print(f"Profile written to {profiler.dump(get_persistent_path('profile.json'))}")
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_root_close)
+
 
 
 
@@ -618,7 +915,13 @@ footer_label.pack(side="bottom", fill="x", pady=5)
 
 
 if __name__ == "__main__":
-    refresh_deadlines_display() # Initial draw of all deadlines
-    update_countdown_display() # Start the continuous countdown updates
-    add_to_startup()
-    root.mainloop()
\ No newline at end of file
+    refresh_deadlines_display() # Initial draw of all deadlines, also starts the countdown ticks
+    if args.measure_startup:
+        root.update() # Run the first countdown pass and let Tk draw it
+        print(f"First paint after {(time.perf_counter() - STARTUP_T0) * 1000:.1f} ms")
+        on_root_close()
+    else:
+        add_to_startup()
+        if instance_lock is not None:
+            instance_server = single_instance.InstanceServer(app_data_dir(), on_instance_request)
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import queue
+import threading
+from collections import OrderedDict
+
+
+POLL_MS = 50  # How often the Tk thread collects finished writes while any are outstanding
+
+
+class IOWorker:
+    """
+    A single background thread that performs file writes for the Tk UI.
+
+    Requests are queued with a key (usually the file being written). A newer request
+    with the same key replaces an older one that has not started yet, so a burst of
+    saves to one file becomes a single write. Requests with different keys run in the
+    order they were submitted.
+
+    Completion callbacks run on the Tk thread: the worker hands results over through
+    a queue that the Tk thread drains with `after` while writes are outstanding.
+    """
+
+    def __init__(self, tk_root):
+        self.root = tk_root
+        self._pending = OrderedDict()  # key -> [func, callbacks]
+        self._cond = threading.Condition()
+        self._done = queue.Queue()
+        self._outstanding = 0
+        self._polling = False
+        self._thread = threading.Thread(target=self._run, name="io-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, func, on_done=None):
+        """
+        Queues func() to run on the worker thread. Must be called from the Tk thread.
+        on_done(error) is later called on the Tk thread, with error None on success.
+        """
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [func, [on_done] if on_done else []]
+                self._outstanding += 1
+            else:
+                # Not started yet: only the newest write matters, but everyone still hears back
+                entry[0] = func
+                if on_done:
+                    entry[1].append(on_done)
+            self._cond.notify()
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def busy(self):
+        with self._cond:
+            return self._outstanding > 0
+
+    def flush(self, timeout=None):
+        """Blocks until every queued write has finished (used on shutdown)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._outstanding == 0, timeout)
+        self._poll()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                key, (func, callbacks) = self._pending.popitem(last=False)
+
+            error = None
+            try:
+                func()
+            except Exception as e:
+                error = e
+                print(f"Background write failed for {key}: {e}")
+            self._done.put((callbacks, error))
+
+            with self._cond:
+                self._outstanding -= 1
+                self._cond.notify_all()
+
+    def _poll(self):
+        while True:
+            try:
+                callbacks, error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            for callback in callbacks:
+                callback(error)
+
+        if self.busy() or not self._done.empty():
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,157 @@
+"""
+Integer Jalali (Shamsi) calendar arithmetic without jdatetime objects.
+
+Dates are plain (year, month, day) ints and days are counted from 1970-01-01
+("epoch days"), so converting, validating and stepping through dates is a few
+table lookups. Leap years follow the same 33-year rule as jdatetime, and the
+first day of every year in the datepicker's range (1300-1500) is precomputed.
+Years outside that range use the same rule in closed form.
+"""
+import datetime
+import time
+from bisect import bisect_right
+
+
+MIN_YEAR = 1300
+MAX_YEAR = 1500
+
+_LEAP_REMAINDERS = (1, 5, 9, 13, 17, 22, 26, 30)  # year % 33 of leap years (as in jdatetime)
+_MONTH_STARTS = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336)  # Day of year before each month
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+_FARVARDIN_1300 = datetime.date(1921, 3, 21).toordinal() - _EPOCH_ORDINAL  # Epoch day of 1300-01-01
+_WEEKDAY_OFFSET = 5  # 1970-01-01 was a Thursday; weekday() counts from Saturday = 0 like jdatetime
+
+
+def _leaps_before(year):
+    """Number of leap years in [1, year)."""
+    cycles, rest = divmod(year - 1, 33)
+    return cycles * 8 + sum(1 for r in _LEAP_REMAINDERS if r <= rest)
+
+
+def _year_start(year):
+    """Epoch day of 1 Farvardin of `year`, from the leap rule alone."""
+    return (_FARVARDIN_1300 + 365 * (year - MIN_YEAR)
+            + _leaps_before(year) - _leaps_before(MIN_YEAR))
+
+
+# --- Precomputed tables for MIN_YEAR..MAX_YEAR ---
+
+LEAP_YEARS = frozenset(y for y in range(MIN_YEAR, MAX_YEAR + 1) if y % 33 in _LEAP_REMAINDERS)
+YEAR_STARTS = tuple(_year_start(y) for y in range(MIN_YEAR, MAX_YEAR + 2))  # One extra: end of MAX_YEAR
+
+
+def is_leap(year):
+    if MIN_YEAR <= year <= MAX_YEAR:
+        return year in LEAP_YEARS
+    return year % 33 in _LEAP_REMAINDERS
+
+
+def month_length(year, month):
+    if month <= 6:
+        return 31
+    if month <= 11:
+        return 30
+    return 30 if is_leap(year) else 29
+
+
+def is_valid(year, month, day):
+    return year >= 1 and 1 <= month <= 12 and 1 <= day <= month_length(year, month)
+
+
+def to_epoch_day(year, month, day):
+    """Days from 1970-01-01 to the given Jalali date. Raises ValueError for invalid dates."""
+    if not is_valid(year, month, day):
+        raise ValueError(f"invalid Jalali date {year}-{month}-{day}")
+    if MIN_YEAR <= year <= MAX_YEAR:
+        start = YEAR_STARTS[year - MIN_YEAR]
+    else:
+        start = _year_start(year)
+    return start + _MONTH_STARTS[month - 1] + day - 1
+
+
+def from_epoch_day(epoch_day):
+    """Inverse of to_epoch_day: returns (year, month, day)."""
+    if YEAR_STARTS[0] <= epoch_day < YEAR_STARTS[-1]:
+        i = bisect_right(YEAR_STARTS, epoch_day) - 1
+        year, day_of_year = MIN_YEAR + i, epoch_day - YEAR_STARTS[i]
+    else:
+        year = MIN_YEAR + int((epoch_day - _FARVARDIN_1300) // 365.2424)
+        while _year_start(year) > epoch_day:
+            year -= 1
+        while _year_start(year + 1) <= epoch_day:
+            year += 1
+        day_of_year = epoch_day - _year_start(year)
+
+    if day_of_year < 186:
+        return year, day_of_year // 31 + 1, day_of_year % 31 + 1
+    day_of_year -= 186
+    return year, day_of_year // 30 + 7, day_of_year % 30 + 1
+
+
+def weekday(year, month, day):
+    """0 = Saturday ... 6 = Friday, like jdatetime.date.weekday()."""
+    return (to_epoch_day(year, month, day) + _WEEKDAY_OFFSET) % 7
+
+
+def add_days(year, month, day, days):
+    return from_epoch_day(to_epoch_day(year, month, day) + days)
+
+
+def to_gregorian(year, month, day):
+    return datetime.date.fromordinal(to_epoch_day(year, month, day) + _EPOCH_ORDINAL)
+
+
+def from_gregorian(date):
+    return from_epoch_day(date.toordinal() - _EPOCH_ORDINAL)
+
+
+def today():
+    return from_gregorian(datetime.date.today())
+
+
+def today_epoch_day():
+    return datetime.date.today().toordinal() - _EPOCH_ORDINAL
+
+
+def epoch_day(timestamp):
+    """Epoch day of the local date at `timestamp` (epoch seconds)."""
+    return datetime.date.fromtimestamp(timestamp).toordinal() - _EPOCH_ORDINAL
+
+
+def format_date(year, month, day):
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def day_string(epoch_day):
+    """'YYYY-MM-DD' of an epoch day, the key format used for notes."""
+    return format_date(*from_epoch_day(epoch_day))
+
+
+# --- Parsing ---
+
+def parse_date(date_str):
+    """Parses 'YYYY-MM-DD' into (year, month, day). Raises ValueError if it is not a valid date."""
+    parts = date_str.split('-')
+    if len(parts) != 3:
+        raise ValueError(f"not a YYYY-MM-DD date: {date_str!r}")
+    year, month, day = map(int, parts)
+    if not is_valid(year, month, day):
+        raise ValueError(f"invalid Jalali date {date_str!r}")
+    return year, month, day
+
+
+def parse_time(time_str):
+    """Parses 'HH:MM:SS' into (hour, minute, second). Raises ValueError if out of range."""
+    parts = time_str.split(':')
+    if len(parts) != 3:
+        raise ValueError(f"not a HH:MM:SS time: {time_str!r}")
+    hour, minute, second = map(int, parts)
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError(f"invalid time {time_str!r}")
+    return hour, minute, second
+
+
+def to_timestamp(year, month, day, hour=0, minute=0, second=0):
+    """Epoch seconds of a naive local Jalali date and time."""
+    g = to_gregorian(year, month, day)
+    return time.mktime((g.year, g.month, g.day, hour, minute, second, 0, 0, -1))
@@ -0,0 +1,143 @@
+"""
+Full-text search over the daily notes.
+
+Text is normalized for Persian before tokenizing: Arabic ي/ى/ك become Persian ی/ک,
+zero-width non-joiners, tatweel and short-vowel marks are dropped, and Persian/Arabic
+digits become ASCII. The inverted index (token -> days) lives in memory. Each day's
+token list is also persisted in a small SQLite file next to the notes, so startup
+rebuilds the postings without re-tokenizing every note.
+"""
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+
+
+_CHAR_MAP = str.maketrans({
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # Alef maksura -> Persian yeh
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u0629": "\u0647",  # Teh marbuta -> heh
+    "\u200c": None,       # Zero-width non-joiner
+    "\u200f": None,       # Right-to-left mark
+    "\u0640": None,       # Tatweel
+    **{chr(c): None for c in range(0x064B, 0x0653)},  # Short vowel marks (harakat)
+    **{chr(0x06F0 + d): str(d) for d in range(10)},   # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},   # Arabic-Indic digits
+})
+_TOKEN_RE = re.compile(r"\w+")
+
+MAX_RESULTS = 200
+
+
+def normalize(text):
+    return text.translate(_CHAR_MAP).casefold()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class NotesIndex:
+    """
+    Inverted index over daily notes, updated one day at a time.
+    Queries match days containing every query word; the last word also matches as a
+    prefix so results show up while typing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.postings = {}  # token -> set of date strings
+        self.doc_tokens = {}  # date string -> frozenset of tokens
+        self._vocabulary = None  # Sorted tokens for prefix lookups, rebuilt lazily after changes
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS doc_tokens (day TEXT PRIMARY KEY, tokens TEXT NOT NULL)")
+            rows = self._conn.execute("SELECT day, tokens FROM doc_tokens").fetchall()
+        for day, tokens in rows:
+            self._add(day, frozenset(tokens.split()))
+
+    def __len__(self):
+        return len(self.doc_tokens)
+
+    def _add(self, day, tokens):
+        self.doc_tokens[day] = tokens
+        for token in tokens:
+            days = self.postings.get(token)
+            if days is None:
+                days = self.postings[token] = set()
+                self._vocabulary = None
+            days.add(day)
+
+    def _remove(self, day):
+        for token in self.doc_tokens.pop(day, ()):
+            days = self.postings.get(token)
+            if days is not None:
+                days.discard(day)
+                if not days:
+                    del self.postings[token]
+                    self._vocabulary = None
+
+    def update(self, day, text):
+        """
+        Re-indexes one day in memory and returns a function that persists it.
+        The returned function does the disk write and is meant for the I/O worker.
+        """
+        tokens = frozenset(tokenize(text))
+        self._remove(day)
+        if tokens:
+            self._add(day, tokens)
+        joined = " ".join(sorted(tokens))
+        return lambda: self._persist(day, joined)
+
+    def _persist(self, day, joined):
+        with self._lock, self._conn:
+            if joined:
+                self._conn.execute("INSERT OR REPLACE INTO doc_tokens (day, tokens) VALUES (?, ?)", (day, joined))
+            else:
+                self._conn.execute("DELETE FROM doc_tokens WHERE day = ?", (day,))
+
+    def rebuild(self, notes):
+        """Indexes every (day, text) pair from scratch, e.g. the first time search is used."""
+        self.postings = {}
+        self.doc_tokens = {}
+        self._vocabulary = None
+        rows = []
+        for day, text in notes:
+            tokens = frozenset(tokenize(text))
+            if tokens:
+                self._add(day, tokens)
+                rows.append((day, " ".join(sorted(tokens))))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM doc_tokens")
+            self._conn.executemany("INSERT INTO doc_tokens (day, tokens) VALUES (?, ?)", rows)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Returns matching date strings, newest first."""
+        words = tokenize(query)
+        if not words:
+            return []
+
+        *exact, last = words
+        matches = None
+        for word in exact:
+            days = self.postings.get(word, set())
+            matches = set(days) if matches is None else matches & days
+            if not matches:
+                return []
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        prefix_days = set()
+        i = bisect_left(vocabulary, last)
+        while i < len(vocabulary) and vocabulary[i].startswith(last):
+            prefix_days |= self.postings[vocabulary[i]]
+            i += 1
+        matches = prefix_days if matches is None else matches & prefix_days
+        return sorted(matches, reverse=True)[:limit]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
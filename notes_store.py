@@ -0,0 +1,254 @@
+"""
+Storage backends for the daily notebook.
+
+Both backends read and write a single day without touching the rest of the notes:
+  * SQLiteNotesStore keeps every note in one stdlib sqlite3 database.
+  * ShardedNotesStore keeps one small JSON file per month (notes/1404-03.json).
+
+open_notes_store() picks a backend and imports the old single-file notes.json once.
+NoteCache sits in front of either backend for fast day-to-day navigation.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from safe_files import FileLock, atomic_write_json, keep_damaged_copy, remove_stale_temp_files
+
+
+NOTES_BACKENDS = ("sqlite", "sharded")
+LEGACY_NOTES_FILE = "notes.json"
+CACHE_CAPACITY = 64  # Decoded days kept in memory
+PREFETCH_RADIUS = 7  # Days on each side of the current one loaded ahead of time
+
+
+class SQLiteNotesStore:
+    """Notes in an SQLite table keyed by date string (YYYY-MM-DD)."""
+
+    def __init__(self, path):
+        self.path = path
+        # Reads happen on the Tk thread and writes on the I/O worker, so share one guarded connection
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes = 0  # Commits on this connection, which PRAGMA data_version does not count
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS notes (day TEXT PRIMARY KEY, body TEXT NOT NULL)")
+
+    def get(self, date_str):
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM notes WHERE day = ?", (date_str,)).fetchone()
+        return row[0] if row else ""
+
+    def put(self, date_str, text):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO notes (day, body) VALUES (?, ?)", (date_str, text))
+            self._writes += 1
+
+    def put_many(self, notes):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO notes (day, body) VALUES (?, ?)", notes.items())
+            self._writes += 1
+
+    def items(self):
+        """Returns (date_str, text) for every stored note, oldest first."""
+        with self._lock:
+            return self._conn.execute("SELECT day, body FROM notes ORDER BY day").fetchall()
+
+    def version_of(self, date_str):
+        """Changes whenever anyone commits: data_version covers other connections (e.g. a second instance), _writes ours."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0], self._writes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ShardedNotesStore:
+    """
+    Notes in one JSON file per month, so a save rewrites at most 31 entries.
+    A save re-reads its month under a lock shared with other processes, so two
+    windows or scripts saving different days of one month both keep theirs.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(os.path.join(directory, ".lock"))
+        if self._file_lock.acquire(blocking=False):  # Busy: another process is saving and may own the temp files
+            try:
+                remove_stale_temp_files(directory)
+            finally:
+                self._file_lock.release()
+
+    def _shard_path(self, date_str):
+        return os.path.join(self.directory, date_str[:7] + ".json")  # YYYY-MM
+
+    def _read_shard(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _read_shard_for_update(self, path):
+        """Like _read_shard, but a month that no longer parses is copied aside before it is rewritten."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError):
+            keep_damaged_copy(path)
+            return {}
+
+    def get(self, date_str):
+        return self._read_shard(self._shard_path(date_str)).get(date_str, "")
+
+    def items(self):
+        """Yields (date_str, text) for every stored note, oldest first."""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".json"):
+                yield from sorted(self._read_shard(os.path.join(self.directory, name)).items())
+
+    def version_of(self, date_str):
+        """Stat signature of the month file holding `date_str`."""
+        try:
+            st = os.stat(self._shard_path(date_str))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def put(self, date_str, text):
+        path = self._shard_path(date_str)
+        with self._lock, self._file_lock:
+            shard = self._read_shard_for_update(path)
+            shard[date_str] = text
+            atomic_write_json(path, shard)
+
+    def put_many(self, notes):
+        shards = {}
+        for date_str, text in notes.items():
+            shards.setdefault(self._shard_path(date_str), {})[date_str] = text
+        with self._lock, self._file_lock:
+            for path, entries in shards.items():
+                shard = self._read_shard_for_update(path)
+                shard.update(entries)
+                atomic_write_json(path, shard)
+
+    def close(self):
+        pass
+
+
+class NoteCache:
+    """
+    Bounded LRU of decoded notes in front of a notes backend.
+
+    Every entry remembers the backend's version_of(day) at the time it was read, and
+    a hit is only served while that is unchanged, so edits made outside this process
+    are picked up. Neighboring days can be prefetched on a background thread; a read
+    that overlapped a write() is not cached, so it cannot replace the newer text.
+    """
+
+    def __init__(self, store, capacity=CACHE_CAPACITY):
+        self.store = store
+        self.capacity = capacity
+        self._entries = OrderedDict()  # date_str -> (text, version)
+        self._lock = threading.Lock()
+        self._writes = 0  # Bumped by every write(), so a read can tell that one happened meanwhile
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_generation = 0
+        self._prefetch_thread = None
+
+    def _remember(self, date_str, text, version, writes=None):
+        """Caches a note; with `writes` given, only if no write() finished since that count was taken."""
+        with self._lock:
+            if writes is not None and writes != self._writes:
+                return
+            self._entries[date_str] = (text, version)
+            self._entries.move_to_end(date_str)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, date_str, version):
+        with self._lock:
+            entry = self._entries.get(date_str)
+            if entry is None or entry[1] != version:
+                return None
+            self._entries.move_to_end(date_str)
+            return entry[0]
+
+    def get(self, date_str):
+        writes = self._writes
+        version = self.store.version_of(date_str)
+        text = self._lookup(date_str, version)
+        if text is None:
+            text = self.store.get(date_str)
+            self._remember(date_str, text, version, writes)
+        return text
+
+    def write(self, date_str, text):
+        """Saves a note through the backend and keeps the cached copy valid. Runs on the I/O worker."""
+        self.store.put(date_str, text)
+        version = self.store.version_of(date_str)
+        with self._lock:
+            self._writes += 1
+        self._remember(date_str, text, version)
+
+    def prefetch(self, date_strs):
+        """Loads the given days in the background. A newer request supersedes one still in progress."""
+        self._prefetch_generation += 1
+        self._prefetch_queue.put((self._prefetch_generation, list(date_strs)))
+        if self._prefetch_thread is None:
+            self._prefetch_thread = threading.Thread(target=self._run_prefetch, name="notes-prefetch", daemon=True)
+            self._prefetch_thread.start()
+
+    def _run_prefetch(self):
+        while True:
+            generation, date_strs = self._prefetch_queue.get()
+            for date_str in date_strs:
+                if generation != self._prefetch_generation:
+                    break # The user already moved on
+                try:
+                    self.get(date_str)
+                except Exception as e:
+                    print(f"Could not prefetch note for {date_str}: {e}")
+
+
+def import_legacy_notes(store, base_dir):
+    """
+    One-time import of the old single-file notes.json into `store`.
+    The old file is renamed to notes.json.imported afterwards. Returns the number of notes imported.
+    """
+    legacy_path = os.path.join(base_dir, LEGACY_NOTES_FILE)
+    if not os.path.exists(legacy_path):
+        return 0
+    try:
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            notes = json.load(f)
+    except json.JSONDecodeError:
+        notes = {} # Empty or corrupt, nothing to carry over
+    if not isinstance(notes, dict):
+        notes = {}
+
+    store.put_many({str(day): str(text) for day, text in notes.items()})
+    os.replace(legacy_path, legacy_path + ".imported")
+    return len(notes)
+
+
+def open_notes_store(base_dir, backend="sqlite"):
+    """Opens the notes backend that lives in `base_dir`, importing notes.json on first use."""
+    if backend == "sharded":
+        store = ShardedNotesStore(os.path.join(base_dir, "notes"))
+    else:
+        store = SQLiteNotesStore(os.path.join(base_dir, "notes.sqlite3"))
+    imported = import_legacy_notes(store, base_dir)
+    if imported:
+        print(f"Imported {imported} notes from {LEGACY_NOTES_FILE}")
+    return store
@@ -0,0 +1,181 @@
+"""
+Deadline alerts.
+
+NotificationScheduler runs one background thread that keeps a min-heap holding
+the next alert time of every unchecked deadline: each color threshold of
+get_color_tag, the start of the last day, and expiry (the same transitions
+tick_scheduler tracks). The thread sleeps until the earliest entry, so it costs
+nothing between alerts no matter how many deadlines there are. When deadlines
+change, only the rows whose due time or checked state changed get new entries.
+"""
+import heapq
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from tick_scheduler import next_row_transition
+
+
+ALERT_TITLE = "ددلاین"
+
+
+def alert_message(course, due, now):
+    """What to tell the user about a deadline at `now`."""
+    remaining = int(due - now)
+    if remaining < 0:
+        return f"مهلت «{course}» به پایان رسید."
+    days = remaining // 86400
+    if days == 0:
+        return f"کمتر از یک روز تا «{course}» مانده است."
+    return f"کمتر از {days + 1} روز تا «{course}» مانده است."
+
+
+def desktop_notify(title, message):
+    """Shows a desktop notification where the platform has a command for it. Returns True if one was sent."""
+    if sys.platform.startswith("linux") and shutil.which("notify-send"):
+        command = ["notify-send", title, message]
+    elif sys.platform == "darwin":
+        script = f'display notification {message!r} with title {title!r}'.replace("'", '"')
+        command = ["osascript", "-e", script]
+    else:
+        return False
+    try:
+        subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"Could not show notification: {e}")
+        return False
+    return True
+
+
+class NotificationScheduler:
+    """
+    Fires deliver(title, message) on its own thread whenever an unchecked deadline
+    crosses a color threshold or expires. Alerts missed while the machine was asleep
+    are collapsed into one alert about the current state.
+    """
+
+    def __init__(self, deliver, clock=time.time):
+        self.deliver = deliver
+        self.clock = clock
+        self.version = None  # Store version the rows were last synced from
+        self._rows = {}      # id -> (course, due, checked, generation)
+        self._heap = []      # (alert_at, id, generation); entries with an old generation are skipped
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="deadline-alerts", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def sync(self, store):
+        """
+        Picks up changes from a DeadlineStore: just the ids it reports as changed, or all of
+        them when it cannot tell. Returns True if anything was rescheduled.
+        """
+        store.refresh()
+        changed = store.changes_since(self.version)
+        if changed is not None and not changed:
+            return False
+        self.version = store.version
+        if changed is None:
+            return self.update((d.id, d.course, d.due, d.checked) for d in store.get_parsed())
+        rows = []
+        for deadline_id in changed:
+            d = store.get_listed(deadline_id)
+            rows.append((deadline_id, None, None, None) if d is None else (d.id, d.course, d.due, d.checked))
+        return self.update(rows, partial=True)
+
+    def update(self, rows, partial=False):
+        """
+        Replaces the tracked deadlines with `rows` of (id, course, due_epoch, is_checked).
+        With partial=True the rows only replace the ones with the same ids, and a row whose
+        due time is None is dropped. Only rows whose due time or checked state changed are
+        (re)scheduled.
+        """
+        now = self.clock()
+        with self._cond:
+            old_rows = self._rows
+            new_rows = old_rows if partial else {}  # Partial updates patch the rows in place
+            rescheduled = False
+            for deadline_id, course, due, checked in rows:
+                if due is None:
+                    rescheduled = new_rows.pop(deadline_id, None) is not None or rescheduled
+                    continue
+                old = old_rows.get(deadline_id)
+                if old is not None and old[1] == due and old[2] == checked:
+                    new_rows[deadline_id] = (course, due, checked, old[3])
+                    continue
+                self._generation += 1
+                new_rows[deadline_id] = (course, due, checked, self._generation)
+                if not checked:
+                    self._push(deadline_id, due, now, self._generation)
+                rescheduled = True
+            rescheduled = rescheduled or len(new_rows) != len(old_rows)
+            self._rows = new_rows
+
+            if len(self._heap) > 2 * len(new_rows) + 64:
+                # Mostly stale entries left by edits and deletions
+                self._heap = [entry for entry in self._heap if self._is_current(entry)]
+                heapq.heapify(self._heap)
+            if rescheduled:
+                self._cond.notify()
+        return rescheduled
+
+    def next_alert_at(self):
+        with self._cond:
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def _push(self, deadline_id, due, now, generation):
+        at = next_row_transition(due, now)
+        if at is not None:
+            heapq.heappush(self._heap, (at, deadline_id, generation))
+
+    def _is_current(self, entry):
+        row = self._rows.get(entry[1])
+        return row is not None and row[3] == entry[2]
+
+    def pop_due(self, now):
+        """Removes the alerts due by `now`, schedules each row's next one and returns (title, message) pairs."""
+        alerts = []
+        with self._cond:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if not self._is_current(entry):
+                    continue
+                course, due, _, generation = self._rows[entry[1]]
+                alerts.append((ALERT_TITLE, alert_message(course, due, now)))
+                self._push(entry[1], due, now, generation)  # From now, not from entry[0]: skips missed ones
+        return alerts
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                pending = self.next_alert_at()
+                now = self.clock()
+                if pending is None or pending > now:
+                    self._cond.wait(None if pending is None else pending - now)
+                    continue
+            for title, message in self.pop_due(now):
+                try:
+                    self.deliver(title, message)
+                except Exception as e:
+                    print(f"Could not deliver alert: {e}")
@@ -0,0 +1,265 @@
+"""
+Opt-in timing of the hot paths, for when the countdown stutters on someone's machine.
+
+Turned on with --profile or DEADLINE_PROFILE=1. instrument() then swaps the named
+functions and methods for timing wrappers; while profiling is off nothing is
+wrapped at all, so the only cost left is a couple of `profiler.enabled` checks
+per tick.
+
+For every instrumented name it keeps the call count, total and worst time, and
+the most recent WINDOW durations for rolling p50/p95/p99. The countdown loop also
+reports how late each tick started compared to its planned wake-up (overruns).
+Memory is looked at on demand: the first memory_snapshot() starts tracemalloc,
+later ones list what grew since the previous snapshot.
+
+For runs that last days, a LeakTracker counts live Tk widgets, Tcl variables
+created from Python, pending `after` callbacks, Tcl commands and Python objects
+after every full redraw and every LEAK_SAMPLE_SECONDS. Its report shows how
+each count moved since the first sample; on a healthy run they stay flat.
+
+dump() writes everything to a JSON file; the main window has an overlay (F12).
+"""
+import functools
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from safe_files import atomic_write_json
+
+
+ENV_VAR = "DEADLINE_PROFILE"
+WINDOW = 2048     # Recent calls per name kept for the percentiles
+OVERRUN_MS = 100  # A tick starting this much later than planned counts as an overrun
+TRACE_FRAMES = 5  # Stack depth tracemalloc records per allocation
+LEAK_SAMPLE_SECONDS = 600
+LEAK_HISTORY = 288  # Two days of samples at the default interval
+
+enabled = False
+_stats = {}  # name -> CallStats
+_lock = threading.Lock()
+_ticks = {"count": 0, "overruns": 0}
+_last_snapshot = None
+leak_tracker = None
+
+
+class CallStats:
+    """Running totals and a window of recent durations (ms) for one instrumented name."""
+
+    __slots__ = ("count", "total", "worst", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.worst = max(self.worst, ms)
+        self.recent.append(ms)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))], 3) if recent else None
+        return {"count": self.count, "total_ms": round(self.total, 3), "max_ms": round(self.worst, 3),
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help=f"time the hot paths and file I/O (also ${ENV_VAR}=1); F12 in the window shows them")
+    return parser
+
+
+def requested(args=None):
+    """True if profiling was asked for on the command line or in the environment."""
+    return bool(getattr(args, "profile", False)) or os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def record(name, ms):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = CallStats()
+        stats.add(ms)
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, (time.perf_counter() - start) * 1000)
+    return timed
+
+
+def instrument(owner, names, prefix=None):
+    """
+    Replaces the functions `names` of a module (or methods of a class) with timing wrappers.
+    Does nothing while profiling is off. Callers that looked the function up earlier keep the original.
+    """
+    if not enabled:
+        return
+    prefix = prefix or getattr(owner, "__name__", str(owner))
+    for name in names:
+        setattr(owner, name, _timed(f"{prefix}.{name}", getattr(owner, name)))
+
+
+def instrument_core():
+    """The shared hot paths: loading deadlines into the engine and every deadline/notes file read and write."""
+    if not enabled:
+        return
+    import countdown_engine
+    import deadline_io
+    import deadline_store
+    import notes_search
+    import notes_store
+
+    instrument(countdown_engine.CountdownEngine, ["sync", "tick"], "CountdownEngine")
+    instrument(deadline_store.DeadlineStore, ["refresh", "_read_snapshot", "_replay_journal", "_write_journal", "compact"],
+               "DeadlineStore")
+    instrument(notes_store.SQLiteNotesStore, ["get", "put", "put_many"], "SQLiteNotesStore")
+    instrument(notes_store.ShardedNotesStore, ["_read_shard", "put", "put_many"], "ShardedNotesStore")
+    instrument(notes_search.NotesIndex, ["search", "update", "_persist"], "NotesIndex")
+    instrument(deadline_io, ["export_deadlines"])
+
+
+def record_tick(planned_at, started_at):
+    """Called by the countdown loop with the wake-up it planned and the time it actually ran."""
+    lag = max(0.0, (started_at - planned_at) * 1000)
+    with _lock:
+        _ticks["count"] += 1
+        if lag > OVERRUN_MS:
+            _ticks["overruns"] += 1
+    record("tick lag", lag)
+
+
+def memory_snapshot(limit=10):
+    """
+    The first call starts tracemalloc and returns []. Later calls return the `limit` source
+    lines whose allocations grew most since the previous call, as text.
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+        _last_snapshot = tracemalloc.take_snapshot()
+        return []
+    snapshot = tracemalloc.take_snapshot()
+    lines = [str(diff) for diff in snapshot.compare_to(_last_snapshot, "lineno")[:limit]]
+    _last_snapshot = snapshot
+    return lines
+
+
+# --- Leak tracking ---
+
+def _count_widgets(widget):
+    return 1 + sum(_count_widgets(child) for child in widget.winfo_children())
+
+
+def live_counts(root=None):
+    """
+    How many Python objects are alive and, given the Tk root, how many widgets, Python-made
+    Tcl variables, pending `after` callbacks and Tcl commands (Python callbacks among them) exist.
+    """
+    counts = {"python_objects": len(gc.get_objects())}
+    if root is not None:
+        tk = root.tk
+        counts["widgets"] = _count_widgets(root)
+        counts["tcl_variables"] = len(tk.splitlist(tk.call("info", "globals", "PY_VAR*")))
+        counts["after_callbacks"] = len(tk.splitlist(tk.call("after", "info")))
+        counts["tcl_commands"] = len(tk.splitlist(tk.call("info", "commands")))
+    return counts
+
+
+class LeakTracker:
+    """Samples live_counts() after redraws and at intervals, and reports how the counts grew since the first sample."""
+
+    def __init__(self, root=None, interval=LEAK_SAMPLE_SECONDS):
+        self.root = root
+        self.interval = interval
+        self.redraws = 0
+        self.first = None
+        self.samples = deque(maxlen=LEAK_HISTORY)
+        self._next_sample = 0.0
+
+    def sample(self):
+        entry = {"at": time.strftime("%Y-%m-%d %H:%M:%S"), "redraws": self.redraws, **live_counts(self.root)}
+        if self.first is None:
+            self.first = entry
+        self.samples.append(entry)
+        self._next_sample = time.monotonic() + self.interval
+        return entry
+
+    def redraw(self):
+        self.redraws += 1
+        self.sample()
+
+    def maybe_sample(self):
+        """Takes a sample if the interval has passed. Cheap enough to call from a loop."""
+        if time.monotonic() >= self._next_sample:
+            self.sample()
+
+    def summary(self):
+        if self.first is None:
+            return None
+        last = self.samples[-1]
+        growth = {key: last[key] - value for key, value in self.first.items()
+                  if isinstance(value, int) and key != "redraws"}
+        return {"first": self.first, "last": last, "growth": growth, "history": list(self.samples)}
+
+
+def track_leaks(root=None):
+    """Starts leak tracking (with --profile). Returns the tracker, or None while profiling is off."""
+    global leak_tracker
+    if not enabled:
+        return None
+    leak_tracker = LeakTracker(root)
+    leak_tracker.sample()
+    return leak_tracker
+
+
+def report():
+    with _lock:
+        calls = {name: stats.summary() for name, stats in sorted(_stats.items())}
+        ticks = dict(_ticks)
+    memory = None
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        memory = {"traced_kib": current // 1024, "peak_kib": peak // 1024}
+    leaks = leak_tracker.summary() if leak_tracker is not None else None
+    return {"written_at": time.strftime("%Y-%m-%d %H:%M:%S"), "calls": calls, "ticks": ticks, "memory": memory,
+            "leaks": leaks}
+
+
+def format_lines():
+    """The report as aligned text lines, for the overlay and the terminal."""
+    data = report()
+    ticks = data["ticks"]
+    lines = [f"ticks {ticks['count']}  overruns (>{OVERRUN_MS} ms late) {ticks['overruns']}"]
+    if data["memory"]:
+        lines.append(f"traced memory {data['memory']['traced_kib']} KiB  peak {data['memory']['peak_kib']} KiB")
+    if data["leaks"]:
+        growth = data["leaks"]["growth"]
+        lines.append("since start: " + "  ".join(f"{key} {value:+d}" for key, value in growth.items()))
+    lines.append(f"{'':<34}{'calls':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, s in data["calls"].items():
+        lines.append(f"{name[:34]:<34}{s['count']:>7}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}")
+    return lines
+
+
+def dump(path):
+    """Writes report() to `path` as JSON, replacing the file in one step. Returns the path."""
+    atomic_write_json(path, report(), indent=2)
+    return path
@@ -0,0 +1,147 @@
+"""
+Recurring deadlines.
+
+A recurring deadline is one stored row whose 'deadline_shamsi'/'deadline_time' are the
+first occurrence and whose 'repeat' field holds the rule:
+
+    {"freq": "weekly",  "interval": 1}                     every week
+    {"freq": "daily",   "interval": 3, "count": 10}        every 3 days, 10 times
+    {"freq": "monthly", "interval": 1,
+     "until": "1404-03-31"}                                on the same Jalali day every month
+                                                           (the last day in shorter months)
+
+Occurrences are never stored. occurrences() yields them lazily from any starting day,
+jumping straight there instead of stepping from the first one, and the store expands
+only the ones around today (see expand_window). An occurrence is addressed as
+'<row id>@<YYYY-MM-DD>'; the dates of the ones checked off are kept in the row's
+'done' list.
+"""
+import jalali_calendar
+
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+OCCURRENCE_SEPARATOR = "@"
+PAST_DAYS = 7    # Expired occurrences stay listed this long
+AHEAD_DAYS = 7   # Upcoming occurrences listed ahead of today (at least the next one always is)
+
+
+def occurrence_id(row_id, epoch_day):
+    return f"{row_id}{OCCURRENCE_SEPARATOR}{jalali_calendar.day_string(epoch_day)}"
+
+
+def split_occurrence_id(deadline_id):
+    """Returns (row_id, occurrence date string or None)."""
+    row_id, _, date_str = str(deadline_id).partition(OCCURRENCE_SEPARATOR)
+    return row_id, date_str or None
+
+
+def parse_rule(raw):
+    """
+    Checks a stored 'repeat' value and returns it normalized, or None for a one-off deadline.
+    Raises ValueError if it is not a rule this module understands.
+    """
+    if not raw:
+        return None
+    if not isinstance(raw, dict) or raw.get('freq') not in FREQUENCIES:
+        raise ValueError(f"unknown repeat rule {raw!r}")
+    rule = {'freq': raw['freq'], 'interval': int(raw.get('interval') or 1)}
+    if rule['interval'] < 1:
+        raise ValueError("repeat interval must be at least 1")
+    if raw.get('count'):
+        rule['count'] = int(raw['count'])
+        if rule['count'] < 1:
+            raise ValueError("repeat count must be at least 1")
+    elif raw.get('until'):
+        jalali_calendar.parse_date(raw['until'])
+        rule['until'] = raw['until']
+    return rule
+
+
+def occurrences(rule, start_day, from_day=None):
+    """
+    Yields the epoch days of the occurrences of `rule` on or after `from_day`, in order.
+    `start_day` is the first occurrence. Stops at the rule's count or until date, or never.
+    """
+    until = jalali_calendar.to_epoch_day(*jalali_calendar.parse_date(rule['until'])) if 'until' in rule else None
+    count = rule.get('count')
+    interval = rule['interval']
+    if from_day is None or from_day < start_day:
+        from_day = start_day
+
+    if rule['freq'] != "monthly":
+        step = interval * (7 if rule['freq'] == "weekly" else 1)
+        k = -((start_day - from_day) // step)  # First occurrence number on or after from_day
+        while count is None or k < count:
+            day = start_day + k * step
+            if until is not None and day > until:
+                return
+            yield day
+            k += 1
+        return
+
+    year, month, day_of_month = jalali_calendar.from_epoch_day(start_day)
+    first_month = year * 12 + month - 1
+    from_year, from_month, _ = jalali_calendar.from_epoch_day(from_day)
+    k = max(0, (from_year * 12 + from_month - 1 - first_month) // interval)
+    while count is None or k < count:
+        y, m = divmod(first_month + k * interval, 12)
+        day = jalali_calendar.to_epoch_day(y, m + 1, min(day_of_month, jalali_calendar.month_length(y, m + 1)))
+        k += 1
+        if day < from_day:
+            continue
+        if until is not None and day > until:
+            return
+        yield day
+
+
+def expand_window(rule, start_day, today, past_days=PAST_DAYS, ahead_days=AHEAD_DAYS):
+    """
+    The occurrence days worth listing on `today`: those from `past_days` ago up to
+    `ahead_days` ahead, plus the next upcoming one if that is further away.
+    """
+    days = []
+    for day in occurrences(rule, start_day, today - past_days):
+        if day > today + ahead_days and days and days[-1] >= today:
+            break
+        days.append(day)
+        if day > today + ahead_days:
+            break
+    return days
+
+
+def done_horizon(rule, date_str):
+    """
+    The oldest date whose checked state still matters once the occurrence on `date_str`
+    is listed: the listing window plus the longest gap between two occurrences before it.
+    Older dates are dropped from the 'done' list, so it stays small however long a rule runs.
+    """
+    longest_gap = rule['interval'] * {"daily": 1, "weekly": 7, "monthly": 31}[rule['freq']]
+    day = jalali_calendar.to_epoch_day(*jalali_calendar.parse_date(date_str))
+    return jalali_calendar.day_string(day - PAST_DAYS - AHEAD_DAYS - longest_gap)
+
+
+# --- Editor fields ---
+
+def rule_from_fields(freq, interval, end):
+    """
+    Builds a rule from the editor's fields: a frequency (or "" for none), an interval
+    and an end that is empty (forever), a number of occurrences or a YYYY-MM-DD date.
+    Raises ValueError if they do not make a rule.
+    """
+    if not freq:
+        return None
+    raw = {'freq': freq, 'interval': interval or 1}
+    end = end.strip()
+    if end.isdigit():
+        raw['count'] = end
+    elif end:
+        raw['until'] = end
+    return parse_rule(raw)
+
+
+def rule_fields(rule):
+    """Inverse of rule_from_fields: (freq, interval, end) strings for the editor."""
+    if not rule:
+        return "", "1", ""
+    end = str(rule['count']) if 'count' in rule else rule.get('until', "")
+    return rule['freq'], str(rule['interval']), end
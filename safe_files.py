@@ -0,0 +1,179 @@
+"""
+Building blocks for files that more than one process writes: the main window,
+the terminal modes and import scripts all open the same deadlines and notes.
+
+  FileLock           advisory lock on a side file (flock / msvcrt.locking), held only
+                     around a read-modify-write; waits up to LOCK_TIMEOUT for other holders
+  atomic_write_json  temp file in the same folder, fsync, os.replace: readers see the old
+                     file or the new one, never half of it
+  stat_signature     (mtime, size, inode) of a file, the version writers compare to find
+                     out whether someone else wrote since they last read
+  keep_damaged_copy  copies a file that no longer parses aside before it gets replaced
+  remove_stale_temp_files  clears the temp files of writers that died mid-write
+"""
+import json
+import os
+import shutil
+import sys
+import time
+
+
+LOCK_TIMEOUT = 10.0  # Seconds to wait for another process to finish its write
+LOCK_POLL = 0.005
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on `path`, released by the OS if the process dies.
+    Locks are per open file, so two threads of one process exclude each other too.
+    Not reentrant: a thread must not take a lock it already holds.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def _try_lock(self, f):
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self, blocking=True):
+        """Returns True once the lock is held, False if it is busy (at once, or after the timeout)."""
+        f = open(self.path, 'a+')
+        give_up_at = time.monotonic() + self.timeout
+        while not self._try_lock(f):
+            if not blocking or time.monotonic() >= give_up_at:
+                f.close()
+                return False
+            time.sleep(LOCK_POLL)
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            # Unlocked explicitly: when a close leaves it to the OS, Windows may drop the lock only later
+            if sys.platform == "win32":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass  # Closing below drops it all the same
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"{self.path} is still locked by another process after {self.timeout:.0f} s")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def stat_signature(path):
+    """(mtime_ns, size, inode) of `path`, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _fsync_directory(path):
+    """Makes a rename in the folder of `path` durable. Windows has no directory handles to sync."""
+    if sys.platform == "win32":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _private_opener(path, flags):
+    return os.open(path, flags, 0o600)
+
+
+def atomic_write(path, write, fsync=True, mode='w', newline=None, private=False):
+    """
+    Calls write(f) on a temp file next to `path`, flushes it to disk and renames it into place.
+    The temp name includes the process id, so two processes never write the same temp file.
+    `private` creates the file readable by its owner only. Returns what write(f) returned.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    opener = _private_opener if private else None
+    try:
+        with open(tmp_path, mode, opener=opener,
+                  **({} if 'b' in mode else {'encoding': 'utf-8', 'newline': newline})) as f:
+            result = write(f)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        _fsync_directory(path)
+    return result
+
+
+def atomic_write_json(path, data, fsync=True, indent=4):
+    """Writes `data` as JSON to `path` in one step (see atomic_write)."""
+    atomic_write(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=indent), fsync)
+
+
+def remove_stale_temp_files(directory, prefix=""):
+    """
+    Deletes the '<name>.<pid>.tmp' files atomic_write leaves behind when a process dies mid-write,
+    for names starting with `prefix`. Only call it holding the lock every writer of those files
+    takes, so no temp file can still be in use. Returns the number removed.
+    """
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        stem, _, pid = name[:-len(".tmp")].rpartition(".")
+        if name.startswith(prefix) and name.endswith(".tmp") and stem and pid.isdigit():
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def keep_damaged_copy(path):
+    """
+    Copies a file that no longer parses to '<path>.damaged-<timestamp>' so that the next
+    write cannot destroy what is left of it. Returns the copy's path, or None if copying failed.
+    """
+    backup = f"{path}.damaged-{time.strftime('%Y%m%d-%H%M%S')}"
+    try:
+        shutil.copyfile(path, backup)
+    except OSError as e:
+        print(f"Could not keep a copy of damaged {path}: {e}")
+        return None
+    print(f"{path} is damaged; a copy was kept as {backup}")
+    return backup
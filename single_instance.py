@@ -0,0 +1,120 @@
+"""
+One main window per user.
+
+The first launch takes an OS lock on instance.lock in the app data folder and holds
+it until the process exits, so a crash never leaves a stale lock behind. Once the
+window is up it listens on a loopback socket and writes the port and a random token
+to instance.json. A later launch finds the lock taken, sends the running window one
+request and exits, without importing Tk or reading any data.
+
+Requests and replies are single JSON lines:
+
+    {"token": ..., "op": "show"}                  raise the window and re-read the deadlines
+    {"token": ..., "op": "add", "rows": [...]}    add deadlines (countdown_cli --add)
+
+The token keeps other local users, who can reach a loopback port too, from sending
+requests; instance.json is only readable by its owner.
+"""
+import hmac
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+
+from safe_files import FileLock, atomic_write
+
+
+LOCK_FILE = "instance.lock"
+INFO_FILE = "instance.json"
+HOST = "127.0.0.1"
+TIMEOUT = 2.0       # Seconds a request may take, either side
+STARTUP_WAIT = 5.0  # How long a second launch waits for a window that is still starting up
+MAX_REQUEST = 1 << 20
+
+
+def acquire(directory):
+    """Takes the single-instance lock in `directory`. Returns the FileLock, or None if a window already runs."""
+    lock = FileLock(os.path.join(directory, LOCK_FILE))
+    return lock if lock.acquire(blocking=False) else None
+
+
+class InstanceServer:
+    """
+    Accepts requests from later launches on a background thread. handle(message) runs on
+    that thread and returns the reply dict; it must hand any Tk work over to the Tk thread.
+    """
+
+    def __init__(self, directory, handle):
+        self.handle = handle
+        self.token = secrets.token_hex(16)
+        self.info_path = os.path.join(directory, INFO_FILE)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind((HOST, 0))
+        self._sock.listen(8)
+        info = {"port": self._sock.getsockname()[1], "token": self.token, "pid": os.getpid()}
+        # Rewritten on every launch, so not worth an fsync
+        atomic_write(self.info_path, lambda f: json.dump(info, f), fsync=False, private=True)
+        self._thread = threading.Thread(target=self._run, name="single-instance", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return  # Closed
+            with conn:
+                conn.settimeout(TIMEOUT)
+                try:
+                    reply = self._answer(conn.makefile('rb').readline(MAX_REQUEST))
+                    conn.sendall((json.dumps(reply, ensure_ascii=False) + "\n").encode('utf-8'))
+                except OSError:
+                    pass  # The other side gave up
+
+    def _answer(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "not a JSON request"}
+        if not isinstance(message, dict) or not hmac.compare_digest(str(message.get("token", "")), self.token):
+            return {"ok": False, "error": "wrong token"}
+        try:
+            return self.handle(message)
+        except Exception as e:
+            print(f"Error handling request from another launch: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def close(self):
+        self._sock.close()
+        try:
+            os.remove(self.info_path)
+        except OSError:
+            pass
+
+
+def send(directory, message, timeout=TIMEOUT):
+    """Sends `message` to the running window. Returns its reply, or None if no window answered."""
+    try:
+        with open(os.path.join(directory, INFO_FILE), encoding='utf-8') as f:
+            info = json.load(f)
+        with socket.create_connection((HOST, info["port"]), timeout=timeout) as conn:
+            conn.sendall((json.dumps({**message, "token": info["token"]}, ensure_ascii=False) + "\n").encode('utf-8'))
+            line = conn.makefile('rb').readline(MAX_REQUEST)
+        return json.loads(line)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def hand_off(directory, message, wait=STARTUP_WAIT):
+    """
+    Sends `message` to the window holding the lock, retrying while it is still starting up
+    and has not opened its socket yet. Returns the reply, or None if it never answered.
+    """
+    give_up_at = time.monotonic() + wait
+    while True:
+        reply = send(directory, message)
+        if reply is not None or time.monotonic() >= give_up_at:
+            return reply
+        time.sleep(0.05)
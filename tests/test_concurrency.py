@@ -0,0 +1,111 @@
+"""
+Several processes writing one data folder: no update may be lost, a writer killed
+mid-write costs nothing already written, and concurrent edits of one row are merged.
+benchmark.py stress times the same writers.
+"""
+import itertools
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from benchmark import STRESS_COMPACT_THRESHOLD, STRESS_OPS, stress_writer
+from deadline_store import DeadlineStore
+from notes_store import ShardedNotesStore
+
+
+ROW = {"deadline_shamsi": "1404-06-01", "deadline_time": "12:00:00", "checked": "0"}
+KILLS = 3
+
+
+def stress_crasher(directory):
+    """Appends as fast as it can until the test kills it, leaving whatever it was writing torn."""
+    store = DeadlineStore(os.path.join(directory, "deadlines.json"), fsync_policy="never",
+                          compact_threshold=STRESS_COMPACT_THRESHOLD)
+    for i in itertools.count():
+        store.add(dict(ROW, course=f"crash-{i}", padding="x" * 2000))
+
+
+def lost_updates(directory, results):
+    """Writes the stress writers made that a fresh reader does not see."""
+    store = DeadlineStore(os.path.join(directory, "deadlines.json"))
+    notes = ShardedNotesStore(os.path.join(directory, "notes"))
+    shared = store.get("shared")
+    lost = []
+    for result in results:
+        lost += [("add", key) for key in result["added"] if store.get(key) is None]
+        lost += [("check", key) for key, value in result["checked"].items()
+                 if store.get(key) is not None and store.get(key)["checked"] != ("1" if value else "0")]
+        if result["field"] is not None and shared.get(f"note_w{result['worker']}") != result["field"]:
+            lost.append(("edit", result["worker"]))
+        if result["note"] is not None and notes.get(result["note"][0]) != result["note"][1]:
+            lost.append(("note", result["note"][0]))
+    return lost
+
+
+@pytest.mark.parametrize("processes", [2, 8])
+def test_no_update_is_lost(tmp_path, processes):
+    directory = str(tmp_path)
+    DeadlineStore(os.path.join(directory, "deadlines.json"), fsync_policy="never").add(dict(ROW, id="shared", course="shared"))
+    start_at = time.time() + 2.0  # Leaves the spawned interpreters time to start
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.starmap(stress_writer, [(directory, w, STRESS_OPS, start_at) for w in range(processes)])
+    assert lost_updates(directory, results) == []
+
+
+def test_killed_writer_keeps_other_writes(tmp_path):
+    directory = str(tmp_path)
+    path = os.path.join(directory, "deadlines.json")
+    # Never compacts, so no temp file of this process is in flight when the folder is checked
+    survivor = DeadlineStore(path, fsync_policy="never", compact_threshold=1 << 40)
+    before = survivor.add(dict(ROW, course="before"))
+    for _ in range(KILLS):
+        process = multiprocessing.get_context("spawn").Process(target=stress_crasher, args=(directory,))
+        process.start()
+        time.sleep(1.5)
+        process.kill()
+        process.join()
+        after = survivor.add(dict(ROW, course="after"))
+        reader = DeadlineStore(path)
+        assert reader.get(before) is not None and reader.get(after) is not None
+    DeadlineStore(path).get_rows()  # Opening a store clears what killed writers left
+    assert [name for name in os.listdir(directory) if name.endswith(".tmp")] == []
+
+
+@pytest.fixture
+def two_stores(tmp_path):
+    """Two stores on one folder, standing in for two processes, and a row both have read."""
+    path = str(tmp_path / "deadlines.json")
+    ours, theirs = DeadlineStore(path, fsync_policy="never"), DeadlineStore(path, fsync_policy="never")
+    deadline_id = ours.add(dict(ROW, course="math"))
+    theirs.get(deadline_id)
+    return ours, theirs, deadline_id
+
+
+def test_edits_of_different_fields_are_merged(two_stores):
+    ours, theirs, deadline_id = two_stores
+    stale = dict(theirs.get(deadline_id))
+    ours.update(deadline_id, dict(ours.get(deadline_id), course="physics"))
+    theirs.update(deadline_id, dict(stale, deadline_time="08:00:00"), base=stale)
+    merged = DeadlineStore(ours.file_path).get(deadline_id)
+    assert (merged["course"], merged["deadline_time"]) == ("physics", "08:00:00")
+
+
+def test_same_field_conflict_keeps_the_later_write(two_stores):
+    ours, theirs, deadline_id = two_stores
+    stale = dict(theirs.get(deadline_id))
+    ours.update(deadline_id, dict(ours.get(deadline_id), course="chemistry", deadline_time="08:00:00"))
+    theirs.update(deadline_id, dict(stale, course="biology"), base=stale)
+    merged = DeadlineStore(ours.file_path).get(deadline_id)
+    assert (merged["course"], merged["deadline_time"]) == ("biology", "08:00:00")
+
+
+def test_torn_journal_line_is_skipped(two_stores):
+    ours, theirs, deadline_id = two_stores
+    with open(ours.journal_path, "ab") as f:
+        f.write(b'{"op": "edit", "id": "' + deadline_id.encode() + b'", "row": {"cour')
+    later = theirs.add(dict(ROW, course="after"))
+    reader = DeadlineStore(ours.file_path)
+    assert reader.get(deadline_id)["course"] == "math"
+    assert reader.get(later) is not None
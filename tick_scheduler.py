@@ -0,0 +1,308 @@
+"""
+Event-driven tick planning for the countdown window.
+
+Instead of redrawing everything every second, the window keeps a heap of the
+next moment each row changes state (color threshold crossing, expiry, entering
+its last day) and wakes up only when something visible needs repainting.
+Wake-ups are aligned to wall-clock second boundaries so they do not drift.
+"""
+import heapq
+import math
+import time
+from array import array
+
+from countdown_engine import COLOR_THRESHOLDS, local_midnight
+
+
+NEAR_SECONDS = 86400         # Rows closer than this tick every second
+FAR_REFRESH_SECONDS = 60     # Rows further out are repainted once a minute
+PATCH_KEYS_MAX = 256         # More changed ids than this re-sort the whole display order
+
+# Remaining-time boundaries (in seconds) at which a row's appearance changes.
+# A row with remaining >= (t + 1) days is in the bucket above threshold t.
+_BOUNDARIES = sorted({(t + 1) * 86400 for t in COLOR_THRESHOLDS} | {NEAR_SECONDS}, reverse=True)
+
+
+def next_row_transition(due, now):
+    """
+    Returns the earliest epoch time after `now` at which the row due at `due`
+    changes color bucket, enters its last day or expires. None if it never will again.
+    """
+    for boundary in _BOUNDARIES:
+        at = due - boundary + 1
+        if at > now:
+            return at
+    expires_at = due + 1  # int(due - now) turns negative one second after `due`
+    if expires_at > now:
+        return expires_at
+    return None
+
+
+def next_second(now):
+    """Epoch time of the next whole wall-clock second."""
+    return math.floor(now) + 1
+
+
+def next_far_refresh(now):
+    """Next wall-clock boundary at which rows further than a day out are repainted."""
+    return (math.floor(now) // FAR_REFRESH_SECONDS + 1) * FAR_REFRESH_SECONDS
+
+
+def next_midnight(now):
+    return local_midnight(local_midnight(now) + 36 * 3600)
+
+
+def delay_ms(now, wake_at):
+    """Milliseconds from `now` until `wake_at`, rounded up to the following second boundary."""
+    wake_at = math.ceil(wake_at)
+    return max(1, int(math.ceil((wake_at - now) * 1000)))
+
+
+class TransitionHeap:
+    """
+    Min-heap holding the next state transition of every row, as (at, row index, due).
+    An entry whose due time no longer matches its row's is stale and skipped, so a changed
+    row only needs a new entry pushed; the old one is left for pop_due or prune to drop.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._scheduled = array('d')  # Due time each row was last scheduled for, so unchanged rows are not pushed twice
+
+    def __len__(self):
+        return len(self._heap)
+
+    def rebuild(self, due_column, now):
+        heap = []
+        for i, due in enumerate(due_column):
+            at = next_row_transition(due, now)
+            if at is not None:
+                heap.append((at, i, due))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._scheduled = array('d', due_column)
+
+    def push(self, i, due, now):
+        """Schedules row i's next transition, unless it is already scheduled for this due time."""
+        scheduled = self._scheduled
+        if i < len(scheduled):
+            if scheduled[i] == due:
+                return
+            scheduled[i] = due
+        else:
+            scheduled.extend([math.nan] * (i - len(scheduled)))  # Rows appended out of order
+            scheduled.append(due)
+        self._schedule(i, due, now)
+
+    def _schedule(self, i, due, now):
+        at = next_row_transition(due, now)
+        if at is not None:
+            heapq.heappush(self._heap, (at, i, due))
+
+    def prune(self, due_column):
+        """Drops stale and duplicate entries once they outnumber the rows."""
+        if len(self._heap) <= 2 * len(due_column) + 64:
+            return
+        current = {}
+        for entry in self._heap:
+            _, i, due = entry
+            if i < len(due_column) and due_column[i] == due and (i not in current or entry < current[i]):
+                current[i] = entry
+        self._heap = list(current.values())
+        heapq.heapify(self._heap)
+
+    def peek(self):
+        """Epoch time of the earliest pending transition, or None."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, due_column, now):
+        """Removes every transition that has happened by `now` and returns the affected row indices."""
+        changed = set()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, i, due = heapq.heappop(heap)
+            if i >= len(due_column) or due_column[i] != due or i in changed:
+                continue  # Stale, or a second entry for the same row and due time
+            changed.add(i)
+            self._schedule(i, due, now)
+        return changed
+
+
+class TickPlanner:
+    """
+    Decides which rows to repaint on a wake-up and when the next wake-up should be.
+    Kept free of Tk so the policy can be exercised headlessly.
+    """
+
+    def __init__(self):
+        self.transitions = TransitionHeap()
+        self.last_wake = None
+        self.version = None  # Version of the data the heap was built from
+
+    def reset(self, due_column, now, version=None):
+        self.transitions.rebuild(due_column, now)
+        self.version = version
+
+    def update(self, due_column, rows, now, version=None):
+        """Schedules rows whose due time may have changed, leaving the rest of the heap alone."""
+        for i in rows:
+            self.transitions.push(i, due_column[i], now)
+        self.transitions.prune(due_column)
+        self.version = version
+
+    def plan(self, due_column, now, visible_rows, stale_rows):
+        """
+        Returns (rows_to_repaint, restyle_rows, next_wake_at).
+
+        visible_rows: row indices currently scrolled into view.
+        stale_rows: visible rows that have not been painted since they came into view.
+        """
+        restyle = self.transitions.pop_due(due_column, now)
+
+        last = self.last_wake
+        far_due = last is None or math.floor(now) // FAR_REFRESH_SECONDS != math.floor(last) // FAR_REFRESH_SECONDS
+        day_changed = last is None or local_midnight(now) != local_midnight(last)
+        self.last_wake = now
+
+        repaint = set(restyle) | set(stale_rows)
+        any_near = False
+        for i in visible_rows:
+            near = -1 < due_column[i] - now < NEAR_SECONDS  # Expired rows never change again
+            any_near = any_near or near
+            if near or far_due or day_changed:
+                repaint.add(i)
+
+        if any_near:
+            wake_at = next_second(now)
+        else:
+            wake_at = min(next_far_refresh(now), next_midnight(now))
+            pending = self.transitions.peek()
+            if pending is not None:
+                wake_at = min(wake_at, max(pending, next_second(now)))
+        return repaint, restyle, wake_at
+
+
+def _insert_position(keys, sort_key, target):
+    """Where `target` (a sort_key value) goes in `keys`, which are sorted by sort_key."""
+    lo, hi = 0, len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sort_key(keys[mid]) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class CountdownTicker:
+    """
+    The Tk-free half of the main window's countdown loop: keeps a TickPlanner and a
+    deadline list's display order in step with a CountdownEngine and, on every wake-up,
+    says which rows in view to repaint and when to wake up next. Time comes from
+    `clock`, so the loop can also be driven on simulated time (see benchmark.py soak).
+
+    When the store reports which ids changed (DeadlineStore.changes_since), only those
+    get a new heap entry and are moved in the display order, so a toggle or an edit costs
+    a few binary searches however long the list is.
+    """
+
+    def __init__(self, engine, clock=time.time):
+        self.engine = engine
+        self.clock = clock
+        self.planner = TickPlanner()
+        self.planner_layout = None
+        self.visible_ids = set()  # Rows that were in view at the previous wake-up
+        self.keys_version = None  # Engine version the list's keys were last sorted for
+        self._placed = {}  # Listed id -> (checked, due) it is sorted under in the list's keys
+
+    def sync(self, store, now):
+        """Re-plans the rows that changed since the last call. Returns True if anything did."""
+        engine = self.engine
+        planner = self.planner
+        if planner.version == engine.version:
+            return False
+        changed = store.changes_since(planner.version) if self.planner_layout == engine.layout else None
+        if changed is None:
+            planner.reset(engine.due, now, engine.version)
+            self.planner_layout = engine.layout
+        else:
+            index = engine.index
+            planner.update(engine.due, [index[key] for key in changed if key in index], now, engine.version)
+            self.visible_ids.difference_update(changed)  # Repainted by the next plan if in view
+        return True
+
+    def _sort_key(self, key):
+        return self._placed[key] + (key,)
+
+    def sync_keys(self, store, deadline_list, on_resort=None):
+        """
+        Puts `deadline_list`'s keys in display order (unchecked first, then by due time) if
+        the engine changed, calling on_resort() first. A few changed ids are moved one at a
+        time with a binary search; more than PATCH_KEYS_MAX re-sort the whole list.
+        """
+        engine = self.engine
+        if self.keys_version == engine.version:
+            return
+        if on_resort is not None:
+            on_resort()
+        changed = store.changes_since(self.keys_version)
+        if changed is None or len(changed) > PATCH_KEYS_MAX or not self._patch_keys(deadline_list, changed):
+            index, checked, due = engine.index, engine.checked, engine.due
+            keys = [key for key in store.ordered_ids() if key in index]
+            self._placed = {key: (checked[index[key]], due[index[key]]) for key in keys}
+            deadline_list.set_keys(keys)
+        self.keys_version = engine.version
+
+    def _patch_keys(self, deadline_list, changed):
+        """Moves just the `changed` ids in the list's keys. Returns False if the keys were not where expected."""
+        keys = deadline_list.keys
+        placed = self._placed
+        index = self.engine.index
+        for key in changed:
+            old = placed.get(key)
+            if old is not None:
+                i = _insert_position(keys, self._sort_key, old + (key,))
+                if i == len(keys) or keys[i] != key:
+                    return False
+                del keys[i]
+                del placed[key]
+            i = index.get(key)
+            if i is not None:
+                placed[key] = (self.engine.checked[i], self.engine.due[i])
+                keys.insert(_insert_position(keys, self._sort_key, placed[key] + (key,)), key)
+        deadline_list.keys_changed(changed)
+        return True
+
+    def plan(self, now, visible_ids):
+        """Returns (ids_to_repaint, next_wake_at) for the rows currently in view."""
+        index = self.engine.index
+        visible = [key for key in visible_ids if key in index]
+        stale = [index[key] for key in visible if key not in self.visible_ids]
+        self.visible_ids = set(visible)
+        repaint, _, wake_at = self.planner.plan(self.engine.due, now, [index[key] for key in visible], stale)
+        ids = self.engine.ids
+        return [ids[i] for i in repaint], wake_at
+
+    def paint(self, deadline_list, key, row, now, midnight=None):
+        """Shows deadline `key` as of `now` on the list row bound to it."""
+        if midnight is None:
+            midnight = local_midnight(now)
+        deadline_list.paint_row(row, **self.engine.row_appearance(self.engine.index[key], now, midnight))
+
+    def step(self, store, deadline_list, now, on_resort=None):
+        """
+        One wake-up of the countdown loop, once the engine has synced with `store`: updates
+        the list's display order if the data changed (see sync_keys), then repaints the bound
+        rows whose state changed. Returns when to wake up next. `deadline_list` is anything
+        with the bound/keys/set_keys/keys_changed/paint_row of deadline_list.
+        """
+        self.sync(store, now)
+        self.sync_keys(store, deadline_list, on_resort)
+        bound = deadline_list.bound
+        repaint, wake_at = self.plan(now, list(bound))
+        midnight = local_midnight(now)
+        for key in repaint:
+            row = bound.get(key)
+            if row is not None:
+                self.paint(deadline_list, key, row, now, midnight)
+        return wake_at